@@ -0,0 +1,66 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.security.config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+_scan_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_db_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.DYNAMODB_EXECUTOR_WORKERS,
+                    thread_name_prefix="dynamodb"
+                )
+                print(f"[INFO][DynamoDB] - Пул потоков создан, workers: {settings.DYNAMODB_EXECUTOR_WORKERS}")
+    return _executor
+
+def get_scan_executor() -> ThreadPoolExecutor:
+    # Отдельный пул для сегментов parallel_scan: сам скан может выполняться в пуле DynamoDB
+    global _scan_executor
+    if _scan_executor is None:
+        with _executor_lock:
+            if _scan_executor is None:
+                _scan_executor = ThreadPoolExecutor(
+                    max_workers=settings.DYNAMODB_SCAN_WORKERS,
+                    thread_name_prefix="dynamodb-scan"
+                )
+    return _scan_executor
+
+async def run_in_db_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(func, *args, **kwargs))
+
+def shutdown_db_executor():
+    global _executor, _scan_executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        if _scan_executor is not None:
+            _scan_executor.shutdown(wait=False, cancel_futures=True)
+            _scan_executor = None
+
+class AsyncRepository:
+    """Awaitable view over a sync repository: every method runs in the DynamoDB thread pool."""
+
+    def __init__(self, target: Any):
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await run_in_db_executor(attr, *args, **kwargs)
+
+        return wrapper
@@ -1,9 +1,58 @@
 import boto3
+import threading
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Iterator, Callable
 from datetime import datetime
 
 from app.core.security.config import settings
+from app.core.database.aio import AsyncRepository, get_scan_executor
+from app.core.database.reducers import Reducer
+
+_shared_client = None
+_shared_resource = None
+_shared_lock = threading.Lock()
+
+def _build_client_config() -> Config:
+    return Config(
+        region_name=settings.AWS_REGION or None,
+        max_pool_connections=settings.DYNAMODB_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.DYNAMODB_CONNECT_TIMEOUT,
+        read_timeout=settings.DYNAMODB_READ_TIMEOUT,
+        tcp_keepalive=True,
+        retries={
+            'max_attempts': settings.DYNAMODB_MAX_ATTEMPTS,
+            'mode': 'adaptive'
+        }
+    )
+
+def get_shared_clients() -> Tuple[Any, Any]:
+    global _shared_client, _shared_resource
+    if _shared_resource is None:
+        with _shared_lock:
+            if _shared_resource is None:
+                session = boto3.session.Session(
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+                    region_name=settings.AWS_REGION or None
+                )
+                resource_params = {'config': _build_client_config()}
+                if settings.AWS_ENDPOINT_URL:
+                    resource_params['endpoint_url'] = settings.AWS_ENDPOINT_URL
+                
+                resource = session.resource('dynamodb', **resource_params)
+                # Клиент ресурса: один пул HTTP-соединений на процесс
+                client = resource.meta.client
+                
+                try:
+                    client.list_tables(Limit=1)
+                except Exception as e:
+                    print(f"[ERROR][DynamoDB] - Тест подключения: {e}")
+                    raise e
+                
+                _shared_client, _shared_resource = client, resource
+                print(f"[INFO][DynamoDB] - Общий клиент создан, pool: {settings.DYNAMODB_MAX_POOL_CONNECTIONS}")
+    return _shared_client, _shared_resource
 
 class BaseDynamoDBConnector:
     def __init__(self):
@@ -11,37 +60,24 @@ class BaseDynamoDBConnector:
         self.dynamodb = None
         self._initialized = False
         self._tables = {}
+        self._aio = None
+    
+    @property
+    def aio(self) -> AsyncRepository:
+        if self._aio is None:
+            self._aio = AsyncRepository(self)
+        return self._aio
     
     def _init_clients(self):
         try:
-            self.client = boto3.client(
-                'dynamodb',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
-            )
-            
-            self.dynamodb = boto3.resource(
-                'dynamodb',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
-            )
-            
-            self._test_connection()
-            
+            self.client, self.dynamodb = get_shared_clients()
         except Exception as e:
             print(f"[ERROR][DynamoDB] - Ошибка инициализации: {e}")
             raise e
     
-    def _test_connection(self):
-        try:
-            list(self.dynamodb.tables.all())
-        except Exception as e:
-            print(f"[ERROR][DynamoDB] - Тест подключения: {e}")
-            raise e
-    
     def get_table(self, table_name: str):
+        if self.dynamodb is None:
+            self._init_clients()
         if table_name not in self._tables:
             self._tables[table_name] = self.dynamodb.Table(table_name)
         return self._tables[table_name]
@@ -70,6 +106,18 @@ class BaseDynamoDBConnector:
             print(f"[ERROR][DynamoDB] - Ошибка создания в {table_name}: {e}")
             raise e
     
+    def create_item_if(self, table_name: str, item: Dict[str, Any], condition: Any) -> bool:
+        """put_item с ConditionExpression: False, если условие не выполнено (запись уже занята)."""
+        try:
+            table = self.get_table(table_name)
+            table.put_item(Item=item, ConditionExpression=condition)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            print(f"[ERROR][DynamoDB] - Ошибка условной записи в {table_name}: {e}")
+            raise e
+    
     def get_item(self, table_name: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         try:
             table = self.get_table(table_name)
@@ -116,42 +164,148 @@ class BaseDynamoDBConnector:
             print(f"[ERROR][DynamoDB] - Ошибка удаления из {table_name}: {e}")
             return False
     
-    def query_items(self, table_name: str, key_condition: Any, 
-                   index_name: str = None, filter_expression: Any = None, 
-                   limit: int = None) -> List[Dict[str, Any]]:
+    def _apply_projection(self, params: Dict[str, Any], projection: List[str] = None):
+        if projection:
+            names = {f"#p{idx}": name for idx, name in enumerate(projection)}
+            params['ProjectionExpression'] = ", ".join(names.keys())
+            params['ExpressionAttributeNames'] = names
+    
+    def _iter_pages(self, table_name: str, operation: str, params: Dict[str, Any],
+                    limit: int = None, raise_errors: bool = False) -> Iterator[Dict[str, Any]]:
         try:
             table = self.get_table(table_name)
+            method = getattr(table, operation)
+            yielded = 0
             
-            query_params = {'KeyConditionExpression': key_condition}
-            
-            if index_name:
-                query_params['IndexName'] = index_name
+            while True:
+                response = method(**params)
+                for item in response.get('Items', []):
+                    yield item
+                    yielded += 1
+                    if limit and yielded >= limit:
+                        return
+                
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    return
+                params['ExclusiveStartKey'] = last_key
+                
+        except ClientError as e:
+            if raise_errors:
+                raise e
+            print(f"[ERROR][DynamoDB] - Ошибка {operation} в {table_name}: {e}")
+    
+    def iter_query(self, table_name: str, key_condition: Any, 
+                   index_name: str = None, filter_expression: Any = None,
+                   projection: List[str] = None, page_size: int = None,
+                   limit: int = None, raise_errors: bool = False) -> Iterator[Dict[str, Any]]:
+        params = {'KeyConditionExpression': key_condition}
+        
+        if index_name:
+            params['IndexName'] = index_name
+        if filter_expression:
+            params['FilterExpression'] = filter_expression
+        if page_size or limit:
+            params['Limit'] = page_size or limit
+        self._apply_projection(params, projection)
+        
+        return self._iter_pages(table_name, 'query', params, limit, raise_errors)
+    
+    def iter_scan(self, table_name: str, filter_expression: Any = None,
+                  projection: List[str] = None, page_size: int = None,
+                  limit: int = None, raise_errors: bool = False) -> Iterator[Dict[str, Any]]:
+        params = {}
+        
+        if filter_expression:
+            params['FilterExpression'] = filter_expression
+        if page_size or limit:
+            params['Limit'] = page_size or limit
+        self._apply_projection(params, projection)
+        
+        return self._iter_pages(table_name, 'scan', params, limit, raise_errors)
+    
+    def query_items(self, table_name: str, key_condition: Any, 
+                   index_name: str = None, filter_expression: Any = None, 
+                   limit: int = None, projection: List[str] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_query(
+            table_name, key_condition,
+            index_name=index_name,
+            filter_expression=filter_expression,
+            projection=projection,
+            limit=limit
+        ))
+    
+    def scan_items(self, table_name: str, filter_expression: Any = None, 
+                  limit: int = None, projection: List[str] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_scan(
+            table_name,
+            filter_expression=filter_expression,
+            projection=projection,
+            limit=limit
+        ))
+    
+    def parallel_scan(self, table_name: str, reducer_factory: Callable[[], Reducer],
+                      filter_expression: Any = None, projection: List[str] = None,
+                      total_segments: int = None) -> Reducer:
+        total_segments = total_segments or settings.DYNAMODB_SCAN_SEGMENTS
+        
+        def scan_segment(segment: int) -> Reducer:
+            reducer = reducer_factory()
+            params = {'Segment': segment, 'TotalSegments': total_segments}
             if filter_expression:
-                query_params['FilterExpression'] = filter_expression
-            if limit:
-                query_params['Limit'] = limit
-            
-            response = table.query(**query_params)
-            return response.get('Items', [])
+                params['FilterExpression'] = filter_expression
+            self._apply_projection(params, projection)
             
+            # Ошибка сегмента не должна превращаться в частичный результат агрегата
+            for item in self._iter_pages(table_name, 'scan', params, raise_errors=True):
+                reducer.add(item)
+            return reducer
+        
+        pool = get_scan_executor()
+        futures = [pool.submit(scan_segment, segment) for segment in range(total_segments)]
+        try:
+            segment_reducers = [future.result() for future in futures]
+        except Exception as e:
+            for future in futures:
+                future.cancel()
+            print(f"[ERROR][DynamoDB] - Ошибка parallel scan в {table_name}: {e}")
+            raise
+        
+        merged = segment_reducers[0]
+        for reducer in segment_reducers[1:]:
+            merged.merge(reducer)
+        return merged
+    
+    def delete_items(self, table_name: str, keys: List[Dict[str, Any]]) -> int:
+        if not keys:
+            return 0
+        try:
+            table = self.get_table(table_name)
+            with table.batch_writer() as batch_writer:
+                for key in keys:
+                    batch_writer.delete_item(Key=key)
+            return len(keys)
         except ClientError as e:
-            print(f"[ERROR][DynamoDB] - Ошибка запроса к {table_name}: {e}")
-            return []
+            print(f"[ERROR][DynamoDB] - Ошибка пакетного удаления из {table_name}: {e}")
+            return 0
     
-    def scan_items(self, table_name: str, filter_expression: Any = None, 
-                  limit: int = None) -> List[Dict[str, Any]]:
+    def count_items(self, table_name: str, filter_expression: Any = None) -> int:
         try:
             table = self.get_table(table_name)
-            
-            scan_params = {}
+            params = {'Select': 'COUNT'}
             if filter_expression:
-                scan_params['FilterExpression'] = filter_expression
-            if limit:
-                scan_params['Limit'] = limit
-            
-            response = table.scan(**scan_params)
-            return response.get('Items', [])
+                params['FilterExpression'] = filter_expression
             
+            total = 0
+            while True:
+                response = table.scan(**params)
+                total += response.get('Count', 0)
+                
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    return total
+                params['ExclusiveStartKey'] = last_key
+                
         except ClientError as e:
-            print(f"[ERROR][DynamoDB] - Ошибка сканирования {table_name}: {e}")
-            return []
\ No newline at end of file
+            print(f"[ERROR][DynamoDB] - Ошибка подсчета в {table_name}: {e}")
+            return 0
@@ -4,6 +4,7 @@ from app.core.database.repositories.otp import OTPRepository
 from .base import BaseDynamoDBConnector
 from .repositories.user import UserRepository
 from .repositories.generic import GenericRepository
+from .query_planner import query_planner
 
 class DynamoDBConnector(BaseDynamoDBConnector):
     def __init__(self):
@@ -65,7 +66,8 @@ class DynamoDBConnector(BaseDynamoDBConnector):
                 'total_tables': len(table_names),
                 'table_names': table_names,
                 'repositories': repo_info,
-                'cached_tables': len(self._tables)
+                'cached_tables': len(self._tables),
+                'query_plans': query_planner.report()
             }
             
         except Exception as e:
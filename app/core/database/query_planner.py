@@ -0,0 +1,77 @@
+import threading
+from typing import Dict, Any, Optional, Set, Tuple
+
+from app.core.database.table_schemas import get_primary_key, get_table_indexes
+
+class QueryPlan:
+    def __init__(self, table_name: str, field_name: str, strategy: str, index_name: Optional[str] = None):
+        self.table_name = table_name
+        self.field_name = field_name
+        self.strategy = strategy
+        self.index_name = index_name
+
+    @property
+    def is_scan(self) -> bool:
+        return self.strategy == 'scan'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'table': self.table_name,
+            'field': self.field_name,
+            'strategy': self.strategy,
+            'index': self.index_name
+        }
+
+class QueryPlanner:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, str, str], int] = {}
+        self._unavailable_indexes: Set[Tuple[str, str]] = set()
+        self._reported_scans: Set[Tuple[str, str]] = set()
+
+    def explain(self, table_name: str, field_name: str) -> QueryPlan:
+        """План без побочных эффектов: не попадает в счетчики report() и не пишет предупреждений."""
+        if field_name == get_primary_key(table_name):
+            return QueryPlan(table_name, field_name, 'get_item')
+
+        index_name = get_table_indexes(table_name).get(field_name)
+        if index_name and (table_name, index_name) not in self._unavailable_indexes:
+            return QueryPlan(table_name, field_name, 'query', index_name)
+        return QueryPlan(table_name, field_name, 'scan')
+
+    def plan(self, table_name: str, field_name: str) -> QueryPlan:
+        plan = self.explain(table_name, field_name)
+        self._record(plan)
+        return plan
+
+    def mark_index_unavailable(self, table_name: str, index_name: str):
+        with self._lock:
+            self._unavailable_indexes.add((table_name, index_name))
+        print(f"[WARNING][QueryPlanner] - Индекс {index_name} недоступен в {table_name}, переход на scan")
+
+    def _record(self, plan: QueryPlan):
+        key = (plan.table_name, plan.field_name, plan.strategy)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            first_scan = plan.is_scan and (plan.table_name, plan.field_name) not in self._reported_scans
+            if first_scan:
+                self._reported_scans.add((plan.table_name, plan.field_name))
+
+        if first_scan:
+            print(f"[WARNING][QueryPlanner] - Поиск по {plan.table_name}.{plan.field_name} без индекса: полный scan")
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            plans = [
+                {'table': table, 'field': field, 'strategy': strategy, 'calls': calls}
+                for (table, field, strategy), calls in sorted(self._counts.items())
+            ]
+            unavailable = [f"{table}:{index}" for table, index in sorted(self._unavailable_indexes)]
+
+        return {
+            'plans': plans,
+            'degraded_to_scan': [plan for plan in plans if plan['strategy'] == 'scan'],
+            'unavailable_indexes': unavailable
+        }
+
+query_planner = QueryPlanner()
@@ -0,0 +1,144 @@
+from typing import Dict, Any, Optional, Callable, Set
+
+def to_number(value: Any) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    try:
+        return float(str(value).replace(',', ''))
+    except (ValueError, TypeError):
+        return None
+
+class Reducer:
+    """Потоковый агрегат: add() на каждый элемент, merge() для объединения сегментов."""
+
+    def add(self, item: Dict[str, Any]):
+        raise NotImplementedError
+
+    def merge(self, other: 'Reducer'):
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+class CountReducer(Reducer):
+    def __init__(self):
+        self.count = 0
+
+    def add(self, item: Dict[str, Any]):
+        self.count += 1
+
+    def merge(self, other: 'CountReducer'):
+        self.count += other.count
+
+    def result(self) -> int:
+        return self.count
+
+class SumReducer(Reducer):
+    def __init__(self, field: str):
+        self.field = field
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, item: Dict[str, Any]):
+        value = to_number(item.get(self.field))
+        if value is not None:
+            self.total += value
+            self.count += 1
+
+    def merge(self, other: 'SumReducer'):
+        self.total += other.total
+        self.count += other.count
+
+    def result(self) -> float:
+        return self.total
+
+class MinMaxReducer(Reducer):
+    def __init__(self, field: str, parse: Callable[[Any], Any] = to_number):
+        self.field = field
+        self.parse = parse
+        self.min = None
+        self.max = None
+
+    def _update(self, value: Any):
+        if value is None:
+            return
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def add(self, item: Dict[str, Any]):
+        if self.field in item:
+            self._update(self.parse(item[self.field]))
+
+    def merge(self, other: 'MinMaxReducer'):
+        self._update(other.min)
+        self._update(other.max)
+
+    def result(self) -> Dict[str, Any]:
+        return {'min': self.min, 'max': self.max}
+
+class FieldsReducer(Reducer):
+    def __init__(self):
+        self.fields: Set[str] = set()
+
+    def add(self, item: Dict[str, Any]):
+        self.fields.update(item.keys())
+
+    def merge(self, other: 'FieldsReducer'):
+        self.fields |= other.fields
+
+    def result(self) -> Set[str]:
+        return self.fields
+
+class CollectReducer(Reducer):
+    def __init__(self, field: str):
+        self.field = field
+        self.values = []
+
+    def add(self, item: Dict[str, Any]):
+        if self.field in item:
+            self.values.append(item[self.field])
+
+    def merge(self, other: 'CollectReducer'):
+        self.values.extend(other.values)
+
+    def result(self) -> list:
+        return self.values
+
+class GroupByReducer(Reducer):
+    def __init__(self, key: Callable[[Dict[str, Any]], Any], reducer_factory: Callable[[], Reducer]):
+        self.key = key
+        self.reducer_factory = reducer_factory
+        self.groups: Dict[Any, Reducer] = {}
+
+    def add(self, item: Dict[str, Any]):
+        group_key = self.key(item)
+        if group_key not in self.groups:
+            self.groups[group_key] = self.reducer_factory()
+        self.groups[group_key].add(item)
+
+    def merge(self, other: 'GroupByReducer'):
+        for group_key, reducer in other.groups.items():
+            if group_key in self.groups:
+                self.groups[group_key].merge(reducer)
+            else:
+                self.groups[group_key] = reducer
+
+    def result(self) -> Dict[Any, Any]:
+        return {group_key: reducer.result() for group_key, reducer in self.groups.items()}
+
+class MultiReducer(Reducer):
+    def __init__(self, **reducers: Reducer):
+        self.reducers = reducers
+
+    def add(self, item: Dict[str, Any]):
+        for reducer in self.reducers.values():
+            reducer.add(item)
+
+    def merge(self, other: 'MultiReducer'):
+        for name, reducer in self.reducers.items():
+            reducer.merge(other.reducers[name])
+
+    def result(self) -> Dict[str, Any]:
+        return {name: reducer.result() for name, reducer in self.reducers.items()}
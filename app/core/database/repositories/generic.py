@@ -1,9 +1,15 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator, Callable
 from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
 import uuid
 from datetime import datetime
 
 from ..base import BaseDynamoDBConnector
+from ..query_planner import query_planner
+from ..reducers import Reducer, MultiReducer, CountReducer, FieldsReducer, MinMaxReducer
+
+def not_deleted():
+    return Attr('is_deleted').not_exists() | Attr('is_deleted').ne(True)
 
 class GenericRepository(BaseDynamoDBConnector):
     def __init__(self, table_name: str):
@@ -15,6 +21,14 @@ class GenericRepository(BaseDynamoDBConnector):
             data['id'] = str(uuid.uuid4())
         return self.create_item(self.table_name, data)
     
+    def create_if(self, data: Dict[str, Any], condition: Any) -> bool:
+        return self.create_item_if(self.table_name, data, condition)
+    
+    def upsert_if_changed(self, data: Dict[str, Any], hash_field: str = 'content_hash') -> bool:
+        """Условная запись по ключу: False, если строка уже есть с тем же хэшем содержимого."""
+        condition = Attr('id').not_exists() | Attr(hash_field).not_exists() | Attr(hash_field).ne(data[hash_field])
+        return self.create_item_if(self.table_name, data, condition)
+    
     def get_by_id(self, item_id: str) -> Optional[Dict[str, Any]]:
         return self.get_item(self.table_name, {'id': item_id})
     
@@ -24,8 +38,30 @@ class GenericRepository(BaseDynamoDBConnector):
     def delete_by_id(self, item_id: str) -> bool:
         return self.delete_item(self.table_name, {'id': item_id})
     
-    def list_all(self, limit: int = None) -> List[Dict[str, Any]]:
-        return self.scan_items(self.table_name, limit=limit)
+    def list_all(self, limit: int = None, projection: List[str] = None) -> List[Dict[str, Any]]:
+        return self.scan_items(self.table_name, limit=limit, projection=projection)
+    
+    def iter_all(self, filter_expression: Any = None, projection: List[str] = None,
+                 page_size: int = None, raise_errors: bool = False) -> Iterator[Dict[str, Any]]:
+        return self.iter_scan(
+            self.table_name,
+            filter_expression=filter_expression,
+            projection=projection,
+            page_size=page_size,
+            raise_errors=raise_errors
+        )
+    
+    def explain(self, field_name: str) -> Dict[str, Any]:
+        return query_planner.explain(self.table_name, field_name).to_dict()
+    
+    @staticmethod
+    def _is_missing_index(error: ClientError) -> bool:
+        code = error.response['Error']['Code']
+        message = error.response['Error'].get('Message', '').lower()
+        if code == 'ResourceNotFoundException':
+            return True
+        # DynamoDB: "The table does not have the specified index: ..."
+        return code == 'ValidationException' and 'specified index' in message
     
     def find_by_field(self, field_name: str, field_value: Any, 
                      index_name: str = None) -> List[Dict[str, Any]]:
@@ -35,11 +71,32 @@ class GenericRepository(BaseDynamoDBConnector):
                 key_condition=Key(field_name).eq(field_value),
                 index_name=index_name
             )
-        else:
-            return self.scan_items(
-                self.table_name,
-                filter_expression=Attr(field_name).eq(field_value)
-            )
+        
+        plan = query_planner.plan(self.table_name, field_name)
+        
+        if plan.strategy == 'get_item':
+            item = self.get_item(self.table_name, {field_name: field_value})
+            return [item] if item else []
+        
+        if plan.strategy == 'query':
+            try:
+                return list(self.iter_query(
+                    self.table_name,
+                    key_condition=Key(field_name).eq(field_value),
+                    index_name=plan.index_name,
+                    raise_errors=True
+                ))
+            except ClientError as e:
+                # План понижается до scan только при отсутствующем индексе; прочие ошибки запроса его не меняют
+                if not self._is_missing_index(e):
+                    print(f"[ERROR][DynamoDB] - Ошибка запроса к {self.table_name}: {e}")
+                    return []
+                query_planner.mark_index_unavailable(self.table_name, plan.index_name)
+        
+        return self.scan_items(
+            self.table_name,
+            filter_expression=Attr(field_name).eq(field_value)
+        )
     
     def find_by_multiple_fields(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
         filter_expressions = [Attr(field).eq(value) for field, value in filters.items()]
@@ -50,33 +107,38 @@ class GenericRepository(BaseDynamoDBConnector):
         return self.scan_items(self.table_name, filter_expression=combined_filter)
     
     def count_total(self) -> int:
-        response = self.get_table(self.table_name).scan(Select='COUNT')
-        return response.get('Count', 0)
+        return self.count_items(self.table_name)
+    
+    def aggregate(self, reducer_factory: Callable[[], Reducer], filter_expression: Any = None,
+                  projection: List[str] = None, total_segments: int = None) -> Any:
+        return self.parallel_scan(
+            self.table_name,
+            reducer_factory,
+            filter_expression=filter_expression,
+            projection=projection,
+            total_segments=total_segments
+        ).result()
     
     def get_stats(self) -> Dict[str, Any]:
-        items = self.scan_items(self.table_name)
+        stats = self.aggregate(lambda: MultiReducer(
+            total=CountReducer(),
+            fields=FieldsReducer(),
+            created_at=MinMaxReducer('created_at', parse=str)
+        ))
         
-        if not items:
+        if not stats['total']:
             return {
                 'total_items': 0,
                 'table_name': self.table_name,
                 'created_at': datetime.utcnow().isoformat()
             }
         
-        field_counts = {}
-        for item in items:
-            for field in item.keys():
-                field_counts[field] = field_counts.get(field, 0) + 1
-        
-        oldest_item = min(items, key=lambda x: x.get('created_at', ''), default={})
-        newest_item = max(items, key=lambda x: x.get('created_at', ''), default={})
-        
         return {
             'table_name': self.table_name,
-            'total_items': len(items),
-            'fields': list(field_counts.keys()),
-            'oldest_record': oldest_item.get('created_at'),
-            'newest_record': newest_item.get('created_at'),
+            'total_items': stats['total'],
+            'fields': list(stats['fields']),
+            'oldest_record': stats['created_at']['min'],
+            'newest_record': stats['created_at']['max'],
             'analysis_timestamp': datetime.utcnow().isoformat()
         }
     
@@ -3,7 +3,9 @@ from uuid import UUID
 from decimal import Decimal
 import logging
 
+from app.core.database.aio import run_in_db_executor
 from app.core.database.repositories.generic import GenericRepository
+from app.core.database.reducers import SumReducer
 from app.models.market import Token, TokenStats, Exchange, ExchangesStats
 
 logger = logging.getLogger(__name__)
@@ -33,10 +35,12 @@ class MarketRepository:
     
     async def get_total_market_cap(self) -> Dict[str, float]:
         try:
-            all_stats = self.token_stats_repo.list_all()
-            
-            total_btc = sum(float(stat.get("market_cap", 0)) * 0.0000143 for stat in all_stats if stat.get("market_cap"))
-            total_usd = sum(float(stat.get("market_cap", 0)) for stat in all_stats if stat.get("market_cap"))
+            total_usd = await run_in_db_executor(
+                self.token_stats_repo.aggregate,
+                lambda: SumReducer("market_cap"),
+                projection=["market_cap"]
+            )
+            total_btc = total_usd * 0.0000143
             
             return {
                 "btc": total_btc,
@@ -52,9 +56,11 @@ class MarketRepository:
     
     async def get_total_volume(self) -> Dict[str, float]:
         try:
-            all_stats = self.token_stats_repo.list_all()
-            
-            total_usd = sum(float(stat.get("trading_volume_24h", 0)) for stat in all_stats if stat.get("trading_volume_24h"))
+            total_usd = await run_in_db_executor(
+                self.token_stats_repo.aggregate,
+                lambda: SumReducer("trading_volume_24h"),
+                projection=["trading_volume_24h"]
+            )
             
             return {
                 "btc": total_usd * 0.0000143,
@@ -4,6 +4,7 @@ from datetime import datetime
 import uuid
 
 from ..base import BaseDynamoDBConnector
+from ..reducers import CollectReducer
 
 class OTPRepository(BaseDynamoDBConnector):
     def __init__(self, table_name: str = "otp_codes"):
@@ -70,15 +71,14 @@ class OTPRepository(BaseDynamoDBConnector):
     def cleanup_expired_otps(self) -> int:
         current_time = datetime.utcnow().isoformat()
         
-        expired_items = self.scan_items(
+        expired_ids = self.parallel_scan(
             self.table_name,
-            filter_expression=Attr('expires_at').lt(current_time)
-        )
+            lambda: CollectReducer('id'),
+            filter_expression=Attr('expires_at').lt(current_time),
+            projection=['id']
+        ).result()
         
-        deleted_count = 0
-        for item in expired_items:
-            if self.delete_item(self.table_name, {'id': item['id']}):
-                deleted_count += 1
+        deleted_count = self.delete_items(self.table_name, [{'id': otp_id} for otp_id in expired_ids])
         
         if deleted_count > 0:
             print(f"[INFO][OTP] - Удалено {deleted_count} истекших OTP кодов")
@@ -581,4 +581,44 @@ otp_schema = OTPSchema()
 tokens_schema = TokensSchema()
 token_stats_schema = TokenStatsSchema()
 exchanges_schema = ExchangesSchema()
-exchange_stats_schema = ExchangeStatsSchema()
\ No newline at end of file
+exchange_stats_schema = ExchangeStatsSchema()
+all_schemas = [
+    users_schema,
+    otp_schema,
+    tokens_schema,
+    token_stats_schema,
+    exchanges_schema,
+    exchange_stats_schema,
+    roadmaps_schema,
+    security_audit_schema,
+    people_schema,
+    platform_schema
+]
+
+def _hash_key(key_schema):
+    for key in key_schema:
+        if key['KeyType'] == 'HASH':
+            return key['AttributeName']
+    return None
+
+def get_schema(table_name: str):
+    for schema in all_schemas:
+        if schema.table_name == table_name:
+            return schema
+    return None
+
+def get_primary_key(table_name: str):
+    schema = get_schema(table_name)
+    return _hash_key(schema.key_schema) if schema else 'id'
+
+def get_table_indexes(table_name: str):
+    schema = get_schema(table_name)
+    if not schema:
+        return {}
+    
+    indexes = {}
+    for index in getattr(schema, 'global_secondary_indexes', []):
+        attribute = _hash_key(index['KeySchema'])
+        if attribute:
+            indexes[attribute] = index['IndexName']
+    return indexes
@@ -61,6 +61,38 @@ class Settings:
     def DYNAMODB_OTP_TABLE(self) -> str:
         return _dynaconf.get("dynamodb_otp_table", "")
     
+    @property
+    def DYNAMODB_EXECUTOR_WORKERS(self) -> int:
+        return _dynaconf.get("dynamodb_executor_workers", 32)
+    
+    @property
+    def DYNAMODB_MAX_POOL_CONNECTIONS(self) -> int:
+        return _dynaconf.get("dynamodb_max_pool_connections", 50)
+    
+    @property
+    def DYNAMODB_MAX_ATTEMPTS(self) -> int:
+        return _dynaconf.get("dynamodb_max_attempts", 5)
+    
+    @property
+    def DYNAMODB_CONNECT_TIMEOUT(self) -> float:
+        return _dynaconf.get("dynamodb_connect_timeout", 5)
+    
+    @property
+    def DYNAMODB_READ_TIMEOUT(self) -> float:
+        return _dynaconf.get("dynamodb_read_timeout", 15)
+    
+    @property
+    def DYNAMODB_SCAN_SEGMENTS(self) -> int:
+        return _dynaconf.get("dynamodb_scan_segments", min(32, (os.cpu_count() or 1) * 2))
+    
+    @property
+    def DYNAMODB_SCAN_WORKERS(self) -> int:
+        return _dynaconf.get("dynamodb_scan_workers", 32)
+    
+    @property
+    def TOKEN_SNAPSHOT_REFRESH_SECONDS(self) -> int:
+        return _dynaconf.get("token_snapshot_refresh_seconds", 60)
+    
     @property
     def GOOGLE_CLIENT_ID(self) -> str:
         return _dynaconf.get("google_client_id", "")
@@ -105,6 +137,194 @@ class Settings:
     def COINGECKO_PRO_ENABLED(self) -> bool:
         return _dynaconf.get("coingecko_pro_enabled", False)
     
+    @property
+    def HTTP_CLIENT_HTTP2(self) -> bool:
+        return _dynaconf.get("http_client_http2", True)
+    
+    @property
+    def HTTP_CLIENT_MAX_CONNECTIONS(self) -> int:
+        return _dynaconf.get("http_client_max_connections", 100)
+    
+    @property
+    def HTTP_CLIENT_MAX_KEEPALIVE(self) -> int:
+        return _dynaconf.get("http_client_max_keepalive", 20)
+    
+    @property
+    def HTTP_CLIENT_KEEPALIVE_EXPIRY(self) -> float:
+        return _dynaconf.get("http_client_keepalive_expiry", 60.0)
+    
+    @property
+    def HTTP_CLIENT_CONNECT_TIMEOUT(self) -> float:
+        return _dynaconf.get("http_client_connect_timeout", 5.0)
+    
+    @property
+    def HTTP_CLIENT_READ_TIMEOUT(self) -> float:
+        return _dynaconf.get("http_client_read_timeout", 30.0)
+    
+    @property
+    def COINGECKO_FREE_REQUESTS_PER_MINUTE(self) -> int:
+        return _dynaconf.get("coingecko_free_requests_per_minute", 30)
+    
+    @property
+    def COINGECKO_PRO_REQUESTS_PER_MINUTE(self) -> int:
+        return _dynaconf.get("coingecko_pro_requests_per_minute", 500)
+    
+    @property
+    def COINGECKO_MAX_RETRIES(self) -> int:
+        return _dynaconf.get("coingecko_max_retries", 3)
+    
+    @property
+    def COINGECKO_MAX_BACKOFF_SECONDS(self) -> float:
+        return _dynaconf.get("coingecko_max_backoff_seconds", 30.0)
+    
+    @property
+    def COINGECKO_MAX_PENDING(self) -> int:
+        return _dynaconf.get("coingecko_max_pending", 200)
+    
+    @property
+    def COINGECKO_QUEUE_TIMEOUT(self) -> float:
+        return _dynaconf.get("coingecko_queue_timeout", 30.0)
+    
+    @property
+    def COINGECKO_BREAKER_THRESHOLD(self) -> int:
+        return _dynaconf.get("coingecko_breaker_threshold", 5)
+    
+    @property
+    def COINGECKO_BREAKER_RESET_SECONDS(self) -> float:
+        return _dynaconf.get("coingecko_breaker_reset_seconds", 30.0)
+    
+    @property
+    def COINGECKO_CATALOG_DIR(self) -> str:
+        return _dynaconf.get("coingecko_catalog_dir", os.path.join(project_root, ".cache", "coingecko"))
+    
+    @property
+    def COINGECKO_CATALOG_TTL_SECONDS(self) -> int:
+        return _dynaconf.get("coingecko_catalog_ttl_seconds", 86400)
+    
+    @property
+    def CHART_CACHE_MAX_BYTES(self) -> int:
+        return _dynaconf.get("chart_cache_max_bytes", 64 * 1024 * 1024)
+    
+    @property
+    def CHART_CACHE_MAX_STALE_SECONDS(self) -> int:
+        return _dynaconf.get("chart_cache_max_stale_seconds", 86400)
+    
+    @property
+    def CHART_CACHE_DIR(self) -> str:
+        return _dynaconf.get("chart_cache_dir", "")
+    
+    @property
+    def COIN_METADATA_TTL_SECONDS(self) -> int:
+        return _dynaconf.get("coin_metadata_ttl_seconds", 86400)
+    
+    @property
+    def COIN_METADATA_NEGATIVE_TTL_SECONDS(self) -> int:
+        return _dynaconf.get("coin_metadata_negative_ttl_seconds", 300)
+    
+    @property
+    def COIN_METADATA_MAX_ENTRIES(self) -> int:
+        return _dynaconf.get("coin_metadata_max_entries", 10000)
+    
+    @property
+    def PRICE_POLLER_INTERVAL_SECONDS(self) -> int:
+        return _dynaconf.get("price_poller_interval_seconds", 30)
+    
+    @property
+    def PRICE_POLLER_MAX_INTERVAL_SECONDS(self) -> int:
+        return _dynaconf.get("price_poller_max_interval_seconds", 300)
+    
+    @property
+    def PRICE_POLLER_BATCH_SIZE(self) -> int:
+        return _dynaconf.get("price_poller_batch_size", 250)
+    
+    @property
+    def PRICE_POLLER_BUDGET_SHARE(self) -> float:
+        return _dynaconf.get("price_poller_budget_share", 0.5)
+    
+    @property
+    def WS_SEND_QUEUE_SIZE(self) -> int:
+        return _dynaconf.get("ws_send_queue_size", 64)
+    
+    @property
+    def WS_SEND_TIMEOUT_SECONDS(self) -> float:
+        return _dynaconf.get("ws_send_timeout_seconds", 5.0)
+    
+    @property
+    def WS_MAX_SUBSCRIPTIONS(self) -> int:
+        return _dynaconf.get("ws_max_subscriptions", 200)
+    
+    @property
+    def PRICE_BROKER_URL(self) -> str:
+        return _dynaconf.get("price_broker_url", "")
+    
+    @property
+    def PRICE_BROKER_CHANNEL(self) -> str:
+        return _dynaconf.get("price_broker_channel", "liberandum:prices")
+    
+    @property
+    def PRICE_BROKER_TIMEOUT_SECONDS(self) -> float:
+        return _dynaconf.get("price_broker_timeout_seconds", 5.0)
+    
+    @property
+    def PRICE_HISTORY_CAPACITY(self) -> int:
+        return _dynaconf.get("price_history_capacity", 2880)
+    
+    @property
+    def PRICE_HISTORY_MAX_TOKENS(self) -> int:
+        return _dynaconf.get("price_history_max_tokens", 300)
+    
+    @property
+    def GLOBAL_MARKET_FETCH_TIMEOUT_SECONDS(self) -> float:
+        return _dynaconf.get("global_market_fetch_timeout_seconds", 10.0)
+    
+    @property
+    def GLOBAL_MARKET_ALT_SEASON_TIMEOUT_SECONDS(self) -> float:
+        return _dynaconf.get("global_market_alt_season_timeout_seconds", 8.0)
+    
+    @property
+    def GLOBAL_MARKET_REFRESH_AHEAD_RATIO(self) -> float:
+        return _dynaconf.get("global_market_refresh_ahead_ratio", 0.8)
+    
+    @property
+    def GLOBAL_MARKET_REFRESH_LEASE_SECONDS(self) -> int:
+        return _dynaconf.get("global_market_refresh_lease_seconds", 120)
+    
+    @property
+    def GLOBAL_MARKET_REFRESH_CHECK_SECONDS(self) -> float:
+        return _dynaconf.get("global_market_refresh_check_seconds", 60.0)
+    
+    @property
+    def SCHEDULER_LEASE_TABLE(self) -> str:
+        return _dynaconf.get("scheduler_lease_table", "scheduler_leases")
+    
+    @property
+    def SCHEDULER_JITTER_RATIO(self) -> float:
+        return _dynaconf.get("scheduler_jitter_ratio", 0.1)
+    
+    @property
+    def SCHEDULER_MAX_CONCURRENT_JOBS(self) -> int:
+        return _dynaconf.get("scheduler_max_concurrent_jobs", 4)
+    
+    @property
+    def SCHEDULER_JOB_TIMEOUT_SECONDS(self) -> float:
+        return _dynaconf.get("scheduler_job_timeout_seconds", 300.0)
+    
+    @property
+    def OTP_CLEANUP_INTERVAL_SECONDS(self) -> float:
+        return _dynaconf.get("otp_cleanup_interval_seconds", 3600.0)
+    
+    @property
+    def INGESTION_MAX_COINS(self) -> int:
+        return _dynaconf.get("ingestion_max_coins", 2500)
+    
+    @property
+    def INGESTION_SPARKLINE_POINTS(self) -> int:
+        return _dynaconf.get("ingestion_sparkline_points", 42)
+    
+    @property
+    def INGESTION_INTERVAL_SECONDS(self) -> float:
+        return _dynaconf.get("ingestion_interval_seconds", 900.0)
+    
     @property
     def DEVELOPMENT_MODE(self) -> bool:
         return _dynaconf.get("development_mode", True)
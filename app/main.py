@@ -77,12 +77,34 @@ async def startup_event():
             system_info = connector.get_system_info()
             print(f"[INFO][APP] - Статус БД: {system_info.get('status')}")
             print(f"[INFO][APP] - Таблиц: {system_info.get('total_tables')}")
+            
+            from app.services.scheduler import scheduler, register_default_jobs
+            register_default_jobs()
+            scheduler.start()
         else:
             print("[ERROR][APP] - Не удалось инициализировать базу данных")
+        
+        from app.services.market.price_broker import price_broker
+        await price_broker.start()
             
     except Exception as e:
         print(f"[ERROR][APP] - Ошибка инициализации: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    from app.services.scheduler import scheduler
+    await scheduler.stop()
+    
+    from app.services.market.websocket_manager import manager
+    await manager.poller.stop()
+    await manager.broker.stop()
+    
+    from app.services.http_client import close_http_clients
+    await close_http_clients()
+    
+    from app.core.database.aio import shutdown_db_executor
+    shutdown_db_executor()
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -7,6 +7,7 @@ import uuid
 from app.core.security.permissions import require_admin
 from app.core.database.connector import get_generic_repository
 from app.core.security.security import get_admin_user
+from app.services.market.utils import token_stats_id, content_hash
 
 class BaseAdminController:
     def __init__(self, table_name: str, entity_name: str):
@@ -46,7 +47,7 @@ class BaseAdminController:
             repo = self._get_repository()
             
             entity_data = self._add_audit_fields(entity_data, current_user['id'], "create")
-            created_entity = repo.create(entity_data, auto_id=False)
+            created_entity = await repo.aio.create(entity_data, auto_id=False)
             
             return {
                 "message": f"{self.entity_name} создан",
@@ -62,7 +63,7 @@ class BaseAdminController:
     async def get_entities_list(self, limit: Optional[int], current_user: Dict[str, Any]):
         try:
             repo = self._get_repository()
-            items = repo.scan_items(self.table_name, limit=limit)
+            items = await repo.aio.scan_items(self.table_name, limit=limit)
             active_items = [item for item in items if not item.get('is_deleted', False)]
             
             return {
@@ -79,7 +80,7 @@ class BaseAdminController:
     async def get_entity_by_id(self, entity_id: str, current_user: Dict[str, Any]):
         try:
             repo = self._get_repository()
-            entity = repo.get_by_id(entity_id)
+            entity = await repo.aio.get_by_id(entity_id)
             
             if not entity:
                 raise HTTPException(
@@ -103,7 +104,7 @@ class BaseAdminController:
         try:
             repo = self._get_repository()
             
-            existing_entity = repo.get_by_id(entity_id)
+            existing_entity = await repo.aio.get_by_id(entity_id)
             if not existing_entity:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND, 
@@ -111,7 +112,7 @@ class BaseAdminController:
                 )
             
             updates = self._add_audit_fields(updates, current_user['id'], "update")
-            updated_entity = repo.update_by_id(entity_id, updates)
+            updated_entity = await repo.aio.update_by_id(entity_id, updates)
             
             return {
                 "message": f"{self.entity_name} обновлен",
@@ -130,7 +131,7 @@ class BaseAdminController:
         try:
             repo = self._get_repository()
             
-            existing_entity = repo.get_by_id(entity_id)
+            existing_entity = await repo.aio.get_by_id(entity_id)
             if not existing_entity:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND, 
@@ -138,7 +139,7 @@ class BaseAdminController:
                 )
             
             delete_data = self._add_audit_fields({}, current_user['id'], "delete")
-            repo.update_by_id(entity_id, delete_data)
+            await repo.aio.update_by_id(entity_id, delete_data)
             
             return {
                 "message": f"{self.entity_name} удален",
@@ -151,4 +152,41 @@ class BaseAdminController:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
                 detail=f"Ошибка удаления {self.entity_name.lower()}: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+class TokenStatsAdminController(BaseAdminController):
+    """Token stats пишутся под ключом из coingecko_id, как у синхронизации: ручное создание не плодит дублей."""
+    
+    def __init__(self, entity_name: str = "token-stats"):
+        super().__init__("LiberandumAggregationTokenStats", entity_name)
+    
+    async def create_entity(self, entity_data: Dict[str, Any], current_user: Dict[str, Any]):
+        coingecko_id = str(entity_data.get('coingecko_id') or '').lower()
+        if not coingecko_id:
+            return await super().create_entity(entity_data, current_user)
+        
+        try:
+            repo = self._get_repository()
+            item_id = token_stats_id(coingecko_id)
+            existing = await repo.aio.get_by_id(item_id)
+            timestamp = datetime.now().isoformat()
+            
+            # Поля существующей строки (is_halal, история ручных правок) сохраняются, новые данные поверх
+            item = {**(existing or {}), **entity_data, 'id': item_id, 'updated_at': timestamp, 'is_deleted': False}
+            if existing is None:
+                item.update({'created_at': timestamp, 'created_by_admin': current_user['id']})
+            else:
+                item['updated_by_admin'] = current_user['id']
+            item['content_hash'] = content_hash(item)
+            await repo.aio.upsert_if_changed(item)
+            
+            return {
+                "message": f"{self.entity_name} создан" if existing is None else f"{self.entity_name} обновлен",
+                "entity": item,
+                "admin": current_user['email']
+            }
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+                detail=f"Ошибка создания {self.entity_name.lower()}: {str(e)}"
+            )
@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from typing import List, Optional, Dict, Any
 
+from boto3.dynamodb.conditions import Attr
+
 from app.core.database.connector import get_generic_repository
+from app.core.database.repositories.generic import not_deleted
+from app.core.database.aio import run_in_db_executor
 from app.core.security.security import get_admin_user
 
 try:
@@ -74,37 +78,41 @@ async def search_tokens(
 ):
     try:
         tokens_repo = get_generic_repository("LiberandumAggregationToken")
-        all_tokens = tokens_repo.list_all(limit=1000)
-        
         query_lower = q.lower().strip()
-        results = []
         
-        for token in all_tokens:
-            if token.get('is_deleted', False):
-                continue
+        def collect() -> List[Dict[str, Any]]:
+            results = []
+            
+            for token in tokens_repo.iter_all(filter_expression=not_deleted()):
+                if token.get('is_deleted', False):
+                    continue
                 
-            name = token.get('name', '').lower()
-            symbol = token.get('symbol', '').lower()
-            coingecko_id = token.get('coingecko_id', '').lower()
+                name = token.get('name', '').lower()
+                symbol = token.get('symbol', '').lower()
+                coingecko_id = token.get('coingecko_id', '').lower()
             
-            if (query_lower in name or 
-                query_lower in symbol or 
-                query_lower in coingecko_id or
-                symbol == query_lower):
+                if (query_lower in name or 
+                    query_lower in symbol or 
+                    query_lower in coingecko_id or
+                    symbol == query_lower):
                 
-                results.append({
-                    'id': token.get('id'),
-                    'name': token.get('name', ''),
-                    'symbol': token.get('symbol', '').upper(),
-                    'coingecko_id': token.get('coingecko_id', ''),
-                    'avatar_image': token.get('avatar_image', ''),
-                    'website': token.get('website', ''),
-                    'created_at': token.get('created_at', ''),
-                    'created_by_admin': token.get('created_by_admin', '')
-                })
+                    results.append({
+                        'id': token.get('id'),
+                        'name': token.get('name', ''),
+                        'symbol': token.get('symbol', '').upper(),
+                        'coingecko_id': token.get('coingecko_id', ''),
+                        'avatar_image': token.get('avatar_image', ''),
+                        'website': token.get('website', ''),
+                        'created_at': token.get('created_at', ''),
+                        'created_by_admin': token.get('created_by_admin', '')
+                    })
             
-            if len(results) >= limit:
-                break
+                if len(results) >= limit:
+                    break
+            
+            return results
+        
+        results = await run_in_db_executor(collect)
         
         return {
             "table": "LiberandumAggregationToken",
@@ -128,38 +136,42 @@ async def search_token_stats(
 ):
     try:
         token_stats_repo = get_generic_repository("LiberandumAggregationTokenStats")
-        all_stats = token_stats_repo.list_all(limit=1000)
-        
         query_lower = q.lower().strip()
-        results = []
         
-        for stat in all_stats:
-            if stat.get('is_deleted', False):
-                continue
+        def collect() -> List[Dict[str, Any]]:
+            results = []
+            
+            for stat in token_stats_repo.iter_all(filter_expression=not_deleted()):
+                if stat.get('is_deleted', False):
+                    continue
                 
-            symbol = stat.get('symbol', '').lower()
-            coin_name = stat.get('coin_name', '').lower()
-            coingecko_id = stat.get('coingecko_id', '').lower()
+                symbol = stat.get('symbol', '').lower()
+                coin_name = stat.get('coin_name', '').lower()
+                coingecko_id = stat.get('coingecko_id', '').lower()
             
-            if (query_lower in symbol or 
-                query_lower in coin_name or 
-                query_lower in coingecko_id or
-                symbol == query_lower):
+                if (query_lower in symbol or 
+                    query_lower in coin_name or 
+                    query_lower in coingecko_id or
+                    symbol == query_lower):
                 
-                results.append({
-                    'id': stat.get('id'),
-                    'symbol': stat.get('symbol', '').upper(),
-                    'coin_name': stat.get('coin_name', ''),
-                    'coingecko_id': stat.get('coingecko_id', ''),
-                    'price': stat.get('price', 0),
-                    'market_cap': stat.get('market_cap', 0),
-                    'trading_volume_24h': stat.get('trading_volume_24h', 0),
-                    'created_at': stat.get('created_at', ''),
-                    'updated_at': stat.get('updated_at', '')
-                })
+                    results.append({
+                        'id': stat.get('id'),
+                        'symbol': stat.get('symbol', '').upper(),
+                        'coin_name': stat.get('coin_name', ''),
+                        'coingecko_id': stat.get('coingecko_id', ''),
+                        'price': stat.get('price', 0),
+                        'market_cap': stat.get('market_cap', 0),
+                        'trading_volume_24h': stat.get('trading_volume_24h', 0),
+                        'created_at': stat.get('created_at', ''),
+                        'updated_at': stat.get('updated_at', '')
+                    })
+            
+                if len(results) >= limit:
+                    break
             
-            if len(results) >= limit:
-                break
+            return results
+        
+        results = await run_in_db_executor(collect)
         
         return {
             "table": "LiberandumAggregationTokenStats",
@@ -183,34 +195,38 @@ async def search_exchanges(
 ):
     try:
         exchanges_repo = get_generic_repository("LiberandumAggregationExchanges")
-        all_exchanges = exchanges_repo.list_all(limit=1000)
-        
         query_lower = q.lower().strip()
-        results = []
         
-        for exchange in all_exchanges:
-            if exchange.get('is_deleted', False):
-                continue
+        def collect() -> List[Dict[str, Any]]:
+            results = []
+            
+            for exchange in exchanges_repo.iter_all(filter_expression=not_deleted()):
+                if exchange.get('is_deleted', False):
+                    continue
                 
-            name = exchange.get('name', '').lower()
-            coingecko_id = exchange.get('coingecko_id', '').lower()
+                name = exchange.get('name', '').lower()
+                coingecko_id = exchange.get('coingecko_id', '').lower()
             
-            if (query_lower in name or 
-                query_lower in coingecko_id):
+                if (query_lower in name or 
+                    query_lower in coingecko_id):
                 
-                results.append({
-                    'id': exchange.get('id'),
-                    'name': exchange.get('name', ''),
-                    'coingecko_id': exchange.get('coingecko_id', ''),
-                    'avatar_image': exchange.get('avatar_image', ''),
-                    'website': exchange.get('website', ''),
-                    'country': exchange.get('country', ''),
-                    'created_at': exchange.get('created_at', ''),
-                    'created_by_admin': exchange.get('created_by_admin', '')
-                })
+                    results.append({
+                        'id': exchange.get('id'),
+                        'name': exchange.get('name', ''),
+                        'coingecko_id': exchange.get('coingecko_id', ''),
+                        'avatar_image': exchange.get('avatar_image', ''),
+                        'website': exchange.get('website', ''),
+                        'country': exchange.get('country', ''),
+                        'created_at': exchange.get('created_at', ''),
+                        'created_by_admin': exchange.get('created_by_admin', '')
+                    })
             
-            if len(results) >= limit:
-                break
+                if len(results) >= limit:
+                    break
+            
+            return results
+        
+        results = await run_in_db_executor(collect)
         
         return {
             "table": "LiberandumAggregationExchanges",
@@ -234,33 +250,37 @@ async def search_exchange_stats(
 ):
     try:
         exchange_stats_repo = get_generic_repository("LiberandumAggregationExchangesStats")
-        all_stats = exchange_stats_repo.list_all(limit=1000)
-        
         query_lower = q.lower().strip()
-        results = []
         
-        for stat in all_stats:
-            if stat.get('is_deleted', False):
-                continue
+        def collect() -> List[Dict[str, Any]]:
+            results = []
+            
+            for stat in exchange_stats_repo.iter_all(filter_expression=not_deleted()):
+                if stat.get('is_deleted', False):
+                    continue
                 
-            name = stat.get('name', '').lower()
+                name = stat.get('name', '').lower()
+            
+                if query_lower in name:
+                    results.append({
+                        'id': stat.get('id'),
+                        'name': stat.get('name', ''),
+                        'exchange_id': stat.get('exchange_id', ''),
+                        'trading_volume_24h': stat.get('trading_volume_24h', 0),
+                        'trading_volume_1w': stat.get('trading_volume_1w', 0),
+                        'reserves': stat.get('reserves', 0),
+                        'visitors_30d': stat.get('visitors_30d', 0),
+                        'coins_count': stat.get('coins_count', 0),
+                        'created_at': stat.get('created_at', ''),
+                        'updated_at': stat.get('updated_at', '')
+                    })
             
-            if query_lower in name:
-                results.append({
-                    'id': stat.get('id'),
-                    'name': stat.get('name', ''),
-                    'exchange_id': stat.get('exchange_id', ''),
-                    'trading_volume_24h': stat.get('trading_volume_24h', 0),
-                    'trading_volume_1w': stat.get('trading_volume_1w', 0),
-                    'reserves': stat.get('reserves', 0),
-                    'visitors_30d': stat.get('visitors_30d', 0),
-                    'coins_count': stat.get('coins_count', 0),
-                    'created_at': stat.get('created_at', ''),
-                    'updated_at': stat.get('updated_at', '')
-                })
+                if len(results) >= limit:
+                    break
             
-            if len(results) >= limit:
-                break
+            return results
+        
+        results = await run_in_db_executor(collect)
         
         return {
             "table": "LiberandumAggregationExchangesStats",
@@ -284,42 +304,46 @@ async def search_users(
 ):
     try:
         users_repo = get_generic_repository("users")
-        all_users = users_repo.list_all(limit=1000)
-        
         query_lower = q.lower().strip()
-        results = []
         
-        for user in all_users:
-            if not user.get('is_active', True):
-                continue
+        def collect() -> List[Dict[str, Any]]:
+            results = []
+            
+            for user in users_repo.iter_all(filter_expression=Attr('is_active').not_exists() | Attr('is_active').ne(False)):
+                if not user.get('is_active', True):
+                    continue
                 
-            email = user.get('email', '').lower()
-            name = user.get('name', '').lower()
-            first_name = user.get('first_name', '').lower()
-            last_name = user.get('last_name', '').lower()
+                email = user.get('email', '').lower()
+                name = user.get('name', '').lower()
+                first_name = user.get('first_name', '').lower()
+                last_name = user.get('last_name', '').lower()
             
-            if (query_lower in email or 
-                query_lower in name or 
-                query_lower in first_name or 
-                query_lower in last_name):
+                if (query_lower in email or 
+                    query_lower in name or 
+                    query_lower in first_name or 
+                    query_lower in last_name):
                 
-                user_data = {
-                    'id': user.get('id'),
-                    'email': user.get('email', ''),
-                    'name': user.get('name', ''),
-                    'first_name': user.get('first_name', ''),
-                    'last_name': user.get('last_name', ''),
-                    'role': user.get('role', 'user'),
-                    'is_verified': user.get('is_verified', False),
-                    'is_active': user.get('is_active', True),
-                    'auth_provider': user.get('auth_provider', 'local'),
-                    'created_at': user.get('created_at', ''),
-                    'updated_at': user.get('updated_at', '')
-                }
-                results.append(user_data)
+                    user_data = {
+                        'id': user.get('id'),
+                        'email': user.get('email', ''),
+                        'name': user.get('name', ''),
+                        'first_name': user.get('first_name', ''),
+                        'last_name': user.get('last_name', ''),
+                        'role': user.get('role', 'user'),
+                        'is_verified': user.get('is_verified', False),
+                        'is_active': user.get('is_active', True),
+                        'auth_provider': user.get('auth_provider', 'local'),
+                        'created_at': user.get('created_at', ''),
+                        'updated_at': user.get('updated_at', '')
+                    }
+                    results.append(user_data)
             
-            if len(results) >= limit:
-                break
+                if len(results) >= limit:
+                    break
+            
+            return results
+        
+        results = await run_in_db_executor(collect)
         
         return {
             "table": "users",
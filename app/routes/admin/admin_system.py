@@ -0,0 +1,133 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.core.security.security import get_admin_user
+from app.core.database.query_planner import query_planner
+from app.services.market.token_snapshot import token_snapshot_service
+from app.services.admin.coingecko_catalog import coins_catalog, exchanges_catalog
+from app.services.market.coingecko_gateway import coingecko_gateway
+from app.services.market.chart_cache import chart_cache
+from app.services.market.coin_metadata import coin_metadata_resolver
+from app.services.market.websocket_manager import manager
+from app.services.market.price_history import price_history
+from app.services.market.global_data.market_global_cache import market_globals_cache
+from app.services.scheduler import scheduler
+from app.services.market.ingestion import token_stats_ingestion
+
+router = APIRouter()
+
+@router.get("/query-plans")
+async def get_query_plans(current_user = Depends(get_admin_user)):
+    return {
+        **query_planner.report(),
+        "admin": current_user['email']
+    }
+
+@router.get("/token-snapshot")
+async def get_token_snapshot_status(current_user = Depends(get_admin_user)):
+    return {
+        **token_snapshot_service.metrics(),
+        "admin": current_user['email']
+    }
+
+@router.post("/token-snapshot/refresh")
+async def refresh_token_snapshot(current_user = Depends(get_admin_user)):
+    await token_snapshot_service.refresh()
+    
+    return {
+        **token_snapshot_service.metrics(),
+        "admin": current_user['email']
+    }
+
+@router.get("/coingecko-catalog")
+async def get_coingecko_catalog_status(current_user = Depends(get_admin_user)):
+    return {
+        "catalogs": [coins_catalog.status(), exchanges_catalog.status()],
+        "admin": current_user['email']
+    }
+
+@router.post("/coingecko-catalog/refresh")
+async def refresh_coingecko_catalog(current_user = Depends(get_admin_user)):
+    await coins_catalog.ensure_ready()
+    await exchanges_catalog.ensure_ready()
+    await coins_catalog.sync(force=True)
+    await exchanges_catalog.sync(force=True)
+    
+    return {
+        "catalogs": [coins_catalog.status(), exchanges_catalog.status()],
+        "admin": current_user['email']
+    }
+
+@router.get("/coingecko-gateway")
+async def get_coingecko_gateway_metrics(current_user = Depends(get_admin_user)):
+    return {
+        **coingecko_gateway.metrics(),
+        "admin": current_user['email']
+    }
+
+@router.get("/chart-cache")
+async def get_chart_cache_stats(current_user = Depends(get_admin_user)):
+    return {
+        **chart_cache.stats(),
+        "admin": current_user['email']
+    }
+
+@router.delete("/chart-cache")
+async def clear_chart_cache(current_user = Depends(get_admin_user)):
+    chart_cache.clear()
+    
+    return {
+        **chart_cache.stats(),
+        "admin": current_user['email']
+    }
+
+@router.get("/coin-metadata")
+async def get_coin_metadata_stats(current_user = Depends(get_admin_user)):
+    return {
+        **coin_metadata_resolver.stats(),
+        "admin": current_user['email']
+    }
+
+@router.get("/price-poller")
+async def get_price_poller_metrics(current_user = Depends(get_admin_user)):
+    return {
+        **manager.poller.metrics(),
+        "websocket": manager.metrics(),
+        "broker": manager.broker.metrics(),
+        "history": price_history.stats(),
+        "admin": current_user['email']
+    }
+
+@router.get("/global-market-cache")
+async def get_global_market_cache_stats(current_user = Depends(get_admin_user)):
+    return {
+        **market_globals_cache.stats(),
+        "admin": current_user['email']
+    }
+
+@router.get("/scheduler")
+async def get_scheduler_metrics(current_user = Depends(get_admin_user)):
+    return {
+        **scheduler.metrics(),
+        "admin": current_user['email']
+    }
+
+@router.post("/scheduler/{job_name}/run")
+async def run_scheduler_job(job_name: str, current_user = Depends(get_admin_user)):
+    if job_name not in scheduler.jobs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Задание {job_name} не найдено"
+        )
+    
+    return {
+        "job": job_name,
+        "started": scheduler.trigger(job_name),
+        "admin": current_user['email']
+    }
+
+@router.get("/token-ingestion")
+async def get_token_ingestion_metrics(current_user = Depends(get_admin_user)):
+    return {
+        **token_stats_ingestion.metrics(),
+        "admin": current_user['email']
+    }
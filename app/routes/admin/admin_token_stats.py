@@ -2,10 +2,10 @@ from fastapi import APIRouter, Depends, Query
 from typing import Dict, Any, Optional
 
 from app.core.security.security import get_admin_user
-from app.routes.admin.admin_controller import BaseAdminController
+from app.routes.admin.admin_controller import TokenStatsAdminController
 
 router = APIRouter()
-controller = BaseAdminController("LiberandumAggregationTokenStats", "token-stats")
+controller = TokenStatsAdminController()
 
 @router.post("/")
 async def create_token_stats(stats_data: Dict[str, Any], current_user = Depends(get_admin_user)):
@@ -1,23 +1,14 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status, Body
 from typing import Dict, Any, Optional
-from decimal import Decimal
 
 from app.core.security.security import get_admin_user
-from app.routes.admin.admin_controller import BaseAdminController
+from app.routes.admin.admin_controller import BaseAdminController, TokenStatsAdminController
 from app.core.database.connector import get_generic_repository
+from app.services.market.utils import safe_decimal
 
 router = APIRouter()
 controller = BaseAdminController("LiberandumAggregationToken", "token")
 
-def safe_decimal(value, default=0):
-
-    try:
-        if value is None:
-            return Decimal(str(default))
-        return Decimal(str(value))
-    except (ValueError, TypeError):
-        return Decimal(str(default))
-
 @router.get("/")
 async def list_tokens(limit: Optional[int] = Query(default=500), current_user = Depends(get_admin_user)):
     return await controller.get_entities_list(limit, current_user)
@@ -38,6 +29,24 @@ async def update_token(token_id: str, updates: Dict[str, Any], current_user = De
 async def delete_token(token_id: str, current_user = Depends(get_admin_user)):
     return await controller.delete_entity(token_id, current_user)
 
+@router.post("/sync-from-coingecko")
+async def sync_tokens_from_coingecko(current_user = Depends(get_admin_user)):
+    from app.services.market.ingestion import token_stats_ingestion
+    
+    return {
+        **await token_stats_ingestion.run(),
+        "admin": current_user['email']
+    }
+
+@router.post("/compact-stats")
+async def compact_token_stats(current_user = Depends(get_admin_user)):
+    from app.services.market.ingestion import token_stats_ingestion
+    
+    return {
+        **await token_stats_ingestion.compact(),
+        "admin": current_user['email']
+    }
+
 @router.post("/create-from-coingecko")
 async def create_token_from_coingecko(
     coingecko_id: str = Body(..., embed=True),
@@ -48,7 +57,7 @@ async def create_token_from_coingecko(
         
         tokens_repo = get_generic_repository("LiberandumAggregationToken")
         
-        existing = tokens_repo.find_by_field("coingecko_id", coingecko_id)
+        existing = await tokens_repo.aio.find_by_field("coingecko_id", coingecko_id)
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -95,7 +104,7 @@ async def create_token_from_coingecko(
         }
         
         created_token = await controller.create_entity(token_data, current_user)
-        created_stats = await BaseAdminController("LiberandumAggregationTokenStats", "Статистика").create_entity(token_stats_data, current_user)
+        created_stats = await TokenStatsAdminController("Статистика").create_entity(token_stats_data, current_user)
         
         return {
             "message": "Токен создан",
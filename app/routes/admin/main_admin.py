@@ -9,6 +9,7 @@ from app.routes.admin.admin_roadmaps import router as roadmaps_router
 from app.routes.admin.admin_security_audits import router as security_audit_router
 from app.routes.admin.admin_people import router as people_router
 from app.routes.admin.admin_platform import router as platform_router
+from app.routes.admin.admin_system import router as system_router
 
 router = APIRouter()
 
@@ -20,4 +21,5 @@ router.include_router(search_router, prefix="/search", tags=["Admin Search"])
 router.include_router(roadmaps_router, prefix="/roadmaps", tags=["Admin Roadmaps"])
 router.include_router(security_audit_router, prefix="/security-audit", tags=["Admin Security Audit"])
 router.include_router(people_router, prefix="/people", tags=["Admin People"])
-router.include_router(platform_router, prefix="/platform", tags=["Admin Platform"])
\ No newline at end of file
+router.include_router(platform_router, prefix="/platform", tags=["Admin Platform"])
+router.include_router(system_router, prefix="/system", tags=["Admin System"])
\ No newline at end of file
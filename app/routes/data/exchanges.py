@@ -1,15 +1,16 @@
 from fastapi import APIRouter, HTTPException, status, Query
 
 from app.services.market.market_service import market_service
+from app.services.market.token_snapshot import token_snapshot_service
 from app.schemas.market import ExchangeDetailResponse, ExchangeListResponse, ExchangeDataConverter
-from app.core.database.connector import get_generic_repository
+from app.core.database.aio import run_in_db_executor
 
 router = APIRouter()
 
 @router.get("/", response_model=ExchangeListResponse)
 async def get_exchanges_list():
     try:
-        result = market_service.get_exchanges_list()
+        result = await run_in_db_executor(market_service.get_exchanges_list)
         return result
         
     except Exception as e:
@@ -25,48 +26,8 @@ async def search_exchanges(
     limit: int = Query(default=20, ge=1, le=100, description="Количество результатов")
 ):
     try:
-        exchanges_repo = get_generic_repository("LiberandumAggregationExchanges")
-        exchange_stats_repo = get_generic_repository("LiberandumAggregationExchangesStats")
-        
-        all_exchanges = exchanges_repo.list_all(limit=500)
-        all_exchange_stats = exchange_stats_repo.list_all(limit=500)
-        
-        stats_by_name = {}
-        for stat in all_exchange_stats:
-            if not stat.get('is_deleted', False):
-                name = stat.get('name', '')
-                if name:
-                    stats_by_name[name] = stat
-        
-        query_lower = q.lower().strip()
-        results = []
-        
-        for exchange in all_exchanges:
-            if exchange.get('is_deleted', False):
-                continue
-                
-            name = exchange.get('name', '').lower()
-            coingecko_id = exchange.get('coingecko_id', '').lower()
-            
-            if (query_lower in name or 
-                query_lower in coingecko_id or
-                name.startswith(query_lower)):
-                
-                exchange_name = exchange.get('name', '')
-                exchange_stats = stats_by_name.get(exchange_name)
-                
-                if exchange_stats:
-                    exchange_response = ExchangeDataConverter.from_db_to_api(
-                        exchange_stats, 
-                        exchange, 
-                        len(results) + 1
-                    )
-                    results.append(exchange_response)
-            
-            if len(results) >= limit:
-                break
-        
-        return ExchangeListResponse(data=results)
+        await token_snapshot_service.ensure()
+        return await run_in_db_executor(market_service.search_exchanges, q, limit)
         
     except Exception as e:
         print(f"[ERROR][Market] - Ошибка поиска бирж: {e}")
@@ -78,7 +39,7 @@ async def search_exchanges(
 @router.get("/{exchange_id}", response_model=ExchangeDetailResponse)
 async def get_exchange_detail(exchange_id: str):
     try:
-        result = market_service.get_exchange_detail(exchange_id)
+        result = await run_in_db_executor(market_service.get_exchange_detail, exchange_id)
         
         if not result:
             raise HTTPException(
@@ -2,9 +2,10 @@ from fastapi import APIRouter, HTTPException, status, Query
 from typing import Optional
 
 from app.services.market.market_service import market_service
+from app.services.market.token_snapshot import token_snapshot_service
 from app.schemas.market import TokenListResponse, TokenDetailResponse, TokenFullStatsResponse, TokenDataConverter
 from app.services.market.coingecko_service import coingecko_service
-from app.core.database.connector import get_generic_repository
+from app.core.database.aio import run_in_db_executor
 
 router = APIRouter()
 
@@ -43,7 +44,8 @@ async def get_tokens_list(
                 detail=f"Неверное поле сортировки. Доступные: {', '.join(valid_sorts)}"
             )
         
-        result = market_service.get_tokens_list(page=page, limit=limit, sort=sort)
+        await token_snapshot_service.ensure()
+        result = await run_in_db_executor(market_service.get_tokens_list, page=page, limit=limit, sort=sort)
         return result
         
     except Exception as e:
@@ -63,57 +65,8 @@ async def search_tokens(
     Поиск токенов по названию или символу с возможностью сортировки
     """
     try:
-        tokens_repo = get_generic_repository("LiberandumAggregationToken")
-        token_stats_repo = get_generic_repository("LiberandumAggregationTokenStats")
-        
-        all_tokens = tokens_repo.list_all(limit=500)
-        all_token_stats = token_stats_repo.list_all(limit=500)
-        
-        unique_stats = market_service._remove_duplicates_by_symbol(all_token_stats)
-        
-        stats_by_symbol = {}
-        for stat in unique_stats:
-            if not stat.get('is_deleted', False):
-                symbol = stat.get('symbol', '').upper()
-                if symbol:
-                    stats_by_symbol[symbol] = stat
-        
-        query_lower = q.lower().strip()
-        matching_stats = []
-        
-        for stat in unique_stats:
-            if stat.get('is_deleted', False):
-                continue
-                
-            name = stat.get('coin_name', '').lower()
-            symbol = stat.get('symbol', '').lower()
-            coingecko_id = stat.get('coingecko_id', '').lower()
-            
-            if (query_lower in name or 
-                query_lower in symbol or 
-                query_lower in coingecko_id or
-                symbol == query_lower or
-                name.startswith(query_lower)):
-                
-                matching_stats.append(stat)
-        
-        sorted_stats = market_service._apply_sorting(matching_stats, sort)
-        
-        limited_stats = sorted_stats[:limit]
-        
-        tokens_by_symbol = {}
-        for token in all_tokens:
-            if not token.get('is_deleted', False):
-                symbol = token.get('symbol', '').upper()
-                if symbol:
-                    tokens_by_symbol[symbol] = token
-        
-        results = []
-        for stat in limited_stats:
-            symbol = stat.get('symbol', '').upper()
-            token_data = tokens_by_symbol.get(symbol)
-            token_response = market_service._convert_token_stats_to_response(stat, token_data)
-            results.append(token_response)
+        await token_snapshot_service.ensure()
+        results = await run_in_db_executor(market_service.search_tokens, q, limit, sort)
         
         return TokenListResponse(
             data=results,
@@ -136,7 +89,7 @@ async def search_tokens(
 async def get_token_full_stats(token_id: str):
 
     try:
-        result = market_service.get_token_full_stats(token_id)
+        result = await run_in_db_executor(market_service.get_token_full_stats, token_id)
         
         if not result:
             raise HTTPException(
@@ -159,7 +112,7 @@ async def get_token_full_stats(token_id: str):
 async def get_token_detail(token_id: str):
 
     try:
-        result = market_service.get_token_detail(token_id)
+        result = await run_in_db_executor(market_service.get_token_detail, token_id)
         
         if not result:
             raise HTTPException(
@@ -193,7 +146,7 @@ async def get_token_chart(
                 detail=f"Invalid timeframe. Valid options: {valid_timeframes}"
             )
         
-        coingecko_id = _resolve_coingecko_id(token_id)
+        coingecko_id = await run_in_db_executor(_resolve_coingecko_id, token_id)
         
         chart_data = await coingecko_service.get_token_chart_data(
             token_id=coingecko_id,
@@ -280,26 +233,11 @@ async def get_token_chart(
 
 def _resolve_coingecko_id(token_id: str) -> str:
 
-    token_stats_repo = market_service._get_repository(market_service.token_stats_table)
-    
-    coingecko_id = token_id.lower()
     if token_id.upper() == "BTC":
-        coingecko_id = "bitcoin"
+        return "bitcoin"
     elif token_id.upper() == "ETH":
-        coingecko_id = "ethereum"
+        return "ethereum"
     elif token_id.lower() == "bitcoin":
-        coingecko_id = "bitcoin"
-    else:
-        token_stats_results = token_stats_repo.find_by_field('symbol', token_id.upper())
-        if token_stats_results:
-            unique_stats = market_service._remove_duplicates_by_symbol(token_stats_results)
-            if unique_stats:
-                coingecko_id = unique_stats[0].get('coingecko_id', token_id.lower())
-        else:
-            token_stats_results = token_stats_repo.find_by_field('coingecko_id', token_id.lower())
-            if token_stats_results:
-                unique_stats = market_service._remove_duplicates_by_symbol(token_stats_results)
-                if unique_stats:
-                    coingecko_id = unique_stats[0].get('coingecko_id', token_id.lower())
+        return "bitcoin"
     
-    return coingecko_id
\ No newline at end of file
+    return market_service.resolve_coingecko_id(token_id)
\ No newline at end of file
@@ -5,6 +5,49 @@ from app.services.market.websocket_manager import manager
 
 router = APIRouter()
 
+@router.websocket("/ws")
+async def multiplexed_websocket_endpoint(websocket: WebSocket):
+    await manager.connect_multiplexed(websocket)
+    try:
+        while True:
+            data = await websocket.receive_text()
+            try:
+                message = json.loads(data)
+            except ValueError:
+                await manager.send_personal_message(
+                    json.dumps({"type": "error", "detail": "Invalid JSON"}),
+                    websocket
+                )
+                continue
+            
+            message_type = message.get("type")
+            tokens = message.get("tokens") or []
+            if not isinstance(tokens, list):
+                tokens = [tokens]
+            
+            if message_type == "subscribe":
+                added = manager.subscribe(websocket, tokens)
+                await manager.send_personal_message(
+                    json.dumps({"type": "subscribed", "added": added, "tokens": manager.subscriptions(websocket)}),
+                    websocket
+                )
+            elif message_type == "unsubscribe":
+                removed = manager.unsubscribe(websocket, tokens)
+                await manager.send_personal_message(
+                    json.dumps({"type": "unsubscribed", "removed": removed, "tokens": manager.subscriptions(websocket)}),
+                    websocket
+                )
+            elif message_type == "ping":
+                await manager.send_personal_message(
+                    json.dumps({"type": "pong", "timestamp": message.get("timestamp")}), 
+                    websocket
+                )
+    except WebSocketDisconnect:
+        manager.disconnect(websocket)
+    except Exception as e:
+        print(f"[ERROR][WebSocket] - Connection error: {e}")
+        manager.disconnect(websocket)
+
 @router.websocket("/ws/{token_id}")
 async def websocket_endpoint(websocket: WebSocket, token_id: str):
     await manager.connect(websocket, token_id)
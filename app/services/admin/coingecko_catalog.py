@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Any, Optional, List, Tuple
+
+from app.core.security.config import settings
+from app.services.market.coingecko_gateway import coingecko_gateway, PRIORITY_BACKGROUND
+from app.services.market.search_index import SearchIndex
+
+class CoinGeckoCatalog:
+    """Локальная копия /coins/list или /exchanges/list: файл на диске, ETag/TTL и поисковый индекс."""
+
+    def __init__(self, kind: str, endpoint: str, fields: Tuple[str, ...]):
+        self.kind = kind
+        self.endpoint = endpoint
+        self.fields = fields
+        self.ttl = settings.COINGECKO_CATALOG_TTL_SECONDS
+        self.path = os.path.join(settings.COINGECKO_CATALOG_DIR, f"{kind}.json")
+
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.index = SearchIndex(f"coingecko_{kind}")
+        self.etag: Optional[str] = None
+        self.fetched_at = 0.0
+
+        self._loaded = False
+        self._sync_lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.upstream_requests = 0
+        self.not_modified = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        return time.time() - self.fetched_at if self.fetched_at else None
+
+    @property
+    def is_stale(self) -> bool:
+        return not self.fetched_at or time.time() - self.fetched_at > self.ttl
+
+    def _apply(self, rows: List[List[Any]]):
+        items = {}
+        for row in rows:
+            item = dict(zip(self.fields, row))
+            if item.get('id'):
+                items[item['id']] = item
+
+        self.items = items
+        self.index.sync({
+            item_id: (item.get('symbol'), [item.get(field) for field in self.fields], 0.0)
+            for item_id, item in items.items()
+        })
+
+    def _load_from_disk(self):
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            self.etag = payload.get('etag')
+            self.fetched_at = payload.get('fetched_at', 0.0)
+            self._apply(payload.get('rows', []))
+            print(f"[INFO][CoinGeckoCatalog] - {self.kind}: загружено с диска {len(self.items)} записей")
+        except Exception as e:
+            print(f"[ERROR][CoinGeckoCatalog] - Ошибка чтения {self.path}: {e}")
+
+    def _save_to_disk(self, rows: List[List[Any]]):
+        # Компактный формат: строки-массивы без повторения имен полей; запись атомарная через os.replace
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        payload = {
+            'etag': self.etag,
+            'fetched_at': self.fetched_at,
+            'fields': list(self.fields),
+            'rows': rows
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    async def _fetch(self) -> Tuple[Optional[int], Any, Optional[str]]:
+        headers = {}
+        if self.etag and self.items:
+            headers["If-None-Match"] = self.etag
+
+        self.upstream_requests += 1
+        response = await coingecko_gateway.request_response(self.endpoint, priority=PRIORITY_BACKGROUND, headers=headers)
+        if response is None:
+            return None, None, None
+
+        data = response.json() if response.status_code == 200 else None
+        return response.status_code, data, response.headers.get("ETag")
+
+    async def sync(self, force: bool = False) -> bool:
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+
+        async with self._sync_lock:
+            if not force and self.items and not self.is_stale:
+                return False
+
+            try:
+                status_code, data, etag = await self._fetch()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[ERROR][CoinGeckoCatalog] - {self.kind}: ошибка синхронизации: {e}")
+                return False
+
+            if status_code == 304:
+                self.not_modified += 1
+                self.fetched_at = time.time()
+                self.last_error = None
+                await asyncio.to_thread(self._save_to_disk, self._rows())
+                return False
+
+            if status_code != 200 or not isinstance(data, list):
+                self.last_error = f"HTTP {status_code}"
+                print(f"[ERROR][CoinGeckoCatalog] - {self.kind}: HTTP {status_code}")
+                return False
+
+            rows = [[entry.get(field) for field in self.fields] for entry in data if entry.get('id')]
+            self.etag = etag
+            self.fetched_at = time.time()
+            self.last_error = None
+
+            await asyncio.to_thread(self._apply, rows)
+            await asyncio.to_thread(self._save_to_disk, rows)
+            print(f"[INFO][CoinGeckoCatalog] - {self.kind}: синхронизировано {len(self.items)} записей")
+            return True
+
+    def _rows(self) -> List[List[Any]]:
+        return [[item.get(field) for field in self.fields] for item in self.items.values()]
+
+    async def ensure_ready(self):
+        if not self._loaded:
+            self._loaded = True
+            await asyncio.to_thread(self._load_from_disk)
+
+        if not self.items:
+            await self.sync(force=True)
+        elif self.is_stale and (self._refresh_task is None or self._refresh_task.done()):
+            # Устаревший каталог продолжает обслуживать поиск, обновление идет в фоне
+            self._refresh_task = asyncio.create_task(self.sync())
+
+    async def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        await self.ensure_ready()
+
+        ids = self.index.search(query, limit)
+        if len(ids) < limit:
+            seen = set(ids)
+            ids += [item_id for item_id in self.index.fuzzy(query, limit) if item_id not in seen][:limit - len(ids)]
+
+        return [self.items[item_id] for item_id in ids if item_id in self.items]
+
+    def status(self) -> Dict[str, Any]:
+        age = self.age_seconds
+        return {
+            "kind": self.kind,
+            "items": len(self.items),
+            "etag": self.etag,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "ttl_seconds": self.ttl,
+            "is_stale": self.is_stale,
+            "upstream_requests": self.upstream_requests,
+            "not_modified": self.not_modified,
+            "last_error": self.last_error,
+            "path": self.path
+        }
+
+coins_catalog = CoinGeckoCatalog("coins", "/coins/list", ("id", "symbol", "name"))
+exchanges_catalog = CoinGeckoCatalog("exchanges", "/exchanges/list", ("id", "name"))
@@ -1,50 +1,50 @@
-import httpx
 from typing import Dict, Any, Optional
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 
 from app.core.security.config import settings
+from app.services.http_client import get_http_client
 from app.core.database.crud.user import get_user_by_email, create_or_update_google_user, create_tokens_for_user
 
 class GoogleAuthService:
     @staticmethod
     async def get_google_token(code: str) -> Optional[Dict[str, Any]]:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            token_url = "https://oauth2.googleapis.com/token"
-            data = {
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": settings.GOOGLE_REDIRECT_URI
-            }
+        client = get_http_client("https://oauth2.googleapis.com")
+        token_url = "https://oauth2.googleapis.com/token"
+        data = {
+            "client_id": settings.GOOGLE_CLIENT_ID,
+            "client_secret": settings.GOOGLE_CLIENT_SECRET,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": settings.GOOGLE_REDIRECT_URI
+        }
             
-            try:
-                response = await client.post(token_url, data=data)
-                if response.status_code != 200:
-                    print(f"Ошибка Google OAuth: {response.text}")
-                    return None
-                return response.json()
-            except Exception as e:
-                print(f"Исключение при запросе токена: {e}")
+        try:
+            response = await client.post(token_url, data=data)
+            if response.status_code != 200:
+                print(f"Ошибка Google OAuth: {response.text}")
                 return None
+            return response.json()
+        except Exception as e:
+            print(f"Исключение при запросе токена: {e}")
+            return None
 
     @staticmethod
     async def get_google_user_info(token: str) -> Optional[Dict[str, Any]]:
         if not token:
             return None
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://www.googleapis.com/oauth2/v2/userinfo",
-                headers={"Authorization": f"Bearer {token}"}
-            )
+        client = get_http_client("https://www.googleapis.com")
+        response = await client.get(
+            "https://www.googleapis.com/oauth2/v2/userinfo",
+            headers={"Authorization": f"Bearer {token}"}
+        )
             
-            if response.status_code != 200:
-                print(f"Ошибка получения данных пользователя: {response.text}")
-                return None
+        if response.status_code != 200:
+            print(f"Ошибка получения данных пользователя: {response.text}")
+            return None
 
-            return response.json()
+        return response.json()
 
     @staticmethod
     async def create_jwt_for_user(user_info: Dict[str, Any]) -> Dict[str, Any]:
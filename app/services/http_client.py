@@ -0,0 +1,60 @@
+from typing import Dict, Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.security.config import settings
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def _http2_available() -> bool:
+    try:
+        import h2
+        return True
+    except ImportError:
+        return False
+
+def _client_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def _build_client(http2: bool) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(
+            settings.HTTP_CLIENT_READ_TIMEOUT,
+            connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY
+        )
+    )
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """Долгоживущий клиент на хост: соединения и TLS-сессии переиспользуются между запросами."""
+    key = _client_key(url)
+    client = _clients.get(key)
+
+    if client is None or client.is_closed:
+        http2 = settings.HTTP_CLIENT_HTTP2 and _http2_available()
+        client = _build_client(http2)
+        _clients[key] = client
+        print(f"[INFO][HTTP] - Клиент создан для {key}, http2: {http2}")
+
+    return client
+
+async def close_http_clients():
+    for key, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"[ERROR][HTTP] - Ошибка закрытия клиента {key}: {e}")
+    _clients.clear()
+
+def get_http_clients_info() -> Dict[str, Any]:
+    return {
+        "http2_available": _http2_available(),
+        "clients": sorted(key for key, client in _clients.items() if not client.is_closed)
+    }
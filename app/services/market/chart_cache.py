@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+
+from app.core.security.config import settings
+
+ChartKey = Tuple[str, str, str]
+
+# Свежесть по таймфрейму: короткие ряды двигаются каждые минуты, max/1y — раз в сутки
+TIMEFRAME_TTL_SECONDS: Dict[str, int] = {
+    "1h": 60,
+    "24h": 300,
+    "7d": 1800,
+    "30d": 3600,
+    "90d": 6 * 3600,
+    "1y": 24 * 3600,
+    "max": 24 * 3600
+}
+DEFAULT_TTL_SECONDS = 300
+
+class _Entry:
+    __slots__ = ('data', 'size', 'stored_at', 'expires_at')
+
+    def __init__(self, data: Dict[str, Any], size: int, stored_at: float, ttl: float):
+        self.data = data
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = stored_at + ttl
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+class ChartCache:
+    """Кэш графиков (coin, timeframe, currency): LRU в памяти по бюджету байт, файлы на диске, stale-while-revalidate."""
+
+    def __init__(self):
+        self.max_bytes = settings.CHART_CACHE_MAX_BYTES
+        self.max_stale = settings.CHART_CACHE_MAX_STALE_SECONDS
+        self.disk_dir = settings.CHART_CACHE_DIR
+
+        self._entries: "OrderedDict[ChartKey, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing: Dict[ChartKey, asyncio.Task] = {}
+
+        self.counters: Dict[str, int] = {
+            "hits": 0,
+            "stale_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "upstream_errors": 0,
+            "evictions": 0
+        }
+
+    @staticmethod
+    def ttl_for(timeframe: str) -> int:
+        return TIMEFRAME_TTL_SECONDS.get(timeframe, DEFAULT_TTL_SECONDS)
+
+    def _store(self, key: ChartKey, data: Dict[str, Any], size: int, stored_at: float):
+        current = self._entries.pop(key, None)
+        if current is not None:
+            self._bytes -= current.size
+
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = _Entry(data, size, stored_at, self.ttl_for(key[1]))
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.counters["evictions"] += 1
+
+    def _lookup(self, key: ChartKey) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _disk_path(self, key: ChartKey) -> str:
+        digest = hashlib.sha1("|".join(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.json")
+
+    def _read_disk(self, key: ChartKey) -> Optional[Tuple[Dict[str, Any], int, float]]:
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                raw = f.read()
+            payload = json.loads(raw)
+            return payload['data'], len(raw), payload['stored_at']
+        except Exception as e:
+            print(f"[ERROR][ChartCache] - Ошибка чтения {path}: {e}")
+            return None
+
+    def _write_disk(self, key: ChartKey, raw: str):
+        path = self._disk_path(key)
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(raw)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[ERROR][ChartCache] - Ошибка записи {path}: {e}")
+
+    async def _load(self, key: ChartKey, loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        try:
+            data = await loader()
+        except Exception as e:
+            print(f"[ERROR][ChartCache] - Ошибка загрузки {key}: {e}")
+            data = None
+
+        if not data:
+            self.counters["upstream_errors"] += 1
+            return None
+
+        stored_at = time.time()
+        raw = json.dumps({'stored_at': stored_at, 'data': data}, separators=(',', ':'))
+        self._store(key, data, len(raw), stored_at)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, raw)
+        return data
+
+    def _revalidate(self, key: ChartKey, loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]):
+        task = self._refreshing.get(key)
+        if task is not None and not task.done():
+            return
+
+        self.counters["refreshes"] += 1
+        task = asyncio.create_task(self._load(key, loader))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def get(self, token_id: str, timeframe: str, currency: str,
+                  loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        key = (token_id.lower(), timeframe, currency.lower())
+        now = time.time()
+
+        entry = self._lookup(key)
+        if entry is None and self.disk_dir:
+            cached = await asyncio.to_thread(self._read_disk, key)
+            if cached is not None:
+                data, size, stored_at = cached
+                self._store(key, data, size, stored_at)
+                entry = self._lookup(key)
+                if entry is not None:
+                    self.counters["disk_hits"] += 1
+
+        if entry is not None:
+            if entry.is_fresh(now):
+                self.counters["hits"] += 1
+                return entry.data
+
+            if now - entry.expires_at < self.max_stale:
+                # Отдаем устаревший ряд сразу, обновление идет в фоне
+                self.counters["stale_hits"] += 1
+                self._revalidate(key, loader)
+                return entry.data
+
+        self.counters["misses"] += 1
+        data = await self._load(key, loader)
+        if data is None and entry is not None:
+            # Upstream недоступен или режет по лимиту: старый ряд лучше фолбэка
+            return entry.data
+        return data
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_ratio": round((self.counters["hits"] + self.counters["stale_hits"]) / lookups, 3) if lookups else None,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "max_stale_seconds": self.max_stale,
+            "disk_dir": self.disk_dir or None
+        }
+
+chart_cache = ChartCache()
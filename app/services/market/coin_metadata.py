@@ -0,0 +1,147 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from app.core.security.config import settings
+from app.core.database.aio import run_in_db_executor
+from app.core.database.connector import get_generic_repository
+from app.services.market.token_snapshot import token_snapshot_service
+from app.services.market.coingecko_gateway import coingecko_gateway, PRIORITY_USER
+
+# /coins/{id} без рынков, тикеров и соцданных: ответ в десятки раз меньше полного документа
+LIGHTWEIGHT_COIN_PARAMS = {
+    "localization": "false",
+    "tickers": "false",
+    "market_data": "false",
+    "community_data": "false",
+    "developer_data": "false",
+    "sparkline": "false"
+}
+
+class CoinMetadataResolver:
+    """symbol/name по coingecko_id: снапшот, таблица токенов, каталог монет и только потом upstream."""
+
+    def __init__(self):
+        self.tokens_table = "LiberandumAggregationToken"
+        self.ttl = settings.COIN_METADATA_TTL_SECONDS
+        self.negative_ttl = settings.COIN_METADATA_NEGATIVE_TTL_SECONDS
+        self.max_entries = settings.COIN_METADATA_MAX_ENTRIES
+        # LRU: id монет приходят от клиентов, без предела кэш промахов растет бесконечно
+        self._cache: "OrderedDict[str, Tuple[Optional[Dict[str, str]], float]]" = OrderedDict()
+        self._next_purge = 0.0
+
+        self.counters: Dict[str, int] = {
+            "cache_hits": 0,
+            "local_hits": 0,
+            "upstream_requests": 0,
+            "not_found": 0,
+            "evicted": 0,
+            "expired": 0
+        }
+
+    @staticmethod
+    def _metadata(symbol: Any, name: Any) -> Optional[Dict[str, str]]:
+        if not symbol:
+            return None
+        return {"symbol": str(symbol).upper(), "name": str(name or '')}
+
+    def _from_snapshot(self, coingecko_id: str) -> Optional[Dict[str, str]]:
+        snapshot = token_snapshot_service.get()
+        if not snapshot:
+            return None
+
+        stats = snapshot.get_by_coingecko_id(coingecko_id)
+        if not stats:
+            return None
+        return self._metadata(stats.get('symbol'), stats.get('coin_name'))
+
+    def _from_tokens_table(self, coingecko_id: str) -> Optional[Dict[str, str]]:
+        repo = get_generic_repository(self.tokens_table)
+        if not repo:
+            return None
+
+        for token in repo.find_by_field('coingecko_id', coingecko_id):
+            if not token.get('is_deleted', False):
+                return self._metadata(token.get('symbol'), token.get('name'))
+        return None
+
+    def _from_catalog(self, coingecko_id: str) -> Optional[Dict[str, str]]:
+        # Каталог /coins/list уже лежит локально для админского поиска; здесь он только читается
+        from app.services.admin.coingecko_catalog import coins_catalog
+
+        item = coins_catalog.items.get(coingecko_id)
+        if not item:
+            return None
+        return self._metadata(item.get('symbol'), item.get('name'))
+
+    async def _from_upstream(self, coingecko_id: str) -> Optional[Dict[str, str]]:
+        self.counters["upstream_requests"] += 1
+        coin = await coingecko_gateway.request(f"/coins/{coingecko_id}", LIGHTWEIGHT_COIN_PARAMS, PRIORITY_USER)
+        if not coin:
+            return None
+        return self._metadata(coin.get('symbol'), coin.get('name'))
+
+    async def _lookup(self, coingecko_id: str) -> Optional[Dict[str, str]]:
+        metadata = self._from_snapshot(coingecko_id)
+        if metadata is None:
+            try:
+                metadata = await run_in_db_executor(self._from_tokens_table, coingecko_id)
+            except Exception as e:
+                print(f"[ERROR][CoinMetadata] - Ошибка поиска {coingecko_id} в {self.tokens_table}: {e}")
+        if metadata is None:
+            metadata = self._from_catalog(coingecko_id)
+
+        if metadata is not None:
+            self.counters["local_hits"] += 1
+            return metadata
+
+        return await self._from_upstream(coingecko_id)
+
+    async def resolve(self, coingecko_id: str) -> Optional[Dict[str, str]]:
+        coingecko_id = coingecko_id.lower()
+        now = time.monotonic()
+
+        cached = self._cache.get(coingecko_id)
+        if cached is not None:
+            if cached[1] > now:
+                self._cache.move_to_end(coingecko_id)
+                self.counters["cache_hits"] += 1
+                return cached[0]
+            del self._cache[coingecko_id]
+            self.counters["expired"] += 1
+
+        metadata = await self._lookup(coingecko_id)
+        if metadata is None:
+            self.counters["not_found"] += 1
+
+        # Промах кэшируется коротко, чтобы несуществующий id не бил в upstream на каждом тике
+        ttl = self.ttl if metadata is not None else self.negative_ttl
+        self._store(coingecko_id, (metadata, now + ttl), now)
+        return metadata
+
+    def _store(self, coingecko_id: str, entry: Tuple[Optional[Dict[str, str]], float], now: float):
+        self._cache[coingecko_id] = entry
+        self._cache.move_to_end(coingecko_id)
+
+        # Порядок LRU не совпадает с порядком истечения: протухшие записи вычищаются редким полным проходом
+        if now >= self._next_purge:
+            self._next_purge = now + self.negative_ttl
+            expired = [key for key, (_, expires_at) in self._cache.items() if expires_at <= now]
+            for key in expired:
+                del self._cache[key]
+            self.counters["expired"] += len(expired)
+
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+            self.counters["evicted"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "entries": len(self._cache),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl
+        }
+
+coin_metadata_resolver = CoinMetadataResolver()
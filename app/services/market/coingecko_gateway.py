@@ -0,0 +1,349 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import Dict, Any, Optional, List, Tuple
+
+import httpx
+
+from app.core.security.config import settings
+from app.services.http_client import get_http_client
+
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 10
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: int):
+        self.resize(rate_per_minute)
+
+    def resize(self, rate_per_minute: int):
+        self.rate = rate_per_minute / 60.0
+        # Небольшой запас на всплеск, но не больше минутной квоты
+        self.capacity = max(1.0, min(float(rate_per_minute), self.rate * 10))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def pause(self, seconds: float):
+        # После 429 upstream сам сказал, сколько ждать: бакет пустеет на это время
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def wait_time(self) -> float:
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state != "half_open":
+            return state == "closed"
+
+        # Полуоткрытый breaker пропускает один пробный запрос; зависшая проба истекает через reset_timeout
+        now = time.monotonic()
+        if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+            return False
+        self.probe_started_at = now
+        return True
+
+    def end_probe(self, started_at: float):
+        # Проба без вердикта (429, отмена, смена ключа) освобождает место для следующей
+        if self.probe_started_at == started_at:
+            self.probe_started_at = None
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        state = self.state
+        self.probe_started_at = None
+        if state == "half_open" or (state == "closed" and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self.trips += 1
+            print(f"[WARNING][CoinGeckoGateway] - Circuit breaker открыт на {self.reset_timeout}s")
+
+class CoinGeckoGateway:
+    """Единая точка выхода в CoinGecko: token bucket, приоритетная очередь, ретраи с джиттером и circuit breaker."""
+
+    def __init__(self):
+        self.base_url = "https://api.coingecko.com/api/v3"
+        self.pro_base_url = "https://pro-api.coingecko.com/api/v3"
+        self.timeout = 30.0
+
+        self.api_key = settings.COINGECKO_API_KEY
+        self.use_pro = bool(self.api_key and self.api_key.strip())
+
+        self.max_retries = settings.COINGECKO_MAX_RETRIES
+        self.max_pending = settings.COINGECKO_MAX_PENDING
+        self.queue_timeout = settings.COINGECKO_QUEUE_TIMEOUT
+        self.bucket = TokenBucket(self._rate_per_minute())
+        self.breaker = CircuitBreaker(
+            settings.COINGECKO_BREAKER_THRESHOLD,
+            settings.COINGECKO_BREAKER_RESET_SECONDS
+        )
+
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._inflight: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], asyncio.Task] = {}
+
+        self.metrics_counters: Dict[str, int] = {
+            "requests": 0,
+            "success": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failures": 0,
+            "rejected_queue_full": 0,
+            "rejected_queue_timeout": 0,
+            "rejected_breaker_open": 0,
+            "coalesced": 0
+        }
+
+        if self.use_pro:
+            print(f"[INFO][CoinGecko] - Using Pro API")
+        else:
+            print(f"[INFO][CoinGecko] - Using free API (rate limited)")
+
+    def _rate_per_minute(self) -> int:
+        if self.use_pro:
+            return settings.COINGECKO_PRO_REQUESTS_PER_MINUTE
+        return settings.COINGECKO_FREE_REQUESTS_PER_MINUTE
+
+    def _get_headers(self) -> Dict[str, str]:
+        headers = {
+            "Accept": "application/json",
+            "User-Agent": "Liberandum-API/1.0"
+        }
+
+        if self.use_pro and self.api_key:
+            headers["x-cg-pro-api-key"] = self.api_key
+
+        return headers
+
+    def _get_base_url(self) -> str:
+        return self.pro_base_url if self.use_pro else self.base_url
+
+    def _switch_to_free(self):
+        self.use_pro = False
+        self.bucket.resize(self._rate_per_minute())
+        print(f"[ERROR][CoinGecko] - API key rejected, switching to free API")
+
+    async def _dispatch(self):
+        # Один диспетчер выдает токены ожидающим по приоритету, остальные корутины спят на future
+        while self._waiters:
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+
+            self.bucket.take()
+            future.set_result(True)
+
+    async def _acquire(self, priority: int) -> bool:
+        if len(self._waiters) >= self.max_pending:
+            self.metrics_counters["rejected_queue_full"] += 1
+            return False
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._wakeup.set()
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.metrics_counters["rejected_queue_timeout"] += 1
+            return False
+
+    def _backoff(self, attempt: int) -> float:
+        base = min(settings.COINGECKO_MAX_BACKOFF_SECONDS, 2 ** attempt)
+        # Джиттер разводит повторы, чтобы они не ударили в upstream одной пачкой
+        return random.uniform(base / 2, base)
+
+    async def request_response(self, endpoint: str, params: Dict[str, Any] = None, priority: int = PRIORITY_USER,
+                               headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+        for attempt in range(self.max_retries + 1):
+            # Breaker проверяется перед каждой попыткой: ретраи не должны стучаться в открытый upstream
+            if not self.breaker.allow():
+                self.metrics_counters["rejected_breaker_open"] += 1
+                return None
+            probe = self.breaker.probe_started_at
+
+            try:
+                if attempt:
+                    self.metrics_counters["retries"] += 1
+
+                if not await self._acquire(priority):
+                    return None
+
+                base_url = self._get_base_url()
+                request_headers = self._get_headers()
+                if headers:
+                    request_headers.update(headers)
+
+                self.metrics_counters["requests"] += 1
+                try:
+                    response = await get_http_client(base_url).get(
+                        f"{base_url}{endpoint}",
+                        params=params,
+                        headers=request_headers,
+                        timeout=self.timeout
+                    )
+                except httpx.TimeoutException:
+                    print(f"[ERROR][CoinGecko] - Request timeout for {endpoint}")
+                    self.breaker.record_failure()
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                except httpx.HTTPError as e:
+                    print(f"[ERROR][CoinGecko] - Request failed: {e}")
+                    self.breaker.record_failure()
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+
+                if response.status_code in (200, 304):
+                    self.metrics_counters["success"] += 1
+                    self.breaker.record_success()
+                    return response
+                elif response.status_code == 429:
+                    self.metrics_counters["rate_limited"] += 1
+                    try:
+                        retry_after = float(response.headers.get("Retry-After", 60))
+                    except ValueError:
+                        retry_after = 60.0
+                    print(f"[WARNING][CoinGecko] - Rate limited, retry after {retry_after}s")
+                    # Ожидание Retry-After держит бакет, а не каждую корутину отдельно
+                    self.bucket.pause(min(retry_after, settings.COINGECKO_MAX_BACKOFF_SECONDS))
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                elif response.status_code in (401, 403) and self.use_pro:
+                    self._switch_to_free()
+                    continue
+                elif response.status_code == 404:
+                    print(f"[WARNING][CoinGecko] - Not found: {endpoint}")
+                    self.breaker.record_success()
+                    return None
+                elif response.status_code >= 500:
+                    print(f"[ERROR][CoinGecko] - HTTP {response.status_code} for {endpoint}")
+                    self.breaker.record_failure()
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                else:
+                    print(f"[ERROR][CoinGecko] - HTTP {response.status_code}: {response.text[:200]}")
+                    return None
+            finally:
+                if probe is not None:
+                    self.breaker.end_probe(probe)
+
+        self.metrics_counters["failures"] += 1
+        return None
+
+    @staticmethod
+    def _flight_key(endpoint: str, params: Optional[Dict[str, Any]]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        return endpoint, tuple(sorted((str(key), str(value)) for key, value in (params or {}).items()))
+
+    async def request(self, endpoint: str, params: Dict[str, Any] = None,
+                      priority: int = PRIORITY_USER) -> Optional[Any]:
+        """Single-flight: одинаковые параллельные запросы (endpoint + params) ждут один общий вызов upstream."""
+        key = self._flight_key(endpoint, params)
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.create_task(self._request_json(endpoint, params, priority))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget_flight(key, done))
+        else:
+            self.metrics_counters["coalesced"] += 1
+
+        # shield: отмена одного клиента не обрывает запрос, который ждут остальные
+        return await asyncio.shield(task)
+
+    def _forget_flight(self, key: Tuple[str, Tuple[Tuple[str, str], ...]], task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _request_json(self, endpoint: str, params: Optional[Dict[str, Any]], priority: int) -> Optional[Any]:
+        response = await self.request_response(endpoint, params, priority)
+        if response is None or response.status_code != 200:
+            return None
+
+        try:
+            return response.json()
+        except ValueError:
+            print(f"[ERROR][CoinGecko] - Invalid JSON for {endpoint}")
+            return None
+
+    @property
+    def rate_per_minute(self) -> int:
+        return self._rate_per_minute()
+
+    def headroom(self) -> float:
+        """Доля свободной квоты 0..1: пауза после 429 или открытый breaker дают 0."""
+        if self.bucket.paused_until > time.monotonic() or self.breaker.state == "open":
+            return 0.0
+
+        self.bucket._refill()
+        return max(0.0, min(1.0, (self.bucket.tokens - len(self._waiters)) / self.bucket.capacity))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics_counters,
+            "tier": "pro" if self.use_pro else "free",
+            "rate_per_minute": self._rate_per_minute(),
+            "pending": len(self._waiters),
+            "inflight": len(self._inflight),
+            "tokens": round(self.bucket.tokens, 2),
+            "breaker_state": self.breaker.state,
+            "breaker_trips": self.breaker.trips
+        }
+
+coingecko_gateway = CoinGeckoGateway()
@@ -1,82 +1,25 @@
-import httpx
-import asyncio
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import time
 from app.core.security.config import settings
+from app.services.market.coingecko_gateway import coingecko_gateway, PRIORITY_USER
+from app.services.market.chart_cache import chart_cache
+from app.services.market.coin_metadata import coin_metadata_resolver
+from app.services.market.price_history import price_history, PRICE, MARKET_CAP, VOLUME
+
+HISTORY_TIMEFRAME_SECONDS = {
+    "1h": 3600,
+    "24h": 86400
+}
 
 class CoinGeckoService:
-    def __init__(self):
-        self.base_url = "https://api.coingecko.com/api/v3"
-        self.pro_base_url = "https://pro-api.coingecko.com/api/v3"
-        self.timeout = 30.0
-        
-        self.api_key = getattr(settings, 'COINGECKO_API_KEY', None)
-        self.use_pro = bool(self.api_key and self.api_key.strip())
-        
-        if self.use_pro:
-            print(f"[INFO][CoinGecko] - Using Pro API")
-        else:
-            print(f"[INFO][CoinGecko] - Using free API (rate limited)")
-    
-    def _get_headers(self) -> Dict[str, str]:
-        headers = {
-            "Accept": "application/json",
-            "User-Agent": "Liberandum-API/1.0"
-        }
+    @property
+    def use_pro(self) -> bool:
+        return coingecko_gateway.use_pro
         
-        if self.use_pro and self.api_key:
-            headers["x-cg-pro-api-key"] = self.api_key
-            
-        return headers
-    
-    def _get_base_url(self) -> str:
-        return self.pro_base_url if self.use_pro else self.base_url
-        
-    async def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
-        try:
-            base_url = self._get_base_url()
-            headers = self._get_headers()
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{base_url}{endpoint}", 
-                    params=params, 
-                    headers=headers
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", 60))
-                    print(f"[WARNING][CoinGecko] - Rate limited, waiting {retry_after}s")
-                    await asyncio.sleep(retry_after)
-                    return await self._make_request(endpoint, params)
-                elif response.status_code == 401:
-                    print(f"[ERROR][CoinGecko] - Unauthorized. API key issue, switching to free API")
-                    if self.use_pro:
-                        self.use_pro = False
-                        return await self._make_request(endpoint, params)
-                    return None
-                elif response.status_code == 403:
-                    print(f"[ERROR][CoinGecko] - Forbidden. API key invalid, switching to free API")
-                    if self.use_pro:
-                        self.use_pro = False
-                        return await self._make_request(endpoint, params)
-                    return None
-                elif response.status_code == 404:
-                    print(f"[WARNING][CoinGecko] - Token not found: {endpoint}")
-                    return None
-                else:
-                    print(f"[ERROR][CoinGecko] - HTTP {response.status_code}: {response.text}")
-                    return None
-                    
-        except httpx.TimeoutException:
-            print(f"[ERROR][CoinGecko] - Request timeout for {endpoint}")
-            return None
-        except Exception as e:
-            print(f"[ERROR][CoinGecko] - Request failed: {e}")
-            return None
+    async def _make_request(self, endpoint: str, params: Dict[str, Any] = None,
+                            priority: int = PRIORITY_USER) -> Optional[Dict[str, Any]]:
+        return await coingecko_gateway.request(endpoint, params, priority)
     
     def _get_days_from_timeframe(self, timeframe: str) -> str:
         timeframe_mapping = {
@@ -158,7 +101,67 @@ class CoinGeckoService:
             "api_source": "fallback"
         }
     
+    async def _get_history_chart_data(self, token_id: str, timeframe: str, currency: str) -> Optional[Dict[str, Any]]:
+        seconds = HISTORY_TIMEFRAME_SECONDS.get(timeframe)
+        if seconds is None or currency != "usd":
+            return None
+        
+        # Поллер при ошибках и лимитах растягивает интервал до максимума: допуск считаем от него, иначе
+        # в период backoff каждый график уходил бы в upstream
+        window = price_history.window(token_id, seconds, tolerance=2 * settings.PRICE_POLLER_MAX_INTERVAL_SECONDS + 30)
+        if window is None or len(window[0]) < 2:
+            return None
+        
+        timestamps, values = window
+        timestamps = timestamps.tolist()
+        price_values = values[:, PRICE]
+        volume_values = values[:, VOLUME]
+        
+        first_price = float(price_values[0])
+        last_price = float(price_values[-1])
+        price_change_percentage = ((last_price - first_price) / first_price * 100) if first_price > 0 else 0
+        
+        coin_info = await coin_metadata_resolver.resolve(token_id)
+        
+        return {
+            "token_id": token_id,
+            "symbol": coin_info["symbol"] if coin_info else token_id.upper()[:3],
+            "name": coin_info["name"] if coin_info else token_id.title(),
+            "timeframe": timeframe,
+            "currency": currency,
+            "data": {
+                "prices": [list(point) for point in zip(timestamps, price_values.tolist())],
+                "market_caps": [list(point) for point in zip(timestamps, values[:, MARKET_CAP].tolist())],
+                "total_volumes": [list(point) for point in zip(timestamps, volume_values.tolist())]
+            },
+            "statistics": {
+                "price_change_percentage": round(price_change_percentage, 2),
+                "highest_price": float(price_values.max()),
+                "lowest_price": float(price_values.min()),
+                "average_volume": float(volume_values.mean())
+            },
+            "updated_at": timestamps[-1],
+            "api_source": "history"
+        }
+    
     async def get_token_chart_data(self, token_id: str, timeframe: str, currency: str = "usd") -> Optional[Dict[str, Any]]:
+        # Короткие таймфреймы для токенов, которые сейчас опрашивает поллер, собираются из локальной истории тиков
+        history_chart = await self._get_history_chart_data(token_id, timeframe, currency)
+        if history_chart:
+            return history_chart
+        
+        chart = await chart_cache.get(
+            token_id, timeframe, currency,
+            lambda: self._fetch_token_chart_data(token_id, timeframe, currency)
+        )
+        
+        if not chart:
+            print(f"[WARNING][CoinGecko] - No chart data from API, using fallback for {token_id}")
+            return self._generate_fallback_chart_data(token_id, timeframe, currency)
+        
+        return chart
+    
+    async def _fetch_token_chart_data(self, token_id: str, timeframe: str, currency: str) -> Optional[Dict[str, Any]]:
         days = self._get_days_from_timeframe(timeframe)
         interval = self._get_interval_from_timeframe(timeframe)
         
@@ -175,18 +178,17 @@ class CoinGeckoService:
         chart_data = await self._make_request(f"/coins/{token_id}/market_chart", params)
         
         if not chart_data:
-            print(f"[WARNING][CoinGecko] - No chart data from API, using fallback for {token_id}")
-            return self._generate_fallback_chart_data(token_id, timeframe, currency)
+            return None
         
-        coin_info = await self._make_request(f"/coins/{token_id}")
+        coin_info = await coin_metadata_resolver.resolve(token_id)
         
         prices = chart_data.get("prices", [])
         market_caps = chart_data.get("market_caps", [])
         volumes = chart_data.get("total_volumes", [])
         
         if not prices:
-            print(f"[WARNING][CoinGecko] - Empty price data, using fallback for {token_id}")
-            return self._generate_fallback_chart_data(token_id, timeframe, currency)
+            print(f"[WARNING][CoinGecko] - Empty price data for {token_id}")
+            return None
         
         price_values = [price[1] for price in prices]
         volume_values = [vol[1] for vol in volumes]
@@ -204,8 +206,8 @@ class CoinGeckoService:
         
         return {
             "token_id": token_id,
-            "symbol": coin_info.get("symbol", "").upper() if coin_info else token_id.upper()[:3],
-            "name": coin_info.get("name", "") if coin_info else token_id.title(),
+            "symbol": coin_info["symbol"] if coin_info else token_id.upper()[:3],
+            "name": coin_info["name"] if coin_info else token_id.title(),
             "timeframe": timeframe,
             "currency": currency,
             "data": {
@@ -219,8 +221,16 @@ class CoinGeckoService:
         }
     
     async def get_token_current_price(self, token_id: str, currency: str = "usd") -> Optional[Dict[str, Any]]:
+        prices = await self.get_token_prices([token_id], currency)
+        return prices.get(token_id)
+    
+    async def get_token_prices(self, token_ids: List[str], currency: str = "usd",
+                               priority: int = PRIORITY_USER) -> Dict[str, Dict[str, Any]]:
+        if not token_ids:
+            return {}
+        
         params = {
-            "ids": token_id,
+            "ids": ",".join(token_ids),
             "vs_currencies": currency,
             "include_24hr_change": "true",
             "include_24hr_vol": "true",
@@ -233,25 +243,32 @@ class CoinGeckoService:
                 "precision": "full"
             })
         
-        data = await self._make_request("/simple/price", params)
-        if not data or token_id not in data:
-            return None
-        
-        token_data = data[token_id]
+        data = await self._make_request("/simple/price", params, priority)
+        if not data:
+            return {}
         
-        coin_info = await self._make_request(f"/coins/{token_id}")
-        symbol = coin_info.get("symbol", "").upper() if coin_info else token_id.upper()
+        timestamp = int(time.time() * 1000)
+        prices = {}
+        for token_id in token_ids:
+            token_data = data.get(token_id)
+            if not token_data:
+                continue
+            
+            coin_info = await coin_metadata_resolver.resolve(token_id)
+            symbol = coin_info["symbol"] if coin_info else token_id.upper()
+            
+            prices[token_id] = {
+                "token_id": token_id,
+                "symbol": symbol,
+                "price": token_data.get(currency, 0),
+                "price_change_24h": token_data.get(f"{currency}_24h_change", 0),
+                "volume_24h": token_data.get(f"{currency}_24h_vol", 0),
+                "market_cap": token_data.get(f"{currency}_market_cap", 0),
+                "timestamp": timestamp,
+                "last_updated": token_data.get("last_updated_at") if self.use_pro else None,
+                "api_source": "pro" if self.use_pro else "free"
+            }
         
-        return {
-            "token_id": token_id,
-            "symbol": symbol,
-            "price": token_data.get(currency, 0),
-            "price_change_24h": token_data.get(f"{currency}_24h_change", 0),
-            "volume_24h": token_data.get(f"{currency}_24h_vol", 0),
-            "market_cap": token_data.get(f"{currency}_market_cap", 0),
-            "timestamp": int(time.time() * 1000),
-            "last_updated": token_data.get("last_updated_at") if self.use_pro else None,
-            "api_source": "pro" if self.use_pro else "free"
-        }
+        return prices
 
 coingecko_service = CoinGeckoService()
\ No newline at end of file
@@ -1,6 +1,8 @@
+import asyncio
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from app.core.security.config import settings
 from app.services.market.global_data.market_global_service import market_globals_service
 from app.services.market.global_data.market_global_cache import market_globals_cache
 from app.schemas.market_global import GlobalMarketResponse, MarketCapData, FearGreedIndex, AltSeasonData
@@ -8,51 +10,65 @@ from app.schemas.market_global import GlobalMarketResponse, MarketCapData, FearG
 class GlobalMarketDataService:
     
     async def get_global_market_data(self) -> Optional[GlobalMarketResponse]:
-        cached_data = await market_globals_cache.get_cached_data()
+        # После прогрева отдаем L1 сразу, обновление upstream идет в фоне
+        data = await market_globals_cache.get_data(self._fetch_fresh_data)
         
-        if cached_data:
-            return self._parse_cached_response(cached_data)
-        
-        fresh_data = await self._fetch_fresh_data()
-        
-        if fresh_data:
-            await market_globals_cache.set_cache_data(fresh_data)
-            return self._parse_response(fresh_data)
+        if data:
+            return self._parse_response(data)
         
         return None
     
+    async def refresh_if_due(self):
+        await market_globals_cache.refresh_if_due(self._fetch_fresh_data)
+    
+    async def _fetch_source(self, name: str, coro, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(coro, timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"[WARNING][GlobalMarket] - {name}: нет ответа за {timeout}s, используем запасной вариант")
+        except Exception as e:
+            print(f"[ERROR][GlobalMarket] - {name}: {e}")
+        return None
+    
     async def _fetch_fresh_data(self) -> Optional[Dict[str, Any]]:
         try:
-            global_data = await market_globals_service.get_global_data()
-            fear_greed = await market_globals_service.get_fear_greed_index()
+            # Источники независимы: ждем их параллельно, каждый со своим таймаутом
+            global_data, fear_greed, alt_season = await asyncio.gather(
+                self._fetch_source("global", market_globals_service.get_global_data(), settings.GLOBAL_MARKET_FETCH_TIMEOUT_SECONDS),
+                self._fetch_source("fear_greed", market_globals_service.get_fear_greed_index(), settings.GLOBAL_MARKET_FETCH_TIMEOUT_SECONDS),
+                self._fetch_source("alt_season", market_globals_service.get_alt_season_index(), settings.GLOBAL_MARKET_ALT_SEASON_TIMEOUT_SECONDS)
+            )
             
             if not global_data:
                 return None
             
-            # Сначала пытаемся получить Alt Season через CoinGecko API
-            alt_season = await market_globals_service.get_alt_season_index()
+            degraded_sources = []
+            if not fear_greed:
+                degraded_sources.append("fear_greed")
             
-            # Если не получилось - используем fallback на основе доминирования
+            # Если скрапинг Alt Season не успел или упал - используем fallback на основе доминирования
             if not alt_season:
                 print("[INFO] CoinGecko Alt Season calculation failed, using dominance fallback")
                 market_cap_percentage = global_data.get("market_cap_percentage", {})
                 alt_season = await market_globals_service.calculate_fallback_alt_season(market_cap_percentage)
+                degraded_sources.append("alt_season")
             
             return {
                 "global_data": global_data,
                 "fear_greed": fear_greed,
                 "alt_season": alt_season,
                 "fetched_at": datetime.utcnow().isoformat(),
-                "source": "api"
+                "source": "api",
+                "degraded_sources": degraded_sources
             }
         except Exception as e:
             print(f"[ERROR] Failed to fetch fresh data: {e}")
             return None
     
     def _parse_response(self, data: Dict[str, Any]) -> GlobalMarketResponse:
-        global_data = data.get("global_data", {})
-        fear_greed = data.get("fear_greed", {})
-        alt_season = data.get("alt_season", {})
+        global_data = data.get("global_data") or {}
+        fear_greed = data.get("fear_greed") or {}
+        alt_season = data.get("alt_season") or {}
         
         market_cap_percentage = global_data.get("market_cap_percentage", {})
         
@@ -82,9 +98,5 @@ class GlobalMarketDataService:
             last_updated=data.get("fetched_at", ""),
             data_source=data.get("source", "cache")
         )
-    
-    def _parse_cached_response(self, data: Dict[str, Any]) -> GlobalMarketResponse:
-        data["source"] = "cache"
-        return self._parse_response(data)
 
 global_market_service = GlobalMarketDataService()
\ No newline at end of file
@@ -1,82 +1,227 @@
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
 import json
+import os
+import socket
+import time
+import uuid
 
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from app.core.security.config import settings
 from app.core.database.repositories.generic import GenericRepository
 
+GlobalFetcher = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+MAX_RETRY_BACKOFF_SECONDS = 900
+
 class MarketGlobalsCacheService:
+    """L1 в памяти процесса поверх L2 в DynamoDB: stale-while-revalidate и один обновляющий на все воркеры."""
+    
     def __init__(self):
         self.cache_table = "market_globals_cache"
         self.cache_key = "global_market_data"
+        self.lease_key = "global_market_data:lease"
         self.ttl_hours = 3  # Изменили с 1 на 3 часа
+        self.refresh_ahead_ratio = settings.GLOBAL_MARKET_REFRESH_AHEAD_RATIO
+        self.lease_seconds = settings.GLOBAL_MARKET_REFRESH_LEASE_SECONDS
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._repository = GenericRepository(self.cache_table)
         
+        # L1: уже декодированный payload и время его получения upstream (epoch)
+        self._data: Optional[Dict[str, Any]] = None
+        self._cached_at = 0.0
+        self._l2_checked = False
+        self._l2_lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Проигравший аренду или неудачно сходивший в upstream воркер не повторяет попытку на каждом запросе
+        self._retry_after = 0.0
+        self._failed_refreshes = 0
+        
+        self.counters: Dict[str, int] = {
+            "l1_hits": 0,
+            "stale_hits": 0,
+            "l2_reads": 0,
+            "upstream_refreshes": 0,
+            "upstream_failures": 0,
+            "lease_denied": 0
+        }
+    
     def _get_repository(self):
-        return GenericRepository(self.cache_table)
+        return self._repository
     
-    def _is_cache_valid(self, cache_entry: Dict[str, Any]) -> bool:
-        try:
-            cached_time = datetime.fromisoformat(cache_entry.get('cached_at', ''))
-            expiry_time = cached_time + timedelta(hours=self.ttl_hours)
-            current_time = datetime.utcnow()
-            
-            is_valid = current_time < expiry_time
-            
-            if is_valid:
-                time_left = expiry_time - current_time
-                print(f"[DEBUG] Cache is valid, expires in {time_left}")
-            else:
-                print(f"[DEBUG] Cache expired {current_time - expiry_time} ago")
-                
-            return is_valid
-        except Exception as e:
-            print(f"[DEBUG] Cache validation error: {e}")
-            return False
+    @property
+    def ttl_seconds(self) -> float:
+        return self.ttl_hours * 3600
     
-    async def get_cached_data(self) -> Optional[Dict[str, Any]]:
+    def _age(self, now: Optional[float] = None) -> float:
+        return (now or time.time()) - self._cached_at
+    
+    def _is_cache_valid(self, now: Optional[float] = None) -> bool:
+        return self._data is not None and self._age(now) < self.ttl_seconds
+    
+    def _is_refresh_due(self, now: Optional[float] = None) -> bool:
+        # Обновляем заранее, до истечения TTL, чтобы читатели не видели протухших данных
+        return self._data is None or self._age(now) >= self.ttl_seconds * self.refresh_ahead_ratio
+    
+    def _adopt(self, data: Dict[str, Any], cached_at: float):
+        if self._data is None or cached_at > self._cached_at:
+            self._data = data
+            self._cached_at = cached_at
+    
+    async def _read_l2(self) -> Optional[Tuple[Dict[str, Any], float]]:
         try:
-            repo = self._get_repository()
-            cache_entry = repo.get_by_id(self.cache_key)
-            
-            if cache_entry and self._is_cache_valid(cache_entry):
-                print("[DEBUG] Using cached global market data")
-                return json.loads(cache_entry.get('data', '{}'))
+            self.counters["l2_reads"] += 1
+            cache_entry = await self._get_repository().aio.get_by_id(self.cache_key)
+            if not cache_entry:
+                return None
             
-            if cache_entry:
-                print("[DEBUG] Cache exists but expired")
-            else:
-                print("[DEBUG] No cache entry found")
-                
-            return None
+            # cached_at хранится как наивное UTC-время
+            cached_at = datetime.fromisoformat(cache_entry.get('cached_at', '')).replace(tzinfo=timezone.utc).timestamp()
+            return json.loads(cache_entry.get('data', '{}')), cached_at
         except Exception as e:
             print(f"[ERROR] Cache retrieval failed: {e}")
             return None
     
-    async def set_cache_data(self, data: Dict[str, Any]) -> bool:
+    async def _write_l2(self, data: Dict[str, Any], cached_at: float) -> bool:
         try:
-            repo = self._get_repository()
-            
-            current_time = datetime.utcnow()
-            expiry_time = current_time + timedelta(hours=self.ttl_hours)
+            cached_time = datetime.utcfromtimestamp(cached_at)
+            expiry_time = cached_time + timedelta(hours=self.ttl_hours)
             
+            # Один put_item перезаписывает запись целиком: без предварительного get и ветки update/create
             cache_entry = {
                 'id': self.cache_key,
                 'data': json.dumps(data),
-                'cached_at': current_time.isoformat(),
+                'cached_at': cached_time.isoformat(),
                 'expires_at': expiry_time.isoformat(),
                 'ttl_hours': self.ttl_hours
             }
-            
-            existing = repo.get_by_id(self.cache_key)
-            if existing:
-                repo.update_by_id(self.cache_key, cache_entry)
-                print(f"[DEBUG] Updated cache, expires at {expiry_time}")
-            else:
-                repo.create(cache_entry, auto_id=False)
-                print(f"[DEBUG] Created new cache entry, expires at {expiry_time}")
-            
+            await self._get_repository().aio.create(cache_entry, auto_id=False)
             return True
         except Exception as e:
             print(f"[ERROR] Cache storage failed: {e}")
             return False
+    
+    async def _acquire_lease(self) -> bool:
+        now = int(time.time())
+        lease = {
+            'id': self.lease_key,
+            'owner': self.owner_id,
+            'expires_at': now + int(self.lease_seconds)
+        }
+        condition = Attr('id').not_exists() | Attr('expires_at').lt(now) | Attr('owner').eq(self.owner_id)
+        try:
+            return await self._get_repository().aio.create_if(lease, condition)
+        except ClientError as e:
+            # Без таблицы аренды не блокируем обновление: в худшем случае обновят несколько воркеров
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                print(f"[ERROR] Cache lease table missing: {e}")
+                return True
+            print(f"[ERROR] Cache lease failed: {e}")
+            return False
+        except Exception as e:
+            # Троттлинг и сетевые ошибки: аренда не получена, повтор после паузы
+            print(f"[ERROR] Cache lease failed: {e}")
+            return False
+    
+    def _retry_base(self) -> float:
+        return min(self.lease_seconds, settings.GLOBAL_MARKET_REFRESH_CHECK_SECONDS)
+    
+    async def _load_l2_once(self):
+        if self._l2_checked:
+            return
+        if self._l2_lock is None:
+            self._l2_lock = asyncio.Lock()
+        
+        async with self._l2_lock:
+            if self._l2_checked:
+                return
+            entry = await self._read_l2()
+            if entry:
+                self._adopt(*entry)
+            self._l2_checked = True
+    
+    async def _refresh(self, fetcher: GlobalFetcher, use_lease: bool = True):
+        # Другой воркер мог уже обновить L2: сначала забираем его результат
+        entry = await self._read_l2()
+        if entry:
+            self._adopt(*entry)
+            if not self._is_refresh_due():
+                return
+        
+        if use_lease and not await self._acquire_lease():
+            self.counters["lease_denied"] += 1
+            self._retry_after = time.time() + self._retry_base()
+            return
+        
+        self.counters["upstream_refreshes"] += 1
+        try:
+            data = await fetcher()
+        except Exception as e:
+            print(f"[ERROR] Global market refresh failed: {e}")
+            data = None
+        if not data:
+            # Экспоненциальная пауза: недоступный upstream не опрашивается на каждом запросе
+            self.counters["upstream_failures"] += 1
+            self._failed_refreshes += 1
+            backoff = self._retry_base() * 2 ** (self._failed_refreshes - 1)
+            self._retry_after = time.time() + min(backoff, MAX_RETRY_BACKOFF_SECONDS)
+            return
+        
+        self._failed_refreshes = 0
+        cached_at = time.time()
+        self._adopt(data, cached_at)
+        await self._write_l2(data, cached_at)
+        print(f"[INFO][GlobalMarket] - Кэш обновлен, следующее обновление через {self.ttl_seconds * self.refresh_ahead_ratio:.0f}s")
+    
+    def schedule_refresh(self, fetcher: GlobalFetcher) -> Optional[asyncio.Task]:
+        if time.time() < self._retry_after:
+            return None
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh(fetcher))
+        return self._refresh_task
+    
+    async def refresh_if_due(self, fetcher: GlobalFetcher):
+        await self._load_l2_once()
+        if self._is_refresh_due():
+            task = self.schedule_refresh(fetcher)
+            if task is not None:
+                await asyncio.shield(task)
+    
+    async def get_data(self, fetcher: GlobalFetcher) -> Optional[Dict[str, Any]]:
+        await self._load_l2_once()
+        
+        if self._data is None:
+            # Холодный старт без L2: ждем единственный общий запрос upstream, но не чаще паузы после неудачи
+            if time.time() < self._retry_after:
+                return None
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh(fetcher, use_lease=False))
+            await asyncio.shield(self._refresh_task)
+            # Копия, как и на горячем пути: вызывающий код не должен менять L1
+            return {**self._data, "source": "api"} if self._data is not None else None
+        
+        now = time.time()
+        if self._is_refresh_due(now):
+            self.schedule_refresh(fetcher)
+        
+        if self._is_cache_valid(now):
+            self.counters["l1_hits"] += 1
+        else:
+            self.counters["stale_hits"] += 1
+        return {**self._data, "source": "cache"}
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "cached": self._data is not None,
+            "age_seconds": round(self._age(), 1) if self._data is not None else None,
+            "ttl_seconds": self.ttl_seconds,
+            "refresh_ahead_seconds": self.ttl_seconds * self.refresh_ahead_ratio,
+            "refreshing": self._refresh_task is not None and not self._refresh_task.done(),
+            "retry_in_seconds": round(max(0.0, self._retry_after - time.time()), 1),
+            "owner_id": self.owner_id
+        }
 
-market_globals_cache = MarketGlobalsCacheService()
\ No newline at end of file
+market_globals_cache = MarketGlobalsCacheService()
@@ -1,58 +1,14 @@
-import httpx
 import json
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 import time
 
-from app.core.security.config import settings
+from app.services.http_client import get_http_client
+from app.services.market.coingecko_gateway import coingecko_gateway, PRIORITY_BACKGROUND
 
 class MarketGlobalsService:
-    def __init__(self):
-        self.base_url = "https://api.coingecko.com/api/v3"
-        self.pro_base_url = "https://pro-api.coingecko.com/api/v3"
-        self.timeout = 30.0
-        
-        self.api_key = getattr(settings, 'COINGECKO_API_KEY', None)
-        self.use_pro = bool(self.api_key and self.api_key.strip())
-        
-    def _get_headers(self) -> Dict[str, str]:
-        headers = {
-            "Accept": "application/json",
-            "User-Agent": "Liberandum-API/1.0"
-        }
-        
-        if self.use_pro and self.api_key:
-            headers["x-cg-pro-api-key"] = self.api_key
-            
-        return headers
-    
-    def _get_base_url(self) -> str:
-        return self.pro_base_url if self.use_pro else self.base_url
-        
     async def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
-        try:
-            base_url = self._get_base_url()
-            headers = self._get_headers()
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{base_url}{endpoint}", 
-                    params=params, 
-                    headers=headers
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 429:
-                    return None
-                elif response.status_code in [401, 403] and self.use_pro:
-                    self.use_pro = False
-                    return await self._make_request(endpoint, params)
-                else:
-                    return None
-                    
-        except Exception:
-            return None
+        return await coingecko_gateway.request(endpoint, params, PRIORITY_BACKGROUND)
     
     async def get_global_data(self) -> Optional[Dict[str, Any]]:
         global_data = await self._make_request("/global")
@@ -72,21 +28,21 @@ class MarketGlobalsService:
     
     async def get_fear_greed_index(self) -> Optional[Dict[str, Any]]:
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get("https://api.alternative.me/fng/")
+            client = get_http_client("https://api.alternative.me")
+            response = await client.get("https://api.alternative.me/fng/")
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    fng_data = data.get("data", [])
+            if response.status_code == 200:
+                data = response.json()
+                fng_data = data.get("data", [])
                     
-                    if fng_data:
-                        latest = fng_data[0]
-                        return {
-                            "value": int(latest.get("value", 0)),
-                            "value_classification": latest.get("value_classification", ""),
-                            "timestamp": latest.get("timestamp", ""),
-                            "time_until_update": latest.get("time_until_update", "")
-                        }
+                if fng_data:
+                    latest = fng_data[0]
+                    return {
+                        "value": int(latest.get("value", 0)),
+                        "value_classification": latest.get("value_classification", ""),
+                        "timestamp": latest.get("timestamp", ""),
+                        "time_until_update": latest.get("time_until_update", "")
+                    }
                         
             return None
         except Exception:
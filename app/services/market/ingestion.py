@@ -0,0 +1,299 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+from boto3.dynamodb.conditions import Attr
+
+from app.core.security.config import settings
+from app.core.database.aio import run_in_db_executor
+from app.core.database.connector import get_generic_repository
+from app.services.market.coingecko_gateway import coingecko_gateway, PRIORITY_BACKGROUND
+from app.services.market.utils import safe_decimal, token_stats_id, content_hash
+
+MARKETS_PAGE_SIZE = 250
+WRITE_CHUNK_SIZE = 25
+MARKETS_PARAMS = {
+    "vs_currency": "usd",
+    "order": "market_cap_desc",
+    "per_page": MARKETS_PAGE_SIZE,
+    "sparkline": "true",
+    "price_change_percentage": "24h,7d"
+}
+
+class TokenStatsIngestion:
+    """Синхронизация token stats из /coins/markets: страницы по 250 монет, идемпотентный upsert по coingecko_id."""
+
+    def __init__(self):
+        self.table_name = "LiberandumAggregationTokenStats"
+        self.max_coins = settings.INGESTION_MAX_COINS
+        self.sparkline_points = settings.INGESTION_SPARKLINE_POINTS
+
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.runs = 0
+        self.failures = 0
+        self.last_run: Dict[str, Any] = {}
+        self.last_compaction: Dict[str, Any] = {}
+        self.last_error: Optional[str] = None
+
+    def _get_repository(self):
+        repo = get_generic_repository(self.table_name)
+        if not repo:
+            raise RuntimeError(f"Репозиторий для таблицы {self.table_name} недоступен")
+        return repo
+
+    def _load_groups(self) -> Dict[str, List[Dict[str, Any]]]:
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        # Неполный скан выдал бы живые строки за отсутствующие: ошибка прерывает прогон целиком
+        for item in self._get_repository().iter_all(raise_errors=True):
+            coingecko_id = str(item.get('coingecko_id') or '').lower()
+            if coingecko_id:
+                groups.setdefault(coingecko_id, []).append(item)
+        return groups
+
+    @staticmethod
+    def _collapse(coingecko_id: str, rows: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[str]]:
+        """Самая свежая активная строка монеты и id строк, которые заменяет строка с детерминированным ключом."""
+        newest = max(rows, key=lambda row: (not row.get('is_deleted', False), row.get('updated_at', '')))
+        canonical_id = token_stats_id(coingecko_id)
+        stale_ids = [row['id'] for row in rows if row.get('id') != canonical_id]
+
+        created = [row['created_at'] for row in rows if row.get('created_at')]
+        if created and newest.get('created_at') != min(created):
+            newest = {**newest, 'created_at': min(created)}
+        return newest, stale_ids
+
+    def _load_existing(self) -> Dict[str, Tuple[Dict[str, Any], List[str]]]:
+        # Один скан на прогон: текущее состояние монеты и ее старые дубли, которые уберет запись
+        return {
+            coingecko_id: self._collapse(coingecko_id, rows)
+            for coingecko_id, rows in self._load_groups().items()
+        }
+
+    def _sparkline(self, coin: Dict[str, Any]) -> List[Any]:
+        prices = [price for price in (coin.get('sparkline_in_7d') or {}).get('price') or [] if price is not None]
+        if len(prices) > self.sparkline_points:
+            # Прореживаем часовые точки за 7 дней до равномерной выборки, последняя точка сохраняется
+            step = len(prices) / self.sparkline_points
+            prices = [prices[int(index * step)] for index in range(self.sparkline_points - 1)] + [prices[-1]]
+        return [safe_decimal(price) for price in prices]
+
+    def map_coin(self, coin: Dict[str, Any], existing: Optional[Dict[str, Any]], now: str) -> Dict[str, Any]:
+        # Поля, которых нет в /coins/markets (is_halal, ручные правки), переходят из существующей записи
+        item = dict(existing) if existing else {'created_at': now}
+        item['id'] = token_stats_id(coin.get('id'))
+        item.update({
+            'symbol': str(coin.get('symbol') or '').upper(),
+            'coin_name': coin.get('name'),
+            'coingecko_id': coin.get('id'),
+            'market_cap': safe_decimal(coin.get('market_cap')),
+            'trading_volume_24h': safe_decimal(coin.get('total_volume')),
+            'price': safe_decimal(coin.get('current_price')),
+            'ath': safe_decimal(coin.get('ath')),
+            'atl': safe_decimal(coin.get('atl')),
+            'high_24h': safe_decimal(coin.get('high_24h')),
+            'low_24h': safe_decimal(coin.get('low_24h')),
+            'circulating_supply': safe_decimal(coin.get('circulating_supply')),
+            'fully_diluted_valuation': safe_decimal(coin.get('fully_diluted_valuation')),
+            'token_max_supply': safe_decimal(coin.get('max_supply')),
+            'token_total_supply': safe_decimal(coin.get('total_supply')),
+            'price_change_24h': safe_decimal(coin.get('price_change_percentage_24h')),
+            'price_change_7d': safe_decimal(coin.get('price_change_percentage_7d_in_currency')),
+            'market_cap_rank': coin.get('market_cap_rank'),
+            'sparkline_7d': self._sparkline(coin),
+            'import_source': 'coingecko'
+        })
+        item['content_hash'] = content_hash(item)
+        item['updated_at'] = now
+        return item
+
+    def _write_chunk(self, items: List[Dict[str, Any]], created: List[Dict[str, Any]]) -> Tuple[int, int, float]:
+        started = time.perf_counter()
+        repo = self._get_repository()
+        # Измененные строки уже сверены по content_hash со сканом прогона: пишем пачками BatchWriteItem
+        with repo.get_table(self.table_name).batch_writer(overwrite_by_pkeys=['id']) as batch_writer:
+            for item in items:
+                batch_writer.put_item(Item=item)
+
+        # Новые монеты — условно: строку, созданную админом после скана, синхронизация не затирает,
+        # ее поля подхватит следующий прогон. После первой синхронизации таких строк единицы
+        written = len(items)
+        unchanged = 0
+        for item in created:
+            if repo.create_if(item, Attr('id').not_exists()):
+                written += 1
+            else:
+                unchanged += 1
+        return written, unchanged, (time.perf_counter() - started) * 1000
+
+    def _delete_stale(self, stale_ids: List[str]) -> int:
+        return self._get_repository().delete_items(self.table_name, [{'id': item_id} for item_id in stale_ids])
+
+    async def _write(self, items: List[Dict[str, Any]], created: List[Dict[str, Any]],
+                     stale_ids: List[str]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            run_in_db_executor(self._write_chunk, items[i:i + WRITE_CHUNK_SIZE], created[i:i + WRITE_CHUNK_SIZE])
+            for i in range(0, max(len(items), len(created)), WRITE_CHUNK_SIZE)
+        ))
+
+        # Старые строки удаляются только после того, как на их месте уже лежат строки с детерминированным ключом
+        deleted = await run_in_db_executor(self._delete_stale, stale_ids) if stale_ids else 0
+        return {
+            "written": sum(result[0] for result in results),
+            "unchanged": sum(result[1] for result in results),
+            "deleted": deleted,
+            "write_ms": (time.perf_counter() - started) * 1000
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            started = time.perf_counter()
+            stats = {
+                "pages": 0, "upstream_calls": 0, "coins": 0, "created": 0,
+                "written": 0, "unchanged": 0, "deleted": 0, "write_ms": 0.0
+            }
+            pending: Optional[asyncio.Future] = None
+
+            async def collect():
+                for field, value in (await pending).items():
+                    stats[field] += value
+
+            try:
+                existing = await run_in_db_executor(self._load_existing)
+                seen = set()
+                pages = -(-self.max_coins // MARKETS_PAGE_SIZE)
+
+                for page in range(1, pages + 1):
+                    stats["upstream_calls"] += 1
+                    coins = await coingecko_gateway.request(
+                        "/coins/markets", {**MARKETS_PARAMS, "page": page}, PRIORITY_BACKGROUND
+                    )
+                    if coins is None:
+                        raise RuntimeError(f"/coins/markets page {page} недоступна")
+                    if not coins:
+                        break
+
+                    now = datetime.utcnow().isoformat()
+                    items = []
+                    created = []
+                    stale_ids = []
+                    for coin in coins:
+                        coingecko_id = str(coin.get('id') or '').lower()
+                        if not coingecko_id or coingecko_id in seen:
+                            continue
+                        seen.add(coingecko_id)
+                        stats["coins"] += 1
+
+                        previous, previous_stale = existing.get(coingecko_id, (None, []))
+                        item = self.map_coin(coin, previous, now)
+                        stats["created"] += previous is None
+                        stale_ids.extend(previous_stale)
+                        if previous is not None and previous.get('id') == item['id'] \
+                                and previous.get('content_hash') == item['content_hash']:
+                            stats["unchanged"] += 1
+                            continue
+                        (items if previous is not None else created).append(item)
+
+                    # Запись страницы идет в пуле DynamoDB, пока запрашивается следующая
+                    if pending is not None:
+                        await collect()
+                    pending = asyncio.ensure_future(self._write(items, created, stale_ids))
+
+                    stats["pages"] += 1
+                    if len(coins) < MARKETS_PAGE_SIZE:
+                        break
+
+                if pending is not None:
+                    await collect()
+                    pending = None
+
+                self.runs += 1
+                self.last_error = None
+            except Exception as e:
+                if pending is not None:
+                    try:
+                        await collect()
+                    except Exception:
+                        pass
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"[ERROR][Ingestion] - Ошибка синхронизации token stats: {e}")
+
+            stats["write_ms"] = round(stats["write_ms"], 1)
+            stats["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            stats["finished_at"] = datetime.utcnow().isoformat()
+            stats["error"] = self.last_error
+            self.last_run = stats
+            print(
+                f"[INFO][Ingestion] - Token stats: {stats['written']} записано, {stats['unchanged']} без изменений, "
+                f"{stats['deleted']} дублей удалено, {stats['upstream_calls']} запросов, запись {stats['write_ms']:.0f}ms"
+            )
+
+        if stats["written"] or stats["deleted"]:
+            from app.services.market.token_snapshot import token_snapshot_service
+            await token_snapshot_service.refresh()
+        return stats
+
+    def _compact(self) -> Dict[str, Any]:
+        repo = self._get_repository()
+        stats = {"coins": 0, "duplicates": 0, "rekeyed": 0, "deleted": 0}
+        stale_ids: List[str] = []
+
+        for coingecko_id, rows in self._load_groups().items():
+            stats["coins"] += 1
+            newest, coin_stale_ids = self._collapse(coingecko_id, rows)
+            if not coin_stale_ids:
+                continue
+
+            stats["duplicates"] += len(rows) - 1
+            item = {**newest, 'id': token_stats_id(coingecko_id)}
+            item['content_hash'] = content_hash(item)
+            repo.upsert_if_changed(item)
+            stats["rekeyed"] += 1
+            stale_ids.extend(coin_stale_ids)
+
+        stats["deleted"] = self._delete_stale(stale_ids)
+        return stats
+
+    async def compact(self) -> Dict[str, Any]:
+        """Разовое схлопывание накопленных дублей: по одной строке на coingecko_id под детерминированным ключом."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                stats = await run_in_db_executor(self._compact)
+                stats["error"] = None
+                print(f"[INFO][Ingestion] - Компакция token stats: {stats['rekeyed']} монет, {stats['deleted']} дублей удалено")
+            except Exception as e:
+                stats = {"coins": 0, "duplicates": 0, "rekeyed": 0, "deleted": 0, "error": str(e)}
+                print(f"[ERROR][Ingestion] - Компакция token stats прервана: {e}")
+            stats["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            stats["finished_at"] = datetime.utcnow().isoformat()
+            self.last_compaction = stats
+
+        if stats["deleted"]:
+            from app.services.market.token_snapshot import token_snapshot_service
+            await token_snapshot_service.refresh()
+        return stats
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "table": self.table_name,
+            "max_coins": self.max_coins,
+            "sparkline_points": self.sparkline_points,
+            "running": bool(self._lock and self._lock.locked()),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run": self.last_run,
+            "last_compaction": self.last_compaction,
+            "last_error": self.last_error
+        }
+
+token_stats_ingestion = TokenStatsIngestion()
@@ -1,10 +1,13 @@
-from typing import List, Optional, Dict, Any, Set
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 from datetime import datetime
 
 from app.core.database.connector import get_generic_repository
+from app.core.database.repositories.generic import not_deleted
+from app.services.market.token_snapshot import token_snapshot_service, TokenSnapshot
+from app.services.market.utils import token_stats_id, safe_float, safe_int, safe_bool, get_token_category
 from app.schemas.market import (
     TokenResponse, TokenDetailResponse, TokenListResponse, TokenFullStatsResponse,
-    ExchangeListResponse, TokenSparkline,
+    ExchangeListResponse, ExchangeDataConverter, TokenSparkline,
     HalalStatus, MarketData, Statistics, AllTimeHigh, AllTimeLow, PriceIndicators24h
 )
 
@@ -14,6 +17,7 @@ class MarketDataService:
         self.tokens_table = "LiberandumAggregationToken"
         self.exchange_stats_table = "LiberandumAggregationExchangesStats"
         self.exchanges_table = "LiberandumAggregationExchanges"
+        self.token_list_fields = ['symbol', 'avatar_image', 'is_halal', 'token_category']
 
     def _get_repository(self, table_name: str):
         repo = get_generic_repository(table_name)
@@ -21,49 +25,122 @@ class MarketDataService:
             raise RuntimeError(f"Репозиторий для таблицы {table_name} недоступен")
         return repo
 
-    def _remove_duplicates_by_symbol(self, token_stats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        seen_symbols: Set[str] = set()
-        unique_tokens = []
+    def _remove_duplicates_by_symbol(self, token_stats: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # После компакции строки уникальны по coingecko_id; остается выбрать одну монету на символ за один проход
+        latest: Dict[str, Dict[str, Any]] = {}
         
-        sorted_tokens = sorted(
-            token_stats, 
-            key=lambda x: x.get('updated_at', ''), 
-            reverse=True
-        )
+        for token in token_stats:
+            symbol = token.get('symbol', '').upper()
+            if not symbol:
+                continue
+            current = latest.get(symbol)
+            if current is None or token.get('updated_at', '') > current.get('updated_at', ''):
+                latest[symbol] = token
+        
+        return list(latest.values())
+
+    # Загрузки вселенной поднимают ошибку скана: усеченный снимок не должен подменить рабочий
+    def load_token_universe(self) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        token_stats_repo = self._get_repository(self.token_stats_table)
+        tokens_repo = self._get_repository(self.tokens_table)
         
-        for token in sorted_tokens:
+        active_token_stats = list(token_stats_repo.iter_all(filter_expression=not_deleted(), raise_errors=True))
+        
+        # Индекс по coingecko_id строится до схлопывания по символу: монета, проигравшая символ, доступна по id
+        stats_by_coingecko_id: Dict[str, Dict[str, Any]] = {}
+        for stat in active_token_stats:
+            coingecko_id = str(stat.get('coingecko_id') or '').lower()
+            current = stats_by_coingecko_id.get(coingecko_id)
+            if coingecko_id and (current is None or stat.get('updated_at', '') > current.get('updated_at', '')):
+                stats_by_coingecko_id[coingecko_id] = stat
+        
+        unique_token_stats = self._remove_duplicates_by_symbol(active_token_stats)
+        
+        tokens_by_symbol = {}
+        for token in tokens_repo.iter_all(
+            filter_expression=not_deleted(),
+            projection=self.token_list_fields,
+            raise_errors=True
+        ):
             symbol = token.get('symbol', '').upper()
-            if symbol and symbol not in seen_symbols:
-                seen_symbols.add(symbol)
-                unique_tokens.append(token)
+            if symbol:
+                tokens_by_symbol[symbol] = token
+        
+        return unique_token_stats, tokens_by_symbol, stats_by_coingecko_id
+
+    def load_exchange_universe(self) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        exchanges_repo = self._get_repository(self.exchanges_table)
+        exchange_stats_repo = self._get_repository(self.exchange_stats_table)
+        
+        stats_by_name = {}
+        for stat in exchange_stats_repo.iter_all(filter_expression=not_deleted(), raise_errors=True):
+            name = stat.get('name', '')
+            if name:
+                stats_by_name[name] = stat
+        
+        exchanges = []
+        for exchange in exchanges_repo.iter_all(filter_expression=not_deleted(), raise_errors=True):
+            exchange_stats = stats_by_name.get(exchange.get('name', ''))
+            if exchange_stats:
+                exchanges.append((exchange, exchange_stats))
+        
+        return exchanges
+
+    def _get_token_universe(self) -> TokenSnapshot:
+        # Роуты дожидаются token_snapshot_service.ensure(): без снимка здесь только неудачная общая сборка,
+        # и собственный скан на каждый запрос ее не заменит
+        snapshot = token_snapshot_service.get()
+        if snapshot is None:
+            raise RuntimeError("Снимок токенов недоступен")
+        return snapshot
+
+    def _find_token_stats(self, symbol_or_id: str, prefer_symbol: bool = False) -> Optional[Dict[str, Any]]:
+        snapshot = token_snapshot_service.get()
+        if snapshot:
+            if prefer_symbol:
+                return snapshot.get_by_symbol(symbol_or_id) or snapshot.get_by_coingecko_id(symbol_or_id)
+            return snapshot.get_by_coingecko_id(symbol_or_id) or snapshot.get_by_symbol(symbol_or_id)
         
-        return unique_tokens
+        token_stats_repo = self._get_repository(self.token_stats_table)
+        lookups = [('symbol', symbol_or_id.upper()), ('coingecko_id', symbol_or_id.lower())]
+        if not prefer_symbol:
+            lookups.reverse()
+        
+        for field_name, value in lookups:
+            if field_name == 'coingecko_id':
+                # Строка монеты лежит под ключом из coingecko_id: точечное чтение вместо поиска
+                item = token_stats_repo.get_by_id(token_stats_id(value))
+                if item and not item.get('is_deleted', False):
+                    return item
+            results = token_stats_repo.find_by_field(field_name, value)
+            if results:
+                unique_stats = self._remove_duplicates_by_symbol(results)
+                return unique_stats[0] if unique_stats else None
+        return None
+
+    def _find_token(self, symbol: str) -> Optional[Dict[str, Any]]:
+        snapshot = token_snapshot_service.get()
+        if snapshot:
+            return snapshot.get_token(symbol)
+        
+        token_results = self._get_repository(self.tokens_table).find_by_field('symbol', symbol)
+        return token_results[0] if token_results else None
+
+    def resolve_coingecko_id(self, token_id: str) -> str:
+        token_stats = self._find_token_stats(token_id, prefer_symbol=True)
+        if token_stats and token_stats.get('coingecko_id'):
+            return token_stats['coingecko_id']
+        return token_id.lower()
 
     def get_tokens_list(self, page: int = 1, limit: int = 100, sort: Optional[str] = None) -> TokenListResponse:
         try:
-            token_stats_repo = self._get_repository(self.token_stats_table)
-            tokens_repo = self._get_repository(self.tokens_table)
-            
-            scan_limit = min(limit * 3, 1000)
-            all_token_stats = token_stats_repo.scan_items(self.token_stats_table, limit=scan_limit)
-            
-            active_token_stats = [ts for ts in all_token_stats if not ts.get('is_deleted', False)]
-            unique_token_stats = self._remove_duplicates_by_symbol(active_token_stats)
+            universe = self._get_token_universe()
+            tokens_by_symbol = universe.tokens_by_symbol
             
-            all_tokens = tokens_repo.scan_items(self.tokens_table, limit=1000)
-            tokens_by_symbol = {}
-            for token in all_tokens:
-                if not token.get('is_deleted', False):
-                    symbol = token.get('symbol', '').upper()
-                    if symbol:
-                        tokens_by_symbol[symbol] = token
-            
-            sorted_token_stats = self._apply_sorting(unique_token_stats, sort)
-            
-            total_items = len(sorted_token_stats)
+            total_items = len(universe.stats)
             start_idx = (page - 1) * limit
             end_idx = start_idx + limit
-            paginated_stats = sorted_token_stats[start_idx:end_idx]
+            paginated_stats = universe.sort_index.page(sort, start_idx, end_idx)
             
             token_responses = []
             for stat in paginated_stats:
@@ -92,161 +169,69 @@ class MarketDataService:
                 pagination={"current_page": 1, "total_pages": 0, "total_items": 0, "items_per_page": limit}
             )
 
-    def _apply_sorting(self, token_stats: List[Dict[str, Any]], sort: Optional[str]) -> List[Dict[str, Any]]:
-        def safe_float(value, default=0.0):
-            try:
-                return float(str(value or 0).replace(',', ''))
-            except:
-                return default
-        
-        def safe_int(value, default=0):
-            try:
-                return int(float(str(value or 0).replace(',', '')))
-            except:
-                return default
-        
-        def safe_bool(value, default=False):
-            if value is None:
-                return default
-            if isinstance(value, bool):
-                return value
-            if isinstance(value, str):
-                return value.lower() in ('true', '1', 'yes')
-            return bool(value)
-        
-        def get_token_category(token_stat):
-            symbol = str(token_stat.get('symbol', '')).upper()
-            name = str(token_stat.get('coin_name', '')).lower()
-            
-            if symbol in ['USDT', 'USDC', 'DAI', 'BUSD', 'FRAX', 'TUSD', 'FDUSD']:
-                return "stablecoin"
-            elif symbol in ['BTC', 'ETH', 'BNB', 'ADA', 'SOL', 'AVAX', 'MATIC', 'DOT', 'ATOM', 'NEAR', 'FTM']:
-                return "layer1"
-            elif 'layer' in name or 'l2' in name or symbol in ['ARB', 'OP', 'MATIC']:
-                return "layer2"
-            elif any(word in name for word in ['defi', 'swap', 'finance', 'lending', 'protocol']):
-                return "defi"
-            elif any(word in name for word in ['meme', 'doge', 'shib', 'pepe', 'floki']):
-                return "meme"
-            else:
-                return "other"
-        
-        if sort == "market_cap":
-            return sorted(token_stats, 
-                         key=lambda x: safe_float(x.get('market_cap')), 
-                         reverse=True)
-        
-        elif sort == "volume":
-            return sorted(token_stats, 
-                         key=lambda x: safe_float(x.get('trading_volume_24h')), 
-                         reverse=True)
-        
-        elif sort == "price":
-            return sorted(token_stats, 
-                         key=lambda x: safe_float(x.get('price')), 
-                         reverse=True)
-        
-        elif sort == "price_change_24h":
-            return sorted(token_stats, 
-                         key=lambda x: safe_float(x.get('volume_24h_change_24h')), 
-                         reverse=True)
-        
-        elif sort == "price_change_7d":
-            return sorted(token_stats, 
-                         key=lambda x: safe_float(x.get('price_change_7d')), 
-                         reverse=True)
+    def search_tokens(self, query: str, limit: int = 20, sort: Optional[str] = "market_cap") -> List[TokenResponse]:
+        universe = self._get_token_universe()
+        index = token_snapshot_service.token_index
         
-        elif sort == "halal":
-            return sorted(token_stats, 
-                         key=lambda x: (safe_bool(x.get('is_halal'), False), safe_float(x.get('market_cap'))), 
-                         reverse=True)
-        
-        elif sort == "layer1":
-            return sorted(token_stats, 
-                         key=lambda x: (get_token_category(x) == "layer1", safe_float(x.get('market_cap'))), 
-                         reverse=True)
-        
-        elif sort == "stablecoin":
-            return sorted(token_stats, 
-                         key=lambda x: (get_token_category(x) == "stablecoin", safe_float(x.get('market_cap'))), 
-                         reverse=True)
-        
-        elif sort == "defi":
-            return sorted(token_stats, 
-                         key=lambda x: (get_token_category(x) == "defi", safe_float(x.get('market_cap'))), 
-                         reverse=True)
-        
-        elif sort == "meme":
-            return sorted(token_stats, 
-                         key=lambda x: (get_token_category(x) == "meme", safe_float(x.get('market_cap'))), 
-                         reverse=True)
+        if sort in (None, "market_cap"):
+            # Релевантность: точный символ, префикс символа, префикс названия, подстрока; внутри — капитализация
+            matching_stats = [universe.get_by_symbol(symbol) for symbol in index.search(query, limit)]
+        else:
+            positions = [
+                universe.positions_by_symbol[symbol]
+                for symbol in index.matches(query)
+                if symbol in universe.positions_by_symbol
+            ]
+            matching_stats = universe.sort_index.sorted(sort, positions)[:limit]
         
-        elif sort == "category":
-            category_order = {"layer1": 0, "stablecoin": 1, "defi": 2, "layer2": 3, "meme": 4, "other": 5}
-            return sorted(token_stats, 
-                         key=lambda x: (category_order.get(get_token_category(x), 10), -safe_float(x.get('market_cap'))))
+        return [
+            self._convert_token_stats_to_response(stat, universe.get_token(stat.get('symbol', '')))
+            for stat in matching_stats
+            if stat
+        ]
+
+    def search_exchanges(self, query: str, limit: int = 20) -> ExchangeListResponse:
+        universe = self._get_token_universe()
+        index = token_snapshot_service.exchange_index
         
-        elif sort == "alphabetical":
-            return sorted(token_stats, key=lambda x: str(x.get('symbol', '')).upper())
+        results = []
+        for exchange_id in index.search(query, limit):
+            pair = universe.exchanges_by_id.get(exchange_id)
+            if not pair:
+                continue
+            exchange, exchange_stats = pair
+            results.append(ExchangeDataConverter.from_db_to_api(exchange_stats, exchange, len(results) + 1))
         
-        else:
-            return sorted(token_stats, 
-                         key=lambda x: (safe_int(x.get('market_cap_rank'), 999999), -safe_float(x.get('market_cap'))))
+        return ExchangeListResponse(data=results)
 
     def get_token_full_stats(self, symbol_or_id: str) -> Optional[TokenFullStatsResponse]:
         try:
-            token_stats_repo = self._get_repository(self.token_stats_table)
-            
-            token_stats_by_symbol = token_stats_repo.find_by_field('symbol', symbol_or_id.upper())
-            
-            if not token_stats_by_symbol:
-                token_stats_by_coingecko = token_stats_repo.find_by_field('coingecko_id', symbol_or_id.lower())
-                if not token_stats_by_coingecko:
-                    return None
-                token_stats = token_stats_by_coingecko
-            else:
-                token_stats = token_stats_by_symbol
-            
-            unique_stats = self._remove_duplicates_by_symbol(token_stats)
-            if not unique_stats:
+            latest_stats = self._find_token_stats(symbol_or_id, prefer_symbol=True)
+            if not latest_stats:
                 return None
             
-            latest_stats = unique_stats[0]
-            
-            def safe_float(value, default=None):
-                try:
-                    return float(str(value or 0).replace(',', '')) if value is not None else default
-                except:
-                    return default
-            
-            def safe_int(value, default=None):
-                try:
-                    return int(float(str(value or 0).replace(',', ''))) if value is not None else default
-                except:
-                    return default
-            
             return TokenFullStatsResponse(
                 id=latest_stats.get('id', ''),
                 symbol=latest_stats.get('symbol', ''),
                 coin_name=latest_stats.get('coin_name', ''),
                 coingecko_id=latest_stats.get('coingecko_id', ''),
-                market_cap=safe_float(latest_stats.get('market_cap')),
-                trading_volume_24h=safe_float(latest_stats.get('trading_volume_24h')),
-                token_max_supply=safe_int(latest_stats.get('token_max_supply')),
-                token_total_supply=safe_int(latest_stats.get('token_total_supply')),
-                transactions_count_30d=safe_int(latest_stats.get('transactions_count_30d')),
-                volume_1m_change_1m=safe_float(latest_stats.get('volume_1m_change_1m')),
-                volume_24h_change_24h=safe_float(latest_stats.get('volume_24h_change_24h')),
-                price=safe_float(latest_stats.get('price')),
-                ath=safe_float(latest_stats.get('ath')),
-                atl=safe_float(latest_stats.get('atl')),
-                liquidity_score=safe_float(latest_stats.get('liquidity_score')),
-                tvl=safe_float(latest_stats.get('tvl')),
-                price_change_24h=safe_float(latest_stats.get('price_change_24h')),
-                price_change_7d=safe_float(latest_stats.get('price_change_7d')),
-                price_change_30d=safe_float(latest_stats.get('price_change_30d')),
-                market_cap_rank=safe_int(latest_stats.get('market_cap_rank')),
-                volume_rank=safe_int(latest_stats.get('volume_rank')),
+                market_cap=safe_float(latest_stats.get('market_cap'), None),
+                trading_volume_24h=safe_float(latest_stats.get('trading_volume_24h'), None),
+                token_max_supply=safe_int(latest_stats.get('token_max_supply'), None),
+                token_total_supply=safe_int(latest_stats.get('token_total_supply'), None),
+                transactions_count_30d=safe_int(latest_stats.get('transactions_count_30d'), None),
+                volume_1m_change_1m=safe_float(latest_stats.get('volume_1m_change_1m'), None),
+                volume_24h_change_24h=safe_float(latest_stats.get('volume_24h_change_24h'), None),
+                price=safe_float(latest_stats.get('price'), None),
+                ath=safe_float(latest_stats.get('ath'), None),
+                atl=safe_float(latest_stats.get('atl'), None),
+                liquidity_score=safe_float(latest_stats.get('liquidity_score'), None),
+                tvl=safe_float(latest_stats.get('tvl'), None),
+                price_change_24h=safe_float(latest_stats.get('price_change_24h'), None),
+                price_change_7d=safe_float(latest_stats.get('price_change_7d'), None),
+                price_change_30d=safe_float(latest_stats.get('price_change_30d'), None),
+                market_cap_rank=safe_int(latest_stats.get('market_cap_rank'), None),
+                volume_rank=safe_int(latest_stats.get('volume_rank'), None),
                 created_at=latest_stats.get('created_at', ''),
                 updated_at=latest_stats.get('updated_at', '')
             )
@@ -256,52 +241,11 @@ class MarketDataService:
             return None
     
     def _convert_token_stats_to_response(self, token_stats: Dict[str, Any], token_data: Dict[str, Any] = None) -> TokenResponse:
-        def safe_float(value, default=0.0):
-            try:
-                return float(str(value or 0).replace(',', ''))
-            except:
-                return default
-        
-        def safe_int(value, default=0):
-            try:
-                return int(float(str(value or 0).replace(',', '')))
-            except:
-                return default
-        
-        def safe_bool(value, default=None):
-            if value is None:
-                return default
-            if isinstance(value, bool):
-                return value
-            if isinstance(value, str):
-                return value.lower() in ('true', '1', 'yes')
-            return bool(value)
-        
-        def get_token_category(token_stat, token):
-            if token and token.get('token_category'):
-                return token['token_category']
-            
-            symbol = str(token_stat.get('symbol', '')).upper()
-            name = str(token_stat.get('coin_name', '')).lower()
-            
-            if symbol in ['USDT', 'USDC', 'DAI', 'BUSD', 'FRAX', 'TUSD', 'FDUSD']:
-                return "stablecoin"
-            elif symbol in ['BTC', 'ETH', 'BNB', 'ADA', 'SOL', 'AVAX', 'MATIC', 'DOT', 'ATOM', 'NEAR', 'FTM']:
-                return "layer1"
-            elif 'layer' in name or 'l2' in name or symbol in ['ARB', 'OP', 'MATIC']:
-                return "layer2"
-            elif any(word in name for word in ['defi', 'swap', 'finance', 'lending', 'protocol']):
-                return "defi"
-            elif any(word in name for word in ['meme', 'doge', 'shib', 'pepe', 'floki']):
-                return "meme"
-            else:
-                return "other"
-        
         sparkline_data = token_stats.get('sparkline_7d', [])
         if not isinstance(sparkline_data, list):
             sparkline_data = []
         
-        token_category = get_token_category(token_stats, token_data)
+        token_category = (token_data or {}).get('token_category') or get_token_category(token_stats)
         
         return TokenResponse(
             id=str(token_stats.get('coingecko_id', token_stats.get('symbol', 'unknown'))).lower(),
@@ -313,7 +257,7 @@ class MarketDataService:
             price_change_percentage_24h=safe_float(token_stats.get('volume_24h_change_24h')),
             price_change_percentage_7d=safe_float(token_stats.get('price_change_7d')),
             sparkline_in_7d=TokenSparkline(price=sparkline_data),
-            is_halal=safe_bool(token_stats.get('is_halal') or (token_data.get('is_halal') if token_data else None)),
+            is_halal=safe_bool(token_stats.get('is_halal') or (token_data.get('is_halal') if token_data else None), None),
             is_layer_one=token_category == "layer1",
             is_stablecoin=token_category == "stablecoin",
             token_category=token_category,
@@ -325,39 +269,11 @@ class MarketDataService:
 
     def get_token_detail(self, token_id: str) -> Optional[TokenDetailResponse]:
         try:
-            token_stats_repo = self._get_repository(self.token_stats_table)
-            tokens_repo = self._get_repository(self.tokens_table)
-            
-            token_stats_results = token_stats_repo.find_by_field('coingecko_id', token_id)
-            if not token_stats_results:
-                token_stats_results = token_stats_repo.find_by_field('symbol', token_id.upper())
-            
-            if not token_stats_results:
+            token_stats = self._find_token_stats(token_id)
+            if not token_stats:
                 return None
             
-            unique_stats = self._remove_duplicates_by_symbol(token_stats_results)
-            if not unique_stats:
-                return None
-            
-            token_stats = unique_stats[0]
-            
-            token = None
-            if token_stats.get('symbol'):
-                token_results = tokens_repo.find_by_field('symbol', token_stats['symbol'])
-                if token_results:
-                    token = token_results[0]
-            
-            def safe_float(value, default=0.0):
-                try:
-                    return float(value or 0)
-                except:
-                    return default
-            
-            def safe_int(value, default=0):
-                try:
-                    return int(float(value or 0))
-                except:
-                    return default
+            token = self._find_token(token_stats['symbol']) if token_stats.get('symbol') else None
             
             return TokenDetailResponse(
                 id=token_stats.get('coingecko_id', ''),
@@ -0,0 +1,352 @@
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import uuid
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Iterable
+from urllib.parse import urlsplit
+
+from app.core.security.config import settings
+from app.services.market.utils import json_dumps
+
+PriceHandler = Callable[[Dict[str, Dict[str, Any]]], Awaitable[None]]
+
+# Проверка владельца и изменение аренды — одна атомарная операция на сервере:
+# между GET и PEXPIRE/DEL аренда могла истечь и достаться другому воркеру
+CLAIM_LEASE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if not owner then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+if owner == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def script_sha(script: str) -> str:
+    return hashlib.sha1(script.encode("utf-8")).hexdigest()
+
+class BrokerError(Exception):
+    pass
+
+class InMemoryPriceBroker:
+    """Брокер одного процесса: этот воркер ведет все токены и доставляет цены сам себе."""
+
+    backend = "memory"
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.handler: Optional[PriceHandler] = None
+        self.published = 0
+        self.received = 0
+        self.led_tokens = 0
+
+    def set_handler(self, handler: PriceHandler):
+        self.handler = handler
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def claim(self, token_ids: List[str], ttl: float) -> List[str]:
+        self.led_tokens = len(token_ids)
+        return token_ids
+
+    async def release(self, token_ids: List[str]):
+        pass
+
+    async def _deliver(self, prices: Dict[str, Dict[str, Any]]):
+        self.received += 1
+        if self.handler is not None:
+            await self.handler(prices)
+
+    async def publish(self, prices: Dict[str, Dict[str, Any]]):
+        self.published += 1
+        await self._deliver(prices)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "worker_id": self.worker_id,
+            "led_tokens": self.led_tokens,
+            "published": self.published,
+            "received": self.received
+        }
+
+class _RespConnection:
+    """Минимальный клиент протокола Redis (RESP2): команды, пайплайн и чтение ответов."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, url: str, timeout: float) -> "_RespConnection":
+        parts = urlsplit(url)
+        if parts.scheme == "unix":
+            connect = asyncio.open_unix_connection(parts.path)
+        else:
+            connect = asyncio.open_connection(parts.hostname or "127.0.0.1", parts.port or 6379)
+        reader, writer = await asyncio.wait_for(connect, timeout=timeout)
+        connection = cls(reader, writer)
+
+        if parts.password:
+            await connection.execute("AUTH", parts.password)
+        database = parts.path.strip("/") if parts.scheme != "unix" else ""
+        if database and database != "0":
+            await connection.execute("SELECT", database)
+        return connection
+
+    @staticmethod
+    def _encode(args: Iterable[Any]) -> bytes:
+        args = [arg if isinstance(arg, bytes) else str(arg).encode("utf-8") for arg in args]
+        chunks = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            chunks.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(chunks)
+
+    async def read_reply(self) -> Any:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Соединение с брокером закрыто")
+
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode("utf-8")
+        if prefix == b"-":
+            return BrokerError(payload.decode("utf-8"))
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self.read_reply() for _ in range(length)]
+        raise BrokerError(f"Неизвестный ответ брокера: {line!r}")
+
+    async def send(self, *args: Any):
+        self.writer.write(self._encode(args))
+        await self.writer.drain()
+
+    async def pipeline(self, commands: List[List[Any]]) -> List[Any]:
+        # Все команды одной записью, затем столько же ответов: один RTT на пачку токенов
+        self.writer.write(b"".join(self._encode(command) for command in commands))
+        await self.writer.drain()
+        return [await self.read_reply() for _ in commands]
+
+    async def execute(self, *args: Any) -> Any:
+        reply = (await self.pipeline([list(args)]))[0]
+        if isinstance(reply, BrokerError):
+            raise reply
+        return reply
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+class RedisPriceBroker(InMemoryPriceBroker):
+    """Pub/sub между воркерами через Redis-совместимый сервер; лидерство по токену — аренда с владельцем в Lua-скрипте."""
+
+    backend = "redis"
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self.channel = settings.PRICE_BROKER_CHANNEL
+        self.timeout = settings.PRICE_BROKER_TIMEOUT_SECONDS
+
+        self._commands: Optional[_RespConnection] = None
+        self._command_lock: Optional[asyncio.Lock] = None
+        self._subscriber: Optional[asyncio.Task] = None
+
+        self.subscribed = False
+        self.degraded = False
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    def _safe_url(self) -> str:
+        parts = urlsplit(self.url)
+        if parts.scheme == "unix":
+            return self.url
+        return f"{parts.scheme}://{parts.hostname}:{parts.port or 6379}"
+
+    def _lease_key(self, token_id: str) -> str:
+        return f"{self.channel}:lead:{token_id}"
+
+    def _fail(self, error: Exception):
+        self.errors += 1
+        self.last_error = str(error)
+        if not self.degraded:
+            print(f"[ERROR][PriceBroker] - Брокер недоступен, работаем локально: {error}")
+        self.degraded = True
+        if self._commands is not None:
+            self._commands.close()
+            self._commands = None
+
+    async def _pipeline(self, commands: List[List[Any]]) -> List[Any]:
+        if self._command_lock is None:
+            self._command_lock = asyncio.Lock()
+
+        async with self._command_lock:
+            if self._commands is None:
+                self._commands = await _RespConnection.open(self.url, self.timeout)
+            replies = await asyncio.wait_for(self._commands.pipeline(commands), timeout=self.timeout)
+
+        if self.degraded:
+            print("[INFO][PriceBroker] - Брокер снова доступен")
+            self.degraded = False
+        return replies
+
+    async def _eval(self, script: str, calls: List[List[Any]]) -> List[Any]:
+        # EVALSHA не гоняет тело скрипта в каждой команде; после рестарта сервера кэш скриптов пуст — тогда EVAL
+        sha = script_sha(script)
+        replies = await self._pipeline([["EVALSHA", sha, 1, *args] for args in calls])
+        if any(isinstance(reply, BrokerError) and str(reply).startswith("NOSCRIPT") for reply in replies):
+            replies = await self._pipeline([["EVAL", script, 1, *args] for args in calls])
+
+        for reply in replies:
+            if isinstance(reply, BrokerError):
+                raise reply
+        return replies
+
+    async def start(self):
+        if self._subscriber is None or self._subscriber.done():
+            self._subscriber = asyncio.create_task(self._subscribe_loop())
+            print(f"[INFO][PriceBroker] - Воркер {self.worker_id} подписан на {self.channel}")
+
+    async def stop(self):
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            try:
+                await self._subscriber
+            except asyncio.CancelledError:
+                pass
+            self._subscriber = None
+        self.subscribed = False
+
+        if self._commands is not None:
+            self._commands.close()
+            self._commands = None
+
+    async def _subscribe_loop(self):
+        delay = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await _RespConnection.open(self.url, self.timeout)
+                await connection.send("SUBSCRIBE", self.channel)
+                confirmation = await connection.read_reply()
+                if isinstance(confirmation, BrokerError):
+                    raise confirmation
+                self.subscribed = True
+                delay = 1.0
+
+                while True:
+                    reply = await connection.read_reply()
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        try:
+                            await self._deliver(json.loads(reply[2]))
+                        except Exception as e:
+                            print(f"[ERROR][PriceBroker] - Ошибка обработки цен: {e}")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.subscribed = False
+                self._fail(e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    async def claim(self, token_ids: List[str], ttl: float) -> List[str]:
+        """Берет свободные аренды и продлевает свои; возвращает токены, которые опрашивает этот воркер."""
+        if not token_ids:
+            self.led_tokens = 0
+            return []
+
+        if not self.subscribed:
+            # Чужие цены до нас не дойдут: пока подписка не поднята, ведем свои токены сами
+            self.led_tokens = len(token_ids)
+            return token_ids
+
+        ttl_ms = max(1000, int(ttl * 1000))
+        try:
+            # Свободная аренда берется, своя продлевается, чужая не трогается — за один RTT на всю пачку
+            replies = await self._eval(
+                CLAIM_LEASE_SCRIPT,
+                [[self._lease_key(token_id), self.worker_id, ttl_ms] for token_id in token_ids]
+            )
+            mine = set(token_id for token_id, reply in zip(token_ids, replies) if reply == 1)
+        except Exception as e:
+            # Без брокера каждый воркер ведет свои подписки сам, как до появления брокера
+            self._fail(e)
+            self.led_tokens = len(token_ids)
+            return token_ids
+
+        led = [token_id for token_id in token_ids if token_id in mine]
+        self.led_tokens = len(led)
+        return led
+
+    async def release(self, token_ids: List[str]):
+        """Отдает аренды токенов, на которые у воркера больше нет подписчиков, не дожидаясь истечения."""
+        if not token_ids or not self.subscribed:
+            return
+
+        try:
+            await self._eval(
+                RELEASE_LEASE_SCRIPT,
+                [[self._lease_key(token_id), self.worker_id] for token_id in token_ids]
+            )
+        except Exception as e:
+            self._fail(e)
+
+    async def publish(self, prices: Dict[str, Dict[str, Any]]):
+        self.published += 1
+        try:
+            await self._pipeline([["PUBLISH", self.channel, json_dumps(prices)]])
+            if self.subscribed:
+                return
+        except Exception as e:
+            self._fail(e)
+
+        # Подписчик не работает: свои цены доставляем локально
+        await self._deliver(prices)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **super().metrics(),
+            "url": self._safe_url(),
+            "channel": self.channel,
+            "subscribed": self.subscribed,
+            "degraded": self.degraded,
+            "errors": self.errors,
+            "last_error": self.last_error
+        }
+
+def create_price_broker(url: str):
+    if url.startswith(("redis://", "unix://")):
+        return RedisPriceBroker(url)
+    return InMemoryPriceBroker()
+
+price_broker = create_price_broker(settings.PRICE_BROKER_URL)
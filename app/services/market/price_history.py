@@ -0,0 +1,133 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from app.core.security.config import settings
+from app.services.market.utils import safe_float
+
+# Колонки значений в кольце: порядок совпадает с рядами market_chart
+PRICE, MARKET_CAP, VOLUME = 0, 1, 2
+
+class PriceRing:
+    """Кольцевой буфер тиков одного токена на массивах фиксированного размера."""
+
+    __slots__ = ('timestamps', 'values', 'start', 'size', 'latest')
+
+    def __init__(self, capacity: int):
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, 3), dtype=np.float64)
+        self.start = 0
+        self.size = 0
+        self.latest: Optional[Dict[str, Any]] = None
+
+    @property
+    def capacity(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def last_timestamp(self) -> int:
+        return int(self.timestamps[(self.start + self.size - 1) % self.capacity]) if self.size else 0
+
+    def append(self, timestamp: int, price: float, market_cap: float, volume: float) -> bool:
+        if self.size and timestamp <= self.last_timestamp:
+            return False
+
+        if self.size < self.capacity:
+            position = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            # Буфер полон: перезаписываем самый старый тик
+            position = self.start
+            self.start = (self.start + 1) % self.capacity
+
+        self.timestamps[position] = timestamp
+        self.values[position] = (price, market_cap, volume)
+        return True
+
+    def ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        end = self.start + self.size
+        if end <= self.capacity:
+            return self.timestamps[self.start:end], self.values[self.start:end]
+        return (
+            np.concatenate((self.timestamps[self.start:], self.timestamps[:end - self.capacity])),
+            np.concatenate((self.values[self.start:], self.values[:end - self.capacity]))
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes
+
+class PriceHistory:
+    """История тиков поллера по токенам: мгновенный снапшот для новых подписчиков и короткие графики без upstream."""
+
+    def __init__(self):
+        self.capacity = settings.PRICE_HISTORY_CAPACITY
+        self.max_tokens = settings.PRICE_HISTORY_MAX_TOKENS
+        self._rings: "OrderedDict[str, PriceRing]" = OrderedDict()
+
+        self.recorded = 0
+        self.evicted = 0
+
+    def record(self, prices: Dict[str, Dict[str, Any]]):
+        for token_id, price_data in prices.items():
+            ring = self._rings.get(token_id)
+            if ring is None:
+                ring = self._rings[token_id] = PriceRing(self.capacity)
+                while len(self._rings) > self.max_tokens:
+                    self._rings.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._rings.move_to_end(token_id)
+
+            timestamp = int(price_data.get("timestamp") or time.time() * 1000)
+            if ring.append(
+                timestamp,
+                safe_float(price_data.get("price")),
+                safe_float(price_data.get("market_cap")),
+                safe_float(price_data.get("volume_24h"))
+            ):
+                self.recorded += 1
+            ring.latest = price_data
+
+    def latest(self, token_id: str, max_age: float) -> Optional[Dict[str, Any]]:
+        ring = self._rings.get(token_id)
+        if ring is None or ring.latest is None:
+            return None
+        if time.time() * 1000 - ring.last_timestamp > max_age * 1000:
+            return None
+        return ring.latest
+
+    def window(self, token_id: str, seconds: float, tolerance: float) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Тики за последние seconds, если буфер непрерывно покрывает этот диапазон (без разрывов длиннее tolerance)."""
+        ring = self._rings.get(token_id)
+        if ring is None or not ring.size:
+            return None
+
+        now_ms = int(time.time() * 1000)
+        since_ms = now_ms - int(seconds * 1000)
+        tolerance_ms = tolerance * 1000
+        timestamps, values = ring.ordered()
+
+        if timestamps[0] > since_ms + tolerance_ms or now_ms - timestamps[-1] > tolerance_ms:
+            return None
+
+        # Простой поллера (токен без подписчиков, рестарт) оставляет дыру посреди окна: такой график берем из кэша
+        offset = int(np.searchsorted(timestamps, since_ms, side='left'))
+        timestamps, values = timestamps[offset:], values[offset:]
+        if len(timestamps) > 1 and np.diff(timestamps).max() > tolerance_ms:
+            return None
+        return timestamps, values
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokens": len(self._rings),
+            "capacity_per_token": self.capacity,
+            "max_tokens": self.max_tokens,
+            "recorded": self.recorded,
+            "evicted": self.evicted,
+            "bytes": sum(ring.nbytes for ring in self._rings.values())
+        }
+
+price_history = PriceHistory()
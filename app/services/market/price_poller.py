@@ -0,0 +1,145 @@
+import asyncio
+import time
+from typing import Dict, Any, Optional, List, Callable, Iterable
+
+from app.core.security.config import settings
+from app.services.market.coingecko_gateway import coingecko_gateway, PRIORITY_BACKGROUND
+from app.services.market.coingecko_service import coingecko_service
+
+class PricePoller:
+    """Один цикл на все подписки: пачки /simple/price и интервал, подстроенный под свободную квоту CoinGecko."""
+
+    def __init__(self, subscriptions: Callable[[], Iterable[str]], broker):
+        self.subscriptions = subscriptions
+        # Брокер решает, какие токены опрашивает этот воркер, и разносит цены всем воркерам
+        self.broker = broker
+
+        self.base_interval = settings.PRICE_POLLER_INTERVAL_SECONDS
+        self.max_interval = settings.PRICE_POLLER_MAX_INTERVAL_SECONDS
+        self.batch_size = settings.PRICE_POLLER_BATCH_SIZE
+        self.budget_share = settings.PRICE_POLLER_BUDGET_SHARE
+
+        self.interval = float(self.base_interval)
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._rate_limited_seen = 0
+        self._last_poll = 0.0
+
+        self.cycles = 0
+        self.upstream_batches = 0
+        self.last_tokens = 0
+        self.last_published = 0
+        self.last_error: Optional[str] = None
+
+    def _batches(self, token_ids: List[str]) -> List[List[str]]:
+        return [token_ids[i:i + self.batch_size] for i in range(0, len(token_ids), self.batch_size)]
+
+    def _min_interval(self, batches: int) -> float:
+        # Поллер не должен съедать больше своей доли минутной квоты
+        budget = max(1.0, coingecko_gateway.rate_per_minute * self.budget_share)
+        return batches * 60.0 / budget
+
+    def _adapt(self, batches: int) -> float:
+        rate_limited = coingecko_gateway.metrics_counters["rate_limited"]
+        headroom = coingecko_gateway.headroom()
+
+        if rate_limited > self._rate_limited_seen or headroom == 0.0:
+            self.interval = min(self.max_interval, self.interval * 2)
+        elif headroom > 0.5:
+            self.interval = max(self.base_interval, self.interval * 0.75)
+
+        self._rate_limited_seen = rate_limited
+        return max(self.interval, self._min_interval(batches))
+
+    async def poll_once(self) -> int:
+        subscribed = sorted(set(self.subscriptions()))
+        # Аренда живет несколько интервалов: лидер продлевает ее каждый цикл, упавшего сменят после истечения
+        token_ids = await self.broker.claim(subscribed, self.interval * 3 + 10)
+        batches = self._batches(token_ids)
+        self.last_tokens = len(token_ids)
+        self._last_poll = time.monotonic()
+
+        results = await asyncio.gather(
+            *(coingecko_service.get_token_prices(batch, priority=PRIORITY_BACKGROUND) for batch in batches),
+            return_exceptions=True
+        )
+        self.upstream_batches += len(batches)
+
+        prices = {}
+        for result in results:
+            if isinstance(result, Exception):
+                self.last_error = str(result)
+                print(f"[ERROR][PricePoller] - Ошибка пакета цен: {result}")
+                continue
+            prices.update(result)
+
+        # Один вызов на тик: подписчики получают все свои токены одним кадром
+        if prices:
+            await self.broker.publish(prices)
+
+        self.cycles += 1
+        self.last_published = len(prices)
+        return len(batches)
+
+    async def _run(self):
+        print(f"[INFO][PricePoller] - Запущен, базовый интервал {self.base_interval}s")
+        while True:
+            try:
+                if not any(True for _ in self.subscriptions()):
+                    break
+
+                batches = await self.poll_once()
+                delay = self._adapt(max(batches, 1))
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    # Новая подписка будит цикл раньше, но не чаще, чем позволяет квота
+                    gap = self._min_interval(batches) - (time.monotonic() - self._last_poll)
+                    if gap > 0:
+                        await asyncio.sleep(gap)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[ERROR][PricePoller] - Ошибка цикла: {e}")
+                await asyncio.sleep(self.interval)
+
+        print("[INFO][PricePoller] - Остановлен")
+
+    def ensure_running(self, new_token: bool = False):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        elif new_token:
+            self._wakeup.set()
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Отдаем аренды сразу, чтобы другой воркер подхватил токены без ожидания TTL
+        await self.broker.release(sorted(set(self.subscriptions())))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": round(self.interval, 1),
+            "batch_size": self.batch_size,
+            "cycles": self.cycles,
+            "upstream_batches": self.upstream_batches,
+            "led_tokens": self.last_tokens,
+            "last_published": self.last_published,
+            "headroom": round(coingecko_gateway.headroom(), 3),
+            "last_error": self.last_error
+        }
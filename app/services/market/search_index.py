@@ -0,0 +1,331 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Any, List, Set, Tuple, Iterable, Iterator
+
+# До этого числа изменений ключи правятся точечно через bisect, дальше — фильтром и слиянием
+_POINT_EDIT_LIMIT = 64
+
+def _normalize(value: Any) -> str:
+    return str(value or '').lower().strip()
+
+def _trigrams(term: str) -> Set[str]:
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+class _Document:
+    __slots__ = ('symbol', 'terms', 'prefixes', 'weight')
+
+    def __init__(self, symbol: str, terms: Tuple[str, ...], weight: float):
+        self.symbol = symbol
+        self.terms = terms
+        self.weight = weight
+        # Префиксный поиск идет и по отдельным словам названия: "bit" найдет "Wrapped Bitcoin"
+        prefixes = set(terms)
+        for term in terms:
+            prefixes.update(term.split())
+        self.prefixes = prefixes
+
+    def signature(self) -> Tuple[str, Tuple[str, ...], float]:
+        return self.symbol, self.terms, self.weight
+
+class _IndexState:
+    """Неизменяемая версия индекса: читатели работают с ней без блокировок, писатель собирает следующую."""
+
+    __slots__ = ('documents', 'symbols', 'trigrams', 'symbol_keys', 'prefix_keys', 'ranked')
+
+    def __init__(self):
+        self.documents: Dict[str, _Document] = {}
+        self.symbols: Dict[str, Set[str]] = {}
+        self.trigrams: Dict[str, Set[str]] = {}
+
+        # Префиксы ищутся бинарным поиском по отсортированным (ключ, doc_id):
+        # компактнее дерева, изменения вливаются в готовый порядок без полной сортировки
+        self.symbol_keys: List[Tuple[str, str]] = []
+        self.prefix_keys: List[Tuple[str, str]] = []
+        self.ranked: List[Tuple[float, str]] = []
+
+    @staticmethod
+    def _keys_with_prefix(keys: List[Tuple[str, str]], query: str) -> Set[str]:
+        start = bisect_left(keys, (query,))
+        end = bisect_left(keys, (query + '\U0010ffff',), start)
+        return {doc_id for _, doc_id in keys[start:end]}
+
+    def _substring_ids(self, query: str) -> Set[str]:
+        postings = []
+        for trigram in _trigrams(query):
+            ids = self.trigrams.get(trigram)
+            if not ids:
+                return set()
+            postings.append(ids)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                break
+
+        # Триграммы дают кандидатов, подстроку проверяем явно
+        return {
+            doc_id for doc_id in candidates
+            if any(query in term for term in self.documents[doc_id].terms)
+        }
+
+    def tiers(self, query: str) -> Iterator[Set[str]]:
+        # Генератор: подстрочный поиск по триграммам считается, только если префиксов не хватило
+        exact = set(self.symbols.get(query, ()))
+        yield exact
+
+        symbol_prefix = self._keys_with_prefix(self.symbol_keys, query) - exact
+        yield symbol_prefix
+
+        term_prefix = self._keys_with_prefix(self.prefix_keys, query) - exact - symbol_prefix
+        yield term_prefix
+
+        if len(query) >= 3:
+            yield self._substring_ids(query) - exact - symbol_prefix - term_prefix
+
+    def rank_key(self, doc_id: str) -> Tuple[float, str]:
+        return -self.documents[doc_id].weight, doc_id
+
+    def top(self, ids: Set[str], limit: int) -> List[str]:
+        if len(ids) <= 256:
+            return sorted(ids, key=self.rank_key)[:limit]
+
+        # Широкие запросы ("b", "to"): идем по общему порядку весов до первых limit совпадений
+        top = []
+        for _, doc_id in self.ranked:
+            if doc_id in ids:
+                top.append(doc_id)
+                if len(top) >= limit:
+                    break
+        return top
+
+class _StateBuilder:
+    """Следующая версия индекса поверх текущей: множества копируются при первой записи, ключи — дельтой."""
+
+    def __init__(self, base: _IndexState):
+        self.base = base
+        self.documents = dict(base.documents)
+        self.symbols = dict(base.symbols)
+        self.trigrams = dict(base.trigrams)
+        # Ключи, чьи множества уже скопированы в этой версии: их можно менять на месте
+        self._copied_symbols: Set[str] = set()
+        self._copied_trigrams: Set[str] = set()
+        self._keys: Dict[str, Tuple[Set[Tuple[Any, ...]], Set[Tuple[Any, ...]]]] = {
+            name: (set(), set()) for name in ('symbol_keys', 'prefix_keys', 'ranked')
+        }
+
+    @staticmethod
+    def _postings_add(postings: Dict[str, Set[str]], copied: Set[str], key: str, doc_id: str):
+        ids = postings.get(key)
+        if ids is None:
+            postings[key] = {doc_id}
+            copied.add(key)
+            return
+        if key not in copied:
+            ids = postings[key] = set(ids)
+            copied.add(key)
+        ids.add(doc_id)
+
+    @staticmethod
+    def _postings_discard(postings: Dict[str, Set[str]], copied: Set[str], key: str, doc_id: str):
+        ids = postings.get(key)
+        if ids is None or doc_id not in ids:
+            return
+        if len(ids) == 1:
+            del postings[key]
+            return
+        if key not in copied:
+            ids = postings[key] = set(ids)
+            copied.add(key)
+        ids.discard(doc_id)
+
+    def _key_add(self, name: str, key: Tuple[Any, ...]):
+        added, removed = self._keys[name]
+        if key in removed:
+            removed.discard(key)
+        else:
+            added.add(key)
+
+    def _key_discard(self, name: str, key: Tuple[Any, ...]):
+        added, removed = self._keys[name]
+        if key in added:
+            added.discard(key)
+        else:
+            removed.add(key)
+
+    def link(self, doc_id: str, document: _Document):
+        self.documents[doc_id] = document
+        self._key_add('ranked', (-document.weight, doc_id))
+
+        if document.symbol:
+            self._postings_add(self.symbols, self._copied_symbols, document.symbol, doc_id)
+            self._key_add('symbol_keys', (document.symbol, doc_id))
+
+        for prefix in document.prefixes:
+            self._key_add('prefix_keys', (prefix, doc_id))
+
+        for term in document.terms:
+            for trigram in _trigrams(term):
+                self._postings_add(self.trigrams, self._copied_trigrams, trigram, doc_id)
+
+    def unlink(self, doc_id: str):
+        document = self.documents.pop(doc_id)
+        self._key_discard('ranked', (-document.weight, doc_id))
+
+        if document.symbol:
+            self._postings_discard(self.symbols, self._copied_symbols, document.symbol, doc_id)
+            self._key_discard('symbol_keys', (document.symbol, doc_id))
+
+        for prefix in document.prefixes:
+            self._key_discard('prefix_keys', (prefix, doc_id))
+
+        for term in document.terms:
+            for trigram in _trigrams(term):
+                self._postings_discard(self.trigrams, self._copied_trigrams, trigram, doc_id)
+
+    @staticmethod
+    def _apply_keys(keys: List[Tuple[Any, ...]], added: Set[Tuple[Any, ...]],
+                    removed: Set[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+        if not added and not removed:
+            return keys
+
+        if len(added) + len(removed) <= _POINT_EDIT_LIMIT:
+            keys = list(keys)
+            for key in removed:
+                del keys[bisect_left(keys, key)]
+            for key in added:
+                insort(keys, key)
+            return keys
+
+        # Крупный пакет: сортируется только дельта, затем один линейный проход слияния
+        if removed:
+            keys = [key for key in keys if key not in removed]
+        return list(heapq.merge(keys, sorted(added))) if added else keys
+
+    def build(self) -> _IndexState:
+        state = _IndexState()
+        state.documents = self.documents
+        state.symbols = self.symbols
+        state.trigrams = self.trigrams
+        for name, (added, removed) in self._keys.items():
+            setattr(state, name, self._apply_keys(getattr(self.base, name), added, removed))
+        return state
+
+class SearchIndex:
+    """Поисковый индекс: точный символ, отсортированные ключи для префиксов и триграммный инвертированный индекс."""
+
+    def __init__(self, name: str):
+        self.name = name
+        # Блокировка только между писателями: поиск читает текущую версию, пока следующая собирается в стороне
+        self._lock = threading.Lock()
+        self._state = _IndexState()
+
+    def __len__(self) -> int:
+        return len(self._state.documents)
+
+    @staticmethod
+    def _document(symbol: Any, terms: Iterable[Any], weight: float) -> _Document:
+        return _Document(
+            _normalize(symbol),
+            tuple(term for term in (_normalize(value) for value in terms) if term),
+            weight
+        )
+
+    def upsert(self, doc_id: str, symbol: Any, terms: Iterable[Any], weight: float = 0.0) -> bool:
+        with self._lock:
+            builder = _StateBuilder(self._state)
+            if not self._upsert(builder, doc_id, self._document(symbol, terms, weight)):
+                return False
+            self._state = builder.build()
+            return True
+
+    def remove(self, doc_id: str) -> bool:
+        with self._lock:
+            if doc_id not in self._state.documents:
+                return False
+            builder = _StateBuilder(self._state)
+            builder.unlink(doc_id)
+            self._state = builder.build()
+            return True
+
+    @staticmethod
+    def _upsert(builder: _StateBuilder, doc_id: str, document: _Document) -> bool:
+        current = builder.documents.get(doc_id)
+        if current is not None:
+            if current.signature() == document.signature():
+                return False
+            builder.unlink(doc_id)
+        builder.link(doc_id, document)
+        return True
+
+    def sync(self, documents: Dict[str, Tuple[Any, Iterable[Any], float]]) -> Dict[str, int]:
+        """Инкрементальная пересборка: трогаем только добавленные, измененные и удаленные документы."""
+        changed = 0
+        removed = 0
+
+        with self._lock:
+            builder = _StateBuilder(self._state)
+            for doc_id in [doc_id for doc_id in builder.documents if doc_id not in documents]:
+                builder.unlink(doc_id)
+                removed += 1
+
+            for doc_id, (symbol, terms, weight) in documents.items():
+                if self._upsert(builder, doc_id, self._document(symbol, terms, weight)):
+                    changed += 1
+
+            # Атомарная подмена: читатели видят либо старую, либо новую версию целиком
+            if changed or removed:
+                self._state = builder.build()
+
+        return {"documents": len(builder.documents), "changed": changed, "removed": removed}
+
+    def matches(self, query: str) -> Set[str]:
+        query = _normalize(query)
+        if not query:
+            return set()
+
+        return set().union(*self._state.tiers(query))
+
+    def search(self, query: str, limit: int = 20) -> List[str]:
+        """Ранжирование: точный символ, префикс символа, префикс названия/слова, подстрока; внутри — вес."""
+        query = _normalize(query)
+        if not query or limit <= 0:
+            return []
+
+        state = self._state
+        results = []
+        for tier in state.tiers(query):
+            if tier:
+                results.extend(state.top(tier, limit - len(results)))
+            if len(results) >= limit:
+                break
+        return results
+
+    def fuzzy(self, query: str, limit: int = 20, min_similarity: float = 0.5) -> List[str]:
+        """Нечеткий поиск по доле общих триграмм: находит опечатки вроде "etherum"."""
+        query_trigrams = _trigrams(_normalize(query))
+        if not query_trigrams or limit <= 0:
+            return []
+
+        state = self._state
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(state.trigrams.get(trigram, ()))
+
+        threshold = len(query_trigrams) * min_similarity
+        candidates = [doc_id for doc_id, count in shared.items() if count >= threshold]
+        candidates.sort(key=lambda doc_id: (-shared[doc_id],) + state.rank_key(doc_id))
+        return candidates[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            "name": self.name,
+            "documents": len(state.documents),
+            "symbols": len(state.symbols),
+            "prefix_keys": len(state.prefix_keys),
+            "trigrams": len(state.trigrams)
+        }
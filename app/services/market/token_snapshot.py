@@ -0,0 +1,164 @@
+import asyncio
+import time
+from typing import Dict, Any, Optional, List, Tuple
+
+from app.core.security.config import settings
+from app.core.database.aio import run_in_db_executor
+from app.services.market.token_sort import TokenSortIndex
+from app.services.market.search_index import SearchIndex
+from app.services.market.utils import safe_float
+
+class TokenSnapshot:
+    def __init__(self, version: int, stats: List[Dict[str, Any]], tokens_by_symbol: Dict[str, Dict[str, Any]],
+                 exchanges: Optional[List[Tuple[Dict[str, Any], Dict[str, Any]]]] = None,
+                 stats_by_coingecko_id: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.version = version
+        self.built_at = time.time()
+        self.stats = stats
+        self.tokens_by_symbol = tokens_by_symbol
+        self.exchanges = exchanges or []
+        self.stats_by_symbol: Dict[str, Dict[str, Any]] = {}
+        # Полный индекс по coingecko_id приходит из загрузки: stats уже схлопнуты по символу
+        self.stats_by_coingecko_id: Dict[str, Dict[str, Any]] = dict(stats_by_coingecko_id or {})
+        self.positions_by_symbol: Dict[str, int] = {}
+        self.exchanges_by_id: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+
+        for position, stat in enumerate(stats):
+            symbol = str(stat.get('symbol', '')).upper()
+            if symbol:
+                self.stats_by_symbol.setdefault(symbol, stat)
+                self.positions_by_symbol.setdefault(symbol, position)
+            coingecko_id = str(stat.get('coingecko_id') or '').lower()
+            if coingecko_id:
+                self.stats_by_coingecko_id.setdefault(coingecko_id, stat)
+
+        for exchange, exchange_stats in self.exchanges:
+            self.exchanges_by_id[self.exchange_id(exchange)] = (exchange, exchange_stats)
+
+        self.sort_index = TokenSortIndex(stats)
+
+    @staticmethod
+    def exchange_id(exchange: Dict[str, Any]) -> str:
+        return str(exchange.get('id') or exchange.get('coingecko_id') or exchange.get('name', ''))
+
+    def token_documents(self) -> Dict[str, Tuple[Any, List[Any], float]]:
+        market_caps = self.sort_index.table.columns['market_cap']
+        documents = {}
+        for symbol, position in self.positions_by_symbol.items():
+            stat = self.stats[position]
+            documents[symbol] = (
+                symbol,
+                [symbol, stat.get('coin_name'), stat.get('coingecko_id')],
+                float(market_caps[position])
+            )
+        return documents
+
+    def exchange_documents(self) -> Dict[str, Tuple[Any, List[Any], float]]:
+        return {
+            exchange_id: (
+                exchange.get('coingecko_id'),
+                [exchange.get('name'), exchange.get('coingecko_id')],
+                safe_float(exchange_stats.get('trading_volume_24h'))
+            )
+            for exchange_id, (exchange, exchange_stats) in self.exchanges_by_id.items()
+        }
+
+    def get_by_symbol(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self.stats_by_symbol.get(symbol.upper())
+
+    def get_by_coingecko_id(self, coingecko_id: str) -> Optional[Dict[str, Any]]:
+        return self.stats_by_coingecko_id.get(coingecko_id.lower())
+
+    def get_token(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self.tokens_by_symbol.get(symbol.upper())
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.built_at
+
+class TokenSnapshotService:
+    def __init__(self):
+        self.refresh_interval = settings.TOKEN_SNAPSHOT_REFRESH_SECONDS
+        self._snapshot: Optional[TokenSnapshot] = None
+        self._version = 0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._cold_start: Optional[asyncio.Task] = None
+        self.token_index = SearchIndex("tokens")
+        self.exchange_index = SearchIndex("exchanges")
+
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.last_refresh_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_index_sync: Dict[str, Any] = {}
+
+    def get(self) -> Optional[TokenSnapshot]:
+        return self._snapshot
+
+    async def ensure(self) -> Optional[TokenSnapshot]:
+        """Снимок для запроса: до первой сборки все конкурентные запросы ждут одну общую."""
+        if self._snapshot is not None:
+            return self._snapshot
+
+        if self._cold_start is None or self._cold_start.done():
+            self._cold_start = asyncio.create_task(self.refresh())
+        return await asyncio.shield(self._cold_start)
+
+    def _build(self) -> TokenSnapshot:
+        from app.services.market.market_service import market_service
+
+        stats, tokens_by_symbol, stats_by_coingecko_id = market_service.load_token_universe()
+        exchanges = market_service.load_exchange_universe()
+        snapshot = TokenSnapshot(self._version + 1, stats, tokens_by_symbol, exchanges, stats_by_coingecko_id)
+
+        # Индексы обновляются до подмены снимка; лишние совпадения отсеиваются по снимку
+        self.last_index_sync = {
+            "tokens": self.token_index.sync(snapshot.token_documents()),
+            "exchanges": self.exchange_index.sync(snapshot.exchange_documents())
+        }
+        return snapshot
+
+    async def refresh(self) -> Optional[TokenSnapshot]:
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+
+        async with self._refresh_lock:
+            started = time.perf_counter()
+            try:
+                snapshot = await run_in_db_executor(self._build)
+            except Exception as e:
+                self.failure_count += 1
+                self.last_error = str(e)
+                print(f"[ERROR][TokenSnapshot] - Ошибка обновления снимка: {e}")
+                return self._snapshot
+
+            # Атомарная замена: читатели видят либо старый, либо новый снимок целиком
+            self._snapshot = snapshot
+            self._version = snapshot.version
+            self.refresh_count += 1
+            self.last_error = None
+            self.last_refresh_ms = (time.perf_counter() - started) * 1000
+            print(f"[INFO][TokenSnapshot] - Снимок v{snapshot.version}: {len(snapshot.stats)} токенов за {self.last_refresh_ms:.0f}ms")
+            return snapshot
+
+    def metrics(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        age = snapshot.age_seconds if snapshot else None
+
+        return {
+            "version": snapshot.version if snapshot else 0,
+            "tokens": len(snapshot.stats) if snapshot else 0,
+            "built_at": snapshot.built_at if snapshot else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "refresh_interval_seconds": self.refresh_interval,
+            "is_stale": age is None or age > self.refresh_interval * 2,
+            "refresh_count": self.refresh_count,
+            "failure_count": self.failure_count,
+            "last_refresh_ms": round(self.last_refresh_ms, 1) if self.last_refresh_ms is not None else None,
+            "last_error": self.last_error,
+            "exchanges": len(snapshot.exchanges) if snapshot else 0,
+            "search_indexes": [self.token_index.stats(), self.exchange_index.stats()],
+            "last_index_sync": self.last_index_sync
+        }
+
+token_snapshot_service = TokenSnapshotService()
@@ -0,0 +1,42 @@
+from typing import Dict, Any, List, Optional, Iterable
+
+import numpy as np
+
+from app.services.market.token_table import TokenTable
+
+SORT_MODES = (
+    "market_cap", "volume", "price", "price_change_24h", "price_change_7d",
+    "halal", "layer1", "stablecoin", "defi", "meme", "category", "alphabetical"
+)
+DEFAULT_SORT = "default"
+
+class TokenSortIndex:
+    """Порядки сортировки, посчитанные один раз на набор данных: страница = срез массива индексов."""
+
+    def __init__(self, stats: List[Dict[str, Any]], precompute: bool = True):
+        self.stats = stats
+        self.size = len(stats)
+        self.table = TokenTable(stats)
+
+        self._orders: Dict[str, np.ndarray] = {}
+        if precompute:
+            for mode in SORT_MODES + (DEFAULT_SORT,):
+                self._orders[mode] = self.table.argsort(mode)
+
+    def order(self, sort: Optional[str]) -> np.ndarray:
+        mode = sort if sort in SORT_MODES else DEFAULT_SORT
+        order = self._orders.get(mode)
+        if order is None:
+            order = self._orders[mode] = self.table.argsort(mode)
+        return order
+
+    def page(self, sort: Optional[str], start: int, end: int) -> List[Dict[str, Any]]:
+        return [self.stats[i] for i in self.order(sort)[start:end].tolist()]
+
+    def sorted(self, sort: Optional[str], positions: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        order = self.order(sort)
+        if positions is not None:
+            selected = np.zeros(self.size, dtype=np.bool_)
+            selected[np.fromiter(positions, dtype=np.intp)] = True
+            order = order[selected[order]]
+        return [self.stats[i] for i in order.tolist()]
@@ -0,0 +1,96 @@
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from app.services.market.utils import safe_float, safe_bool, get_token_category
+
+CATEGORY_NAMES = ("layer1", "stablecoin", "defi", "layer2", "meme", "other")
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORY_NAMES)}
+
+NUMERIC_FIELDS = {
+    'price': 'price',
+    'market_cap': 'market_cap',
+    'volume_24h': 'trading_volume_24h',
+    'change_24h': 'volume_24h_change_24h',
+    'change_7d': 'price_change_7d',
+}
+
+class TokenTable:
+    """Колоночное хранилище статистики токенов: числа в NumPy-массивах, символы и категории — коды."""
+
+    def __init__(self, stats: List[Dict[str, Any]]):
+        self.size = len(stats)
+
+        self.columns: Dict[str, np.ndarray] = {}
+        for column, field in NUMERIC_FIELDS.items():
+            self.columns[column] = np.fromiter(
+                (safe_float(stat.get(field)) for stat in stats), dtype=np.float64, count=self.size
+            )
+
+        self.rank = np.fromiter(
+            (self._parse_rank(stat.get('market_cap_rank')) for stat in stats), dtype=np.int64, count=self.size
+        )
+        self.is_halal = np.fromiter(
+            (safe_bool(stat.get('is_halal'), False) for stat in stats), dtype=np.bool_, count=self.size
+        )
+        self.category = np.fromiter(
+            (CATEGORY_CODES[get_token_category(stat)] for stat in stats), dtype=np.int8, count=self.size
+        )
+
+        # Символы интернируются: строка хранится один раз, в таблице — код
+        self.symbols: List[str] = []
+        self.symbol_codes: Dict[str, int] = {}
+        codes = []
+        for stat in stats:
+            symbol = str(stat.get('symbol', '')).upper()
+            code = self.symbol_codes.get(symbol)
+            if code is None:
+                code = self.symbol_codes[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            codes.append(code)
+        self.symbol = np.asarray(codes, dtype=np.int32)
+        self._symbol_sort_rank = self._build_symbol_rank()
+
+    @staticmethod
+    def _parse_rank(value: Any) -> int:
+        if not value:
+            return 0
+        number = safe_float(value, None)
+        return int(number) if number is not None else 999999
+
+    def _build_symbol_rank(self) -> np.ndarray:
+        order = sorted(range(len(self.symbols)), key=self.symbols.__getitem__)
+        rank = np.empty(len(self.symbols), dtype=np.int32)
+        rank[order] = np.arange(len(self.symbols), dtype=np.int32)
+        return rank[self.symbol] if self.size else np.empty(0, dtype=np.int32)
+
+    def argsort(self, mode: Optional[str]) -> np.ndarray:
+        # np.argsort(kind='stable') и np.lexsort сохраняют исходный порядок при равных ключах,
+        # как sorted(..., reverse=True) по спискам словарей
+        market_cap = self.columns['market_cap']
+
+        if mode == "market_cap":
+            return np.argsort(-market_cap, kind='stable')
+        elif mode == "volume":
+            return np.argsort(-self.columns['volume_24h'], kind='stable')
+        elif mode == "price":
+            return np.argsort(-self.columns['price'], kind='stable')
+        elif mode == "price_change_24h":
+            return np.argsort(-self.columns['change_24h'], kind='stable')
+        elif mode == "price_change_7d":
+            return np.argsort(-self.columns['change_7d'], kind='stable')
+        elif mode == "halal":
+            return np.lexsort((-market_cap, ~self.is_halal))
+        elif mode in ("layer1", "stablecoin", "defi", "meme"):
+            return np.lexsort((-market_cap, self.category != CATEGORY_CODES[mode]))
+        elif mode == "category":
+            return np.lexsort((-market_cap, self.category))
+        elif mode == "alphabetical":
+            return np.argsort(self._symbol_sort_rank, kind='stable')
+        else:
+            return np.lexsort((-market_cap, self.rank))
+
+    @property
+    def nbytes(self) -> int:
+        arrays = list(self.columns.values()) + [self.rank, self.is_halal, self.category, self.symbol, self._symbol_sort_rank]
+        return sum(array.nbytes for array in arrays)
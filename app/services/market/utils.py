@@ -1,23 +1,91 @@
+import hashlib
+import json
 import random
-from typing import Any, List
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, List
 from collections import defaultdict
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_dumps(value: Any) -> str:
+    """Быстрая сериализация для горячих путей (WebSocket): orjson, если установлен, иначе stdlib."""
+    if orjson is not None:
+        return orjson.dumps(value).decode('utf-8')
+    return json.dumps(value, separators=(',', ':'))
+
 def safe_float(value, default=0.0):
     try:
         if value is None:
             return default
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            return float(value)
         return float(str(value).replace(',', ''))
     except:
         return default
 
 def safe_int(value, default=0):
     try:
-        if value is None:
-            return default
-        return int(safe_float(value))
+        number = safe_float(value, None)
+        return int(number) if number is not None else default
     except:
         return default
 
+# Ключ записи token stats выводится из coingecko_id: повторная запись той же монеты попадает в ту же строку
+TOKEN_STATS_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://api.coingecko.com/api/v3/coins")
+HASH_IGNORED_FIELDS = ('id', 'created_at', 'updated_at', 'content_hash')
+
+def token_stats_id(coingecko_id: str) -> str:
+    return str(uuid.uuid5(TOKEN_STATS_NAMESPACE, str(coingecko_id).lower()))
+
+def content_hash(item: Dict[str, Any]) -> str:
+    """Хэш содержимого без служебных полей: одинаковые данные дают одинаковый хэш независимо от времени записи."""
+    payload = {field: value for field, value in item.items() if field not in HASH_IGNORED_FIELDS}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+def safe_decimal(value, default=0):
+    try:
+        if value is None:
+            return Decimal(str(default))
+        return Decimal(str(value))
+    except (ValueError, TypeError):
+        return Decimal(str(default))
+
+STABLECOIN_SYMBOLS = {'USDT', 'USDC', 'DAI', 'BUSD', 'FRAX', 'TUSD', 'FDUSD'}
+LAYER1_SYMBOLS = {'BTC', 'ETH', 'BNB', 'ADA', 'SOL', 'AVAX', 'MATIC', 'DOT', 'ATOM', 'NEAR', 'FTM'}
+LAYER2_SYMBOLS = {'ARB', 'OP', 'MATIC'}
+DEFI_KEYWORDS = ('defi', 'swap', 'finance', 'lending', 'protocol')
+MEME_KEYWORDS = ('meme', 'doge', 'shib', 'pepe', 'floki')
+
+def get_token_category(token_stat: Dict[str, Any]) -> str:
+    symbol = str(token_stat.get('symbol', '')).upper()
+    name = str(token_stat.get('coin_name', '')).lower()
+
+    if symbol in STABLECOIN_SYMBOLS:
+        return "stablecoin"
+    elif symbol in LAYER1_SYMBOLS:
+        return "layer1"
+    elif 'layer' in name or 'l2' in name or symbol in LAYER2_SYMBOLS:
+        return "layer2"
+    elif any(word in name for word in DEFI_KEYWORDS):
+        return "defi"
+    elif any(word in name for word in MEME_KEYWORDS):
+        return "meme"
+    else:
+        return "other"
+
+def safe_bool(value, default=False):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.lower() in ('true', '1', 'yes')
+    return bool(value)
+
 def generate_random_sparkline(points: int = 30) -> List[float]:
     base_price = random.uniform(0.1, 100)
     sparkline = []
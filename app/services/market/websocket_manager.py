@@ -1,89 +1,253 @@
 import asyncio
 import json
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Any, Optional, Iterable, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
 import time
 
-from .coingecko_service import coingecko_service
+from app.core.security.config import settings
+from .price_broker import price_broker
+from .price_history import price_history
+from .price_poller import PricePoller
+from .utils import json_dumps
+from .ws_client import ClientConnection
+
+DELTA_IGNORED_FIELDS = ("token_id", "timestamp")
+BATCH_KEY = "price_batch"
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, broker=None):
+        # Обратный индекс token -> сокеты; подписки сокета лежат в ClientConnection.tokens
         self.active_connections: Dict[str, Set[WebSocket]] = {}
-        self.connection_tokens: Dict[WebSocket, str] = {}
-        self.update_tasks: Dict[str, asyncio.Task] = {}
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.last_prices: Dict[str, Dict[str, Any]] = {}
+        self.broker = broker or price_broker
+        self.broker.set_handler(self._publish_prices)
+        self.poller = PricePoller(self.active_connections.keys, self.broker)
+        self.max_subscriptions = settings.WS_MAX_SUBSCRIPTIONS
         
+        self.ticks_skipped = 0
+        self.messages_serialized = 0
+        self.frames_built = 0
+    
+    def _register(self, websocket: WebSocket, multiplexed: bool) -> ClientConnection:
+        client = ClientConnection(websocket, lambda _: self.disconnect(websocket), multiplexed)
+        client.start()
+        self.clients[websocket] = client
+        return client
+    
     async def connect(self, websocket: WebSocket, token_id: str):
         await websocket.accept()
+        self._register(websocket, multiplexed=False)
+        self.subscribe(websocket, [token_id])
         
-        if token_id not in self.active_connections:
-            self.active_connections[token_id] = set()
+        print(f"[INFO][WebSocket] - New connection for {token_id}, total: {len(self.active_connections[token_id])}")
+    
+    async def connect_multiplexed(self, websocket: WebSocket):
+        await websocket.accept()
+        self._register(websocket, multiplexed=True)
         
-        self.active_connections[token_id].add(websocket)
-        self.connection_tokens[websocket] = token_id
+        print(f"[INFO][WebSocket] - New multiplexed connection, total: {len(self.clients)}")
+    
+    def subscribe(self, websocket: WebSocket, token_ids: Iterable[str]) -> List[str]:
+        client = self.clients.get(websocket)
+        if client is None:
+            return []
         
-        if token_id not in self.update_tasks:
-            self.update_tasks[token_id] = asyncio.create_task(
-                self._price_update_loop(token_id)
-            )
+        added = []
+        new_token = False
+        for token_id in token_ids:
+            token_id = str(token_id).strip()
+            if not token_id or token_id in client.tokens:
+                continue
+            if len(client.tokens) >= self.max_subscriptions:
+                break
+            
+            if token_id not in self.active_connections:
+                self.active_connections[token_id] = set()
+                new_token = True
+            self.active_connections[token_id].add(websocket)
+            client.tokens.add(token_id)
+            added.append(token_id)
         
-        print(f"[INFO][WebSocket] - New connection for {token_id}, total: {len(self.active_connections[token_id])}")
+        # Дельты имеют смысл только поверх полного состояния: новый подписчик сразу получает последнее известное,
+        # в том числе из истории тиков, если токен недавно опрашивался
+        for token_id in added:
+            if token_id not in self.last_prices:
+                latest = price_history.latest(token_id, settings.PRICE_POLLER_MAX_INTERVAL_SECONDS)
+                if latest is not None:
+                    self.last_prices[token_id] = latest
+        
+        known = [token_id for token_id in added if token_id in self.last_prices]
+        if known:
+            if client.multiplexed:
+                client.enqueue(
+                    self._snapshot_frame(known),
+                    key=BATCH_KEY,
+                    replacement=lambda: self._snapshot_frame(client.tokens)
+                )
+            else:
+                for token_id in known:
+                    client.enqueue(self._serialize("price_update", self.last_prices[token_id]), key=token_id)
+        
+        if added:
+            self.poller.ensure_running(new_token)
+        return added
     
-    def disconnect(self, websocket: WebSocket):
-        token_id = self.connection_tokens.get(websocket)
-        if token_id and token_id in self.active_connections:
-            self.active_connections[token_id].discard(websocket)
+    def unsubscribe(self, websocket: WebSocket, token_ids: Iterable[str]) -> List[str]:
+        client = self.clients.get(websocket)
+        if client is None:
+            return []
+        
+        removed = []
+        released = []
+        for token_id in token_ids:
+            token_id = str(token_id).strip()
+            if token_id not in client.tokens:
+                continue
+            
+            client.tokens.discard(token_id)
+            removed.append(token_id)
             
-            if not self.active_connections[token_id]:
-                del self.active_connections[token_id]
-                if token_id in self.update_tasks:
-                    self.update_tasks[token_id].cancel()
-                    del self.update_tasks[token_id]
-                print(f"[INFO][WebSocket] - No more connections for {token_id}, stopped updates")
+            subscribers = self.active_connections.get(token_id)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self.active_connections[token_id]
+                    self.last_prices.pop(token_id, None)
+                    released.append(token_id)
+                    print(f"[INFO][WebSocket] - No more connections for {token_id}, stopped updates")
         
-        if websocket in self.connection_tokens:
-            del self.connection_tokens[websocket]
+        if released:
+            asyncio.create_task(self.broker.release(released))
+        return removed
+    
+    def subscriptions(self, websocket: WebSocket) -> List[str]:
+        client = self.clients.get(websocket)
+        return sorted(client.tokens) if client else []
+    
+    def disconnect(self, websocket: WebSocket):
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        
+        self.unsubscribe(websocket, list(client.tokens))
+        del self.clients[websocket]
+        client.close()
     
     async def send_personal_message(self, message: str, websocket: WebSocket):
-        try:
-            await websocket.send_text(message)
-        except Exception as e:
-            print(f"[ERROR][WebSocket] - Failed to send message: {e}")
+        client = self.clients.get(websocket)
+        if client is None or not client.enqueue(message):
+            print(f"[ERROR][WebSocket] - Failed to send message: connection closed")
+    
+    def _serialize(self, message_type: str, data: Dict[str, Any]) -> str:
+        self.messages_serialized += 1
+        return json_dumps({"type": message_type, "data": data})
+    
+    def _frame(self, messages: List[str]) -> str:
+        # Кадр склеивается из уже сериализованных сообщений токенов, без повторного json
+        self.frames_built += 1
+        return '{"type":"%s","updates":[%s]}' % (BATCH_KEY, ",".join(messages))
+    
+    def _snapshot_frame(self, token_ids: Iterable[str]) -> str:
+        return self._frame([
+            self._serialize("price_update", self.last_prices[token_id])
+            for token_id in sorted(token_ids) if token_id in self.last_prices
+        ])
+    
+    async def broadcast_to_token(self, token_id: str, message: str, replacement: Optional[str] = None):
+        # Только постановка в очереди клиентов: отправкой занимаются их писатели параллельно
+        for websocket in list(self.active_connections.get(token_id, ())):
+            client = self.clients.get(websocket)
+            if client is not None:
+                client.enqueue(message, key=token_id, replacement=replacement)
+    
+    @staticmethod
+    def _price_delta(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            field: value for field, value in current.items()
+            if field not in DELTA_IGNORED_FIELDS and previous.get(field) != value
+        }
     
-    async def broadcast_to_token(self, token_id: str, message: str):
-        if token_id not in self.active_connections:
+    def _token_messages(self, prices: Dict[str, Dict[str, Any]]) -> Dict[str, Tuple[str, str]]:
+        messages = {}
+        for token_id, price_data in prices.items():
+            if token_id not in self.active_connections:
+                continue
+            
+            previous = self.last_prices.get(token_id)
+            self.last_prices[token_id] = price_data
+            
+            if previous is None:
+                full_message = self._serialize("price_update", price_data)
+                messages[token_id] = (full_message, full_message)
+                continue
+            
+            changes = self._price_delta(previous, price_data)
+            if not changes:
+                self.ticks_skipped += 1
+                continue
+            
+            full_message = self._serialize("price_update", price_data)
+            # Сериализуем один раз на тик, одна и та же строка уходит всем подписчикам
+            delta_message = self._serialize("price_delta", {
+                "token_id": token_id,
+                "timestamp": price_data.get("timestamp"),
+                **changes
+            })
+            messages[token_id] = (delta_message, full_message)
+        return messages
+    
+    async def _publish_prices(self, prices: Dict[str, Dict[str, Any]]):
+        price_history.record(prices)
+        messages = self._token_messages(prices)
+        if not messages:
             return
         
-        disconnected = []
-        for connection in self.active_connections[token_id].copy():
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                print(f"[ERROR][WebSocket] - Connection failed, removing: {e}")
-                disconnected.append(connection)
+        multiplexed: Set[WebSocket] = set()
+        for token_id, (message, full_message) in messages.items():
+            for websocket in self.active_connections.get(token_id, ()):
+                client = self.clients.get(websocket)
+                if client is None:
+                    continue
+                if client.multiplexed:
+                    multiplexed.add(websocket)
+                else:
+                    client.enqueue(message, key=token_id, replacement=full_message)
         
-        for connection in disconnected:
-            self.disconnect(connection)
-    
-    async def _price_update_loop(self, token_id: str):
-        while token_id in self.active_connections and self.active_connections[token_id]:
-            try:
-                price_data = await coingecko_service.get_token_current_price(token_id)
-                
-                if price_data:
-                    message = {
-                        "type": "price_update",
-                        "data": price_data
-                    }
-                    await self.broadcast_to_token(token_id, json.dumps(message))
-                
-                await asyncio.sleep(30)
-                
-            except asyncio.CancelledError:
-                print(f"[INFO][WebSocket] - Price update loop cancelled for {token_id}")
-                break
-            except Exception as e:
-                print(f"[ERROR][WebSocket] - Error in price update loop for {token_id}: {e}")
-                await asyncio.sleep(60)
+        # Одинаковые наборы подписок получают один и тот же кадр
+        frames: Dict[Tuple[str, ...], str] = {}
+        for websocket in multiplexed:
+            client = self.clients[websocket]
+            changed = tuple(sorted(token_id for token_id in client.tokens if token_id in messages))
+            frame = frames.get(changed)
+            if frame is None:
+                frame = frames[changed] = self._frame([messages[token_id][0] for token_id in changed])
+            client.enqueue(frame, key=BATCH_KEY, replacement=lambda client=client: self._snapshot_frame(client.tokens))
+    
+    def metrics(self) -> Dict[str, Any]:
+        pending = sent = coalesced = dropped = multiplexed = subscriptions = 0
+        for client in self.clients.values():
+            stats = client.stats()
+            pending += stats["pending"]
+            sent += stats["sent"]
+            coalesced += stats["coalesced"]
+            dropped += stats["dropped"]
+            multiplexed += client.multiplexed
+            subscriptions += len(client.tokens)
+        
+        return {
+            "connections": len(self.clients),
+            "multiplexed_connections": multiplexed,
+            "subscriptions": subscriptions,
+            "subscribed_tokens": len(self.active_connections),
+            "messages_serialized": self.messages_serialized,
+            "frames_built": self.frames_built,
+            "ticks_skipped": self.ticks_skipped,
+            "pending": pending,
+            "sent": sent,
+            "coalesced": coalesced,
+            "dropped": dropped
+        }
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -0,0 +1,114 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Set, Union
+
+from fastapi import WebSocket
+
+from app.core.security.config import settings
+
+class ClientConnection:
+    """Сокет клиента с собственной ограниченной очередью и писателем: медленный клиент не тормозит остальных."""
+
+    def __init__(self, websocket: WebSocket, on_close: Callable[["ClientConnection"], None], multiplexed: bool = False):
+        self.websocket = websocket
+        self.on_close = on_close
+        # Мультиплексный клиент подписан на набор токенов и получает один кадр на тик
+        self.multiplexed = multiplexed
+        self.tokens: Set[str] = set()
+        self.max_queue = settings.WS_SEND_QUEUE_SIZE
+        self.send_timeout = settings.WS_SEND_TIMEOUT_SECONDS
+
+        # key -> сообщение; сообщения без ключа получают уникальный ключ и не схлопываются
+        self._pending: "OrderedDict[Any, str]" = OrderedDict()
+        # Ключи, чья дельта была выброшена при переполнении: следующее сообщение по ним уходит полным состоянием
+        self._stale_keys: Set[Any] = set()
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._sequence = 0
+        self.closed = False
+
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, message: str, key: Optional[str] = None,
+                replacement: Union[str, Callable[[], str], None] = None) -> bool:
+        """Не блокирует. Если по key уже ждет сообщение, оно заменяется на replacement (полное состояние)."""
+        if self.closed:
+            return False
+
+        if key is not None and key in self._pending:
+            # Неотправленная дельта устарела: вместо двух дельт клиент получит одно полное состояние
+            if callable(replacement):
+                replacement = replacement()
+            self._pending[key] = replacement or message
+            self.coalesced += 1
+            return True
+
+        if key is not None and key in self._stale_keys:
+            # Предыдущая дельта по ключу потеряна, эта без нее не применится
+            self._stale_keys.discard(key)
+            if callable(replacement):
+                replacement = replacement()
+            message = replacement or message
+
+        if len(self._pending) >= self.max_queue:
+            self._evict()
+
+        if key is None:
+            self._sequence += 1
+            key = ('message', self._sequence)
+
+        self._pending[key] = message
+        self._ready.set()
+        return True
+
+    def _evict(self):
+        # Сначала выбрасываем самое старое сообщение без ключа: потеря ключевой дельты ломает состояние клиента
+        for pending_key in self._pending:
+            if isinstance(pending_key, tuple) and pending_key[0] == 'message':
+                del self._pending[pending_key]
+                break
+        else:
+            pending_key, _ = self._pending.popitem(last=False)
+            self._stale_keys.add(pending_key)
+        self.dropped += 1
+
+    async def _write_loop(self):
+        try:
+            while not self.closed:
+                if not self._pending:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                _, message = self._pending.popitem(last=False)
+                await asyncio.wait_for(self.websocket.send_text(message), timeout=self.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            print(f"[ERROR][WebSocket] - Connection failed, removing: {e or type(e).__name__}")
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+
+        self.closed = True
+        self._pending.clear()
+        self._stale_keys.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        self.on_close(self)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped
+        }
@@ -0,0 +1,249 @@
+import asyncio
+import os
+import random
+import socket
+import time
+import uuid
+from typing import Dict, Any, Optional, Callable, Awaitable, Set
+
+from boto3.dynamodb.conditions import Attr
+
+from app.core.security.config import settings
+from app.core.database.repositories.generic import GenericRepository
+
+JobFunc = Callable[[], Awaitable[Any]]
+
+class ScheduledJob:
+    def __init__(self, name: str, func: JobFunc, interval: float, jitter: float, max_concurrency: int,
+                 lease: bool, timeout: Optional[float], run_on_start: bool):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        # lease=False для заданий, которые обновляют состояние своего процесса: их должен выполнять каждый воркер
+        self.lease = lease
+        self.lease_seconds = interval * (1 + jitter) + (timeout or 0)
+        self.timeout = timeout
+        self.run_on_start = run_on_start
+
+        self.running = 0
+        self.leader: Optional[bool] = None
+        self.next_run_at: Optional[float] = None
+
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped_busy = 0
+        self.skipped_lease = 0
+        self.last_started_at: Optional[float] = None
+        self.last_duration_ms: Optional[float] = None
+        self.max_duration_ms = 0.0
+        self.total_duration_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def next_delay(self) -> float:
+        # Разброс интервала, чтобы воркеры и задания не просыпались одновременно
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + random.uniform(-spread, spread))
+
+    def first_delay(self) -> float:
+        return 0.0 if self.run_on_start else self.next_delay()
+
+    def record(self, duration_ms: float, error: Optional[str]):
+        self.last_duration_ms = duration_ms
+        self.max_duration_ms = max(self.max_duration_ms, duration_ms)
+        self.total_duration_ms += duration_ms
+        self.last_error = error
+        if error is None:
+            self.runs += 1
+        else:
+            self.failures += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        completed = self.runs + self.failures
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval,
+            "jitter": self.jitter,
+            "lease": self.lease,
+            "leader": self.leader,
+            "max_concurrency": self.max_concurrency,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "skipped_busy": self.skipped_busy,
+            "skipped_lease": self.skipped_lease,
+            "last_started_at": self.last_started_at,
+            "last_duration_ms": round(self.last_duration_ms, 1) if self.last_duration_ms is not None else None,
+            "avg_duration_ms": round(self.total_duration_ms / completed, 1) if completed else None,
+            "max_duration_ms": round(self.max_duration_ms, 1),
+            "next_run_in_seconds": round(max(0.0, self.next_run_at - time.time()), 1) if self.next_run_at else None,
+            "last_error": self.last_error
+        }
+
+class Scheduler:
+    """Периодические задания внутри приложения: разброс интервалов, лимиты параллельности и аренда на воркер."""
+
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease_table = settings.SCHEDULER_LEASE_TABLE
+        self.jitter = settings.SCHEDULER_JITTER_RATIO
+        self.max_concurrent = settings.SCHEDULER_MAX_CONCURRENT_JOBS
+        self.job_timeout = settings.SCHEDULER_JOB_TIMEOUT_SECONDS
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loops: Dict[str, asyncio.Task] = {}
+        self._runs: Set[asyncio.Task] = set()
+        self.lease_degraded = False
+
+    def register(self, name: str, func: JobFunc, interval: float, max_concurrency: int = 1, lease: bool = True,
+                 timeout: Optional[float] = None, run_on_start: bool = True) -> ScheduledJob:
+        job = ScheduledJob(
+            name, func, interval, self.jitter, max_concurrency, lease,
+            timeout or self.job_timeout, run_on_start
+        )
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        for name, job in self.jobs.items():
+            loop = self._loops.get(name)
+            if loop is None or loop.done():
+                self._loops[name] = asyncio.create_task(self._job_loop(job))
+
+        print(f"[INFO][Scheduler] - Запущено заданий: {len(self._loops)}, воркер {self.owner_id}")
+
+    async def stop(self):
+        tasks = list(self._loops.values()) + list(self._runs)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops.clear()
+        self._runs.clear()
+
+    async def _job_loop(self, job: ScheduledJob):
+        delay = job.first_delay()
+        while True:
+            try:
+                job.next_run_at = time.time() + delay
+                await asyncio.sleep(delay)
+                self.trigger(job.name)
+                delay = job.next_delay()
+            except asyncio.CancelledError:
+                break
+
+    def trigger(self, name: str) -> bool:
+        """Запускает задание вне расписания; False, если достигнут его лимит параллельности."""
+        job = self.jobs[name]
+        if job.running >= job.max_concurrency:
+            job.skipped_busy += 1
+            return False
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        job.running += 1
+        task = asyncio.create_task(self._run(job))
+        self._runs.add(task)
+        task.add_done_callback(self._runs.discard)
+        return True
+
+    async def _acquire_lease(self, job: ScheduledJob) -> bool:
+        now = int(time.time())
+        lease = {
+            'id': f"job:{job.name}",
+            'job': job.name,
+            'owner': self.owner_id,
+            'expires_at': now + int(job.lease_seconds)
+        }
+        # Владелец продлевает свою аренду на каждом запуске, остальные ждут ее истечения
+        condition = Attr('id').not_exists() | Attr('expires_at').lt(now) | Attr('owner').eq(self.owner_id)
+        try:
+            acquired = await GenericRepository(self.lease_table).aio.create_if(lease, condition)
+        except Exception as e:
+            # Без хранилища аренд задание выполняется локально: лучше повтор, чем пропуск
+            if not self.lease_degraded:
+                print(f"[ERROR][Scheduler] - Аренда недоступна, задания выполняются на каждом воркере: {e}")
+            self.lease_degraded = True
+            return True
+
+        if self.lease_degraded:
+            print("[INFO][Scheduler] - Аренда снова доступна")
+            self.lease_degraded = False
+        return acquired
+
+    async def _run(self, job: ScheduledJob):
+        try:
+            if job.lease:
+                job.leader = await self._acquire_lease(job)
+                if not job.leader:
+                    job.skipped_lease += 1
+                    return
+
+            async with self._semaphore:
+                job.last_started_at = time.time()
+                started = time.perf_counter()
+                error = None
+                try:
+                    await asyncio.wait_for(job.func(), timeout=job.timeout)
+                except asyncio.TimeoutError:
+                    job.timeouts += 1
+                    error = f"timeout after {job.timeout}s"
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+
+                job.record((time.perf_counter() - started) * 1000, error)
+                if error is not None:
+                    print(f"[ERROR][Scheduler] - Задание {job.name}: {error}")
+        finally:
+            job.running -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.owner_id,
+            "lease_table": self.lease_table,
+            "lease_degraded": self.lease_degraded,
+            "max_concurrent_jobs": self.max_concurrent,
+            "running": sum(job.running for job in self.jobs.values()),
+            "jobs": [job.metrics() for job in self.jobs.values()]
+        }
+
+def register_default_jobs():
+    from app.core.database.aio import run_in_db_executor
+    from app.services.auth.otp_service import cleanup_expired_otps
+    from app.services.market.token_snapshot import token_snapshot_service
+    from app.services.market.global_data.global_market import global_market_service
+    from app.services.market.ingestion import token_stats_ingestion
+
+    # Снимок токенов и L1 глобального рынка живут в памяти процесса, поэтому без аренды:
+    # за обращения к upstream глобального рынка отвечает аренда самого кэша
+    scheduler.register(
+        "token_snapshot_refresh",
+        token_snapshot_service.refresh,
+        settings.TOKEN_SNAPSHOT_REFRESH_SECONDS,
+        lease=False
+    )
+    scheduler.register(
+        "global_market_refresh",
+        global_market_service.refresh_if_due,
+        settings.GLOBAL_MARKET_REFRESH_CHECK_SECONDS,
+        lease=False
+    )
+    scheduler.register(
+        "otp_cleanup",
+        lambda: run_in_db_executor(cleanup_expired_otps),
+        settings.OTP_CLEANUP_INTERVAL_SECONDS
+    )
+    scheduler.register(
+        "token_stats_ingestion",
+        token_stats_ingestion.run,
+        settings.INGESTION_INTERVAL_SECONDS
+    )
+
+scheduler = Scheduler()
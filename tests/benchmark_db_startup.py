@@ -0,0 +1,65 @@
+import time
+import tracemalloc
+
+import boto3
+
+from app.core.security.config import settings
+
+TABLES = [
+    "users",
+    "otp_codes",
+    "LiberandumAggregationToken",
+    "LiberandumAggregationTokenStats",
+    "LiberandumAggregationExchanges",
+    "LiberandumAggregationExchangesStats",
+    "LiberandumAggregationPeople",
+    "LiberandumAggregationPlatform",
+    "LiberandumAggregationRoadmaps",
+    "LiberandumAggregationSecurityAudits",
+    "market_globals_cache",
+]
+
+def legacy_startup():
+    # Старое поведение: отдельные client + resource и ListTables на каждый репозиторий
+    clients = []
+    for _ in TABLES:
+        client = boto3.client(
+            'dynamodb',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION or None
+        )
+        resource = boto3.resource(
+            'dynamodb',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION or None
+        )
+        list(resource.tables.all())
+        clients.append((client, resource))
+    return clients
+
+def shared_startup():
+    from app.core.database.repositories.generic import GenericRepository
+
+    repositories = []
+    for table_name in TABLES:
+        repo = GenericRepository(table_name)
+        repo._init_clients()
+        repositories.append(repo)
+    return repositories
+
+def measure(name: str, func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - started) * 1000
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name}: {elapsed:.1f}ms, память: {current / 1024 / 1024:.1f}MB (пик {peak / 1024 / 1024:.1f}MB)")
+    return result
+
+if __name__ == "__main__":
+    print(f"Репозиториев: {len(TABLES)}")
+    legacy = measure("legacy (client на репозиторий)", legacy_startup)
+    shared = measure("shared (один пул на процесс)", shared_startup)
@@ -0,0 +1,78 @@
+import asyncio
+import socket
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from app.services.http_client import get_http_client, close_http_clients
+
+REQUESTS = 500
+CONCURRENCY = 20
+
+async def mock_app(scope, receive, send):
+    # Минимальный upstream: отвечает как /simple/price
+    if scope['type'] != 'http':
+        return
+    body = b'{"bitcoin":{"usd":65000.0}}'
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_mock_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(mock_app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def per_call_client(url: str):
+    # Старое поведение: новый AsyncClient (и новое соединение) на каждый запрос
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        await client.get(url)
+
+async def shared_client(url: str):
+    await get_http_client(url).get(url)
+
+async def run(name: str, call, url: str):
+    latencies = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await call(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name}: {REQUESTS / elapsed:.0f} req/s, p50 {statistics.median(latencies):.2f}ms, p95 {p95:.2f}ms")
+
+async def main():
+    port = free_port()
+    server = start_mock_server(port)
+    url = f"http://127.0.0.1:{port}/api/v3/simple/price"
+
+    print(f"Запросов: {REQUESTS}, параллельно: {CONCURRENCY}")
+    await run("новый клиент на запрос", per_call_client, url)
+    await run("общий клиент", shared_client, url)
+
+    await close_http_clients()
+    server.should_exit = True
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+import asyncio
+import contextlib
+import io
+import time
+
+from app.services.market import price_poller
+from app.services.market.price_broker import (
+    InMemoryPriceBroker, RedisPriceBroker, CLAIM_LEASE_SCRIPT, RELEASE_LEASE_SCRIPT, script_sha
+)
+from app.services.market.websocket_manager import ConnectionManager
+
+WORKERS = 4
+TOKENS = 100
+CLIENTS_PER_WORKER = 50
+SECONDS = 3
+
+class StandInServer:
+    """Локальная замена Redis: только команды, которые использует брокер (скрипты аренд, PUBLISH, SUBSCRIBE)."""
+
+    def __init__(self):
+        self.values = {}
+        self.subscribers = {}
+        # Скрипты аренд исполняются на Python; EVALSHA до первого EVAL отвечает NOSCRIPT, как пустой кэш Redis
+        self.scripts = {script_sha(CLAIM_LEASE_SCRIPT): self._claim, script_sha(RELEASE_LEASE_SCRIPT): self._release}
+        self.loaded = set()
+
+    def _claim(self, key, owner, ttl_ms):
+        current = self._get(key)
+        if current is not None and current != owner:
+            return 0
+        self.values[key] = (owner, time.monotonic() + int(ttl_ms) / 1000)
+        return 1
+
+    def _release(self, key, owner):
+        if self._get(key) != owner:
+            return 0
+        del self.values[key]
+        return 1
+
+    def _get(self, key):
+        value = self.values.get(key)
+        if value is None:
+            return None
+        if value[1] <= time.monotonic():
+            del self.values[key]
+            return None
+        return value[0]
+
+    @staticmethod
+    def _bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def handle(self, reader, writer):
+        try:
+            await self._serve(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            for subscribers in self.subscribers.values():
+                subscribers.discard(writer)
+
+    async def _serve(self, reader, writer):
+        while True:
+            args = await self._read_command(reader)
+            if args is None:
+                break
+
+            command = args[0].upper()
+            if command in (b"EVAL", b"EVALSHA"):
+                sha = script_sha(args[1].decode("utf-8")) if command == b"EVAL" else args[1].decode("utf-8")
+                if command == b"EVAL":
+                    self.loaded.add(sha)
+                if sha not in self.loaded or sha not in self.scripts:
+                    writer.write(b"-NOSCRIPT No matching script\r\n")
+                else:
+                    writer.write(b":%d\r\n" % self.scripts[sha](*args[3:]))
+            elif command == b"PUBLISH":
+                targets = list(self.subscribers.get(args[1], ()))
+                message = b"*3\r\n" + self._bulk(b"message") + self._bulk(args[1]) + self._bulk(args[2])
+                for target in targets:
+                    target.write(message)
+                writer.write(b":%d\r\n" % len(targets))
+            elif command == b"SUBSCRIBE":
+                self.subscribers.setdefault(args[1], set()).add(writer)
+                writer.write(b"*3\r\n" + self._bulk(b"subscribe") + self._bulk(args[1]) + b":1\r\n")
+            else:
+                writer.write(b"-ERR unknown command\r\n")
+            await writer.drain()
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.received += 1
+
+async def run(name: str, make_broker):
+    upstream_calls = 0
+
+    async def get_token_prices(token_ids, currency="usd", priority=0):
+        nonlocal upstream_calls
+        upstream_calls += 1
+        now = time.time()
+        return {token_id: {"token_id": token_id, "price": now} for token_id in token_ids}
+
+    price_poller.coingecko_service.get_token_prices = get_token_prices
+
+    managers = []
+    sockets = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(WORKERS):
+            broker = make_broker()
+            await broker.start()
+            manager = ConnectionManager(broker)
+            manager.poller.base_interval = manager.poller.interval = 0.5
+            manager.poller._min_interval = lambda batches: 0.5
+            managers.append(manager)
+
+        await asyncio.sleep(0.2)
+        for manager in managers:
+            for i in range(CLIENTS_PER_WORKER):
+                websocket = FakeWebSocket()
+                sockets.append(websocket)
+                await manager.connect_multiplexed(websocket)
+                manager.subscribe(websocket, [f"token{(i + j) % TOKENS}" for j in range(20)])
+
+        await asyncio.sleep(SECONDS)
+
+        led = [manager.broker.led_tokens for manager in managers]
+        for manager in managers:
+            await manager.poller.stop()
+            await manager.broker.stop()
+
+    starved = sum(1 for websocket in sockets if websocket.received < 2)
+    print(f"{name}: upstream вызовов {upstream_calls}, токенов у лидеров {led}, "
+          f"кадров клиентам {sum(w.received for w in sockets)}, клиентов без обновлений {starved}")
+
+async def main():
+    server = StandInServer()
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+
+    print(f"Воркеров: {WORKERS}, токенов: {TOKENS}, клиентов на воркер: {CLIENTS_PER_WORKER}, {SECONDS}s")
+    await run("память (каждый воркер опрашивает сам)", InMemoryPriceBroker)
+    await run("брокер (один лидер на токен)", lambda: RedisPriceBroker(f"redis://127.0.0.1:{port}/0"))
+
+    listener.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
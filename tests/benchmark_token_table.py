@@ -0,0 +1,70 @@
+import random
+import time
+import tracemalloc
+from decimal import Decimal
+
+from app.services.market.token_table import TokenTable
+from app.services.market.token_sort import SORT_MODES
+from app.services.market.utils import safe_float, get_token_category
+
+TOKENS = 20000
+ROUNDS = 5
+
+NAMES = ["Bitcoin", "Doge Meme", "Swap Finance", "Layer Chain", "Lending Protocol", "Plain Token"]
+
+def make_stats(count: int):
+    random.seed(42)
+    stats = []
+    for i in range(count):
+        # Как в boto3: числа приходят Decimal, часть полей строками
+        stats.append({
+            'id': f"id-{i}",
+            'symbol': f"T{i}",
+            'coin_name': random.choice(NAMES),
+            'coingecko_id': f"token-{i}",
+            'price': Decimal(str(round(random.uniform(0.0001, 60000), 6))),
+            'market_cap': str(random.randint(0, 10 ** 12)),
+            'trading_volume_24h': f"{random.randint(0, 10 ** 9):,}",
+            'volume_24h_change_24h': Decimal(str(round(random.uniform(-30, 30), 4))),
+            'price_change_7d': Decimal(str(round(random.uniform(-50, 50), 4))),
+            'market_cap_rank': Decimal(i + 1),
+            'is_halal': random.choice([True, False, None]),
+        })
+    return stats
+
+def dict_sort(stats, mode):
+    # Путь до колоночной таблицы: разбор строк в каждом ключе сортировки
+    if mode == "category":
+        order = {"layer1": 0, "stablecoin": 1, "defi": 2, "layer2": 3, "meme": 4, "other": 5}
+        return sorted(stats, key=lambda x: (order.get(get_token_category(x), 10), -safe_float(x.get('market_cap'))))
+    return sorted(stats, key=lambda x: safe_float(x.get('market_cap')), reverse=True)
+
+def measure_memory(func):
+    tracemalloc.start()
+    result = func()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+def timed(func, rounds: int = ROUNDS) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) * 1000 / rounds
+
+if __name__ == "__main__":
+    stats, dict_bytes = measure_memory(lambda: make_stats(TOKENS))
+    table, _ = measure_memory(lambda: TokenTable(stats))
+
+    print(f"Токенов: {TOKENS}")
+    print(f"dict: {dict_bytes / TOKENS:.0f} байт/токен")
+    print(f"table: {table.nbytes / TOKENS:.0f} байт/токен (колонки)")
+    print(f"построение таблицы: {timed(lambda: TokenTable(stats), 1):.1f}ms")
+
+    for mode in ("market_cap", "category"):
+        dict_ms = timed(lambda: dict_sort(stats, mode))
+        table_ms = timed(lambda: table.argsort(mode))
+        print(f"sort {mode}: dict {dict_ms:.1f}ms, table {table_ms:.2f}ms")
+
+    all_modes_ms = timed(lambda: [table.argsort(mode) for mode in SORT_MODES])
+    print(f"все {len(SORT_MODES)} порядков: {all_modes_ms:.1f}ms")
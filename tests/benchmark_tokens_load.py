@@ -0,0 +1,72 @@
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+BASE_URL = "http://localhost:8000"
+CONCURRENCY = 50
+REQUESTS_PER_WORKER = 20
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def tokens_worker(client: httpx.AsyncClient, latencies: list, errors: list):
+    for _ in range(REQUESTS_PER_WORKER):
+        started = time.perf_counter()
+        try:
+            response = await client.get("/market/tokens/", params={"limit": 100, "sort": "market_cap"})
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except Exception as e:
+            errors.append(str(e))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+async def probe_worker(client: httpx.AsyncClient, latencies: list, stop: asyncio.Event):
+    # "/" не ходит в DynamoDB: его задержка показывает, блокируется ли event loop
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            await client.get("/")
+        except Exception:
+            pass
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.05)
+
+def report(name: str, latencies: list):
+    if not latencies:
+        print(f"{name}: нет данных")
+        return
+    print(
+        f"{name}: n={len(latencies)} "
+        f"p50={percentile(latencies, 50):.1f}ms "
+        f"p95={percentile(latencies, 95):.1f}ms "
+        f"p99={percentile(latencies, 99):.1f}ms "
+        f"mean={statistics.mean(latencies):.1f}ms"
+    )
+
+async def run_benchmark(base_url: str):
+    limits = httpx.Limits(max_connections=CONCURRENCY + 5, max_keepalive_connections=CONCURRENCY + 5)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        token_latencies, probe_latencies, errors = [], [], []
+        stop = asyncio.Event()
+
+        probe = asyncio.create_task(probe_worker(client, probe_latencies, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(tokens_worker(client, token_latencies, errors) for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+        print(f"Конкурентность: {CONCURRENCY}, запросов: {len(token_latencies)}, время: {elapsed:.1f}s, "
+              f"RPS: {len(token_latencies) / elapsed:.1f}, ошибок: {len(errors)}")
+        report("GET /market/tokens", token_latencies)
+        report("GET / (probe)", probe_latencies)
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(sys.argv[1] if len(sys.argv) > 1 else BASE_URL))
@@ -0,0 +1,102 @@
+import asyncio
+import contextlib
+import io
+import json
+import random
+import time
+
+from app.services.market.utils import orjson
+from app.services.market.websocket_manager import ConnectionManager
+
+CLIENTS = 10_000
+TOKENS = 50
+SLOW_SHARE = 0.01
+SLOW_DELAY = 0.2
+TICKS = 5
+
+class FakeWebSocket:
+    def __init__(self, slow: bool):
+        self.delay = SLOW_DELAY if slow else 0.0
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+
+def price(token_id: str, tick: int):
+    # Меняется только цена и только у половины токенов: остальное должно уйти дельтой или не уйти вовсе
+    changed = tick and int(token_id[5:]) % 2 == 0
+    return {
+        "token_id": token_id,
+        "symbol": token_id.upper(),
+        "price": 100.0 + (tick if changed else 0),
+        "price_change_24h": 1.5,
+        "volume_24h": 1_000_000.0,
+        "market_cap": 50_000_000.0,
+        "timestamp": int(time.time() * 1000),
+        "last_updated": None,
+        "api_source": "free"
+    }
+
+def make_sockets():
+    return [(FakeWebSocket(random.random() < SLOW_SHARE), f"token{i % TOKENS}") for i in range(CLIENTS)]
+
+async def sequential_broadcast(sockets):
+    # Старый путь: полный payload, json.dumps на каждый токен и await send_text по очереди
+    by_token = {}
+    for websocket, token_id in sockets:
+        by_token.setdefault(token_id, []).append(websocket)
+
+    started = time.perf_counter()
+    for tick in range(TICKS):
+        for token_id, subscribers in by_token.items():
+            message = json.dumps({"type": "price_update", "data": price(token_id, tick)})
+            for websocket in subscribers:
+                await websocket.send_text(message)
+    elapsed = time.perf_counter() - started
+
+    fast = [websocket for websocket, _ in sockets if not websocket.delay]
+    print(f"последовательно: {elapsed:.2f}s на {TICKS} тиков, сообщений быстрым клиентам {sum(w.received for w in fast)}")
+
+async def queued_broadcast(sockets):
+    manager = ConnectionManager()
+    manager.poller.ensure_running = lambda new_token=False: None
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for websocket, token_id in sockets:
+            await manager.connect(websocket, token_id)
+
+    fast = [websocket for websocket, _ in sockets if not websocket.delay]
+    started = time.perf_counter()
+    for tick in range(TICKS):
+        tick_started = time.perf_counter()
+        await manager._publish_prices({f"token{i}": price(f"token{i}", tick) for i in range(TOKENS)})
+        publish_ms = (time.perf_counter() - tick_started) * 1000
+        await asyncio.sleep(0)
+        print(f"  тик {tick}: публикация {publish_ms:.1f}ms")
+
+    # Ждем, пока быстрые клиенты выгребут свои очереди
+    while any(manager.clients[w].stats()["pending"] for w in fast):
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+
+    metrics = manager.metrics()
+    print(f"очереди: {elapsed:.2f}s на {TICKS} тиков, сообщений быстрым клиентам {sum(w.received for w in fast)}, "
+          f"сериализаций {metrics['messages_serialized']}, тиков без изменений {metrics['ticks_skipped']}, "
+          f"схлопнуто {metrics['coalesced']}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for websocket, _ in sockets:
+            manager.disconnect(websocket)
+
+async def main():
+    print(f"Клиентов: {CLIENTS}, токенов: {TOKENS}, медленных: {SLOW_SHARE:.0%} по {SLOW_DELAY}s, json: {'orjson' if orjson else 'stdlib'}")
+    await queued_broadcast(make_sockets())
+    await sequential_broadcast(make_sockets())
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+import time
+
+from app.services.market.coingecko_gateway import CircuitBreaker
+
+def half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    # Сдвигаем момент открытия назад вместо ожидания reset_timeout
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+    assert breaker.state == "half_open"
+    return breaker
+
+def test_half_open_admits_exactly_one_probe():
+    breaker = half_open_breaker()
+
+    admitted = [breaker.allow() for _ in range(10)]
+
+    assert admitted == [True] + [False] * 9
+
+def test_probe_without_verdict_frees_the_slot():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    started_at = breaker.probe_started_at
+
+    breaker.end_probe(started_at)
+
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_stale_end_probe_does_not_free_a_newer_probe():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    old_probe = breaker.probe_started_at
+    breaker.probe_started_at = old_probe - breaker.reset_timeout
+    # Зависшая проба истекла: место занимает новая
+    assert breaker.allow()
+
+    breaker.end_probe(old_probe - breaker.reset_timeout - 1)
+
+    assert not breaker.allow()
+
+def test_probe_verdict_closes_or_reopens():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
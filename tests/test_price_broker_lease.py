@@ -0,0 +1,76 @@
+import asyncio
+import contextlib
+import io
+
+from app.services.market.price_broker import RedisPriceBroker, CLAIM_LEASE_SCRIPT, RELEASE_LEASE_SCRIPT, script_sha
+from benchmark_price_broker import StandInServer
+
+TOKENS = ["bitcoin", "ethereum", "solana"]
+
+async def with_brokers(scenario):
+    server = StandInServer()
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    url = f"redis://127.0.0.1:{listener.sockets[0].getsockname()[1]}/0"
+    brokers = [RedisPriceBroker(url), RedisPriceBroker(url)]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for broker in brokers:
+                await broker.start()
+            while not all(broker.subscribed for broker in brokers):
+                await asyncio.sleep(0.01)
+            await scenario(server, *brokers)
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for broker in brokers:
+                await broker.stop()
+        listener.close()
+
+def test_owner_claims_renews_and_releases():
+    async def scenario(server, first, second):
+        assert await first.claim(TOKENS, ttl=30) == TOKENS
+        assert await second.claim(TOKENS, ttl=30) == []
+
+        # Продление своей аренды не отдает ее и не меняет владельца
+        assert await first.claim(TOKENS, ttl=30) == TOKENS
+        assert await second.claim(TOKENS, ttl=30) == []
+
+        await first.release(TOKENS[:1])
+        assert await second.claim(TOKENS, ttl=30) == TOKENS[:1]
+        assert await first.claim(TOKENS, ttl=30) == TOKENS[1:]
+
+    asyncio.run(with_brokers(scenario))
+
+def test_release_by_non_owner_keeps_the_lease():
+    async def scenario(server, first, second):
+        assert await first.claim(TOKENS, ttl=30) == TOKENS
+
+        await second.release(TOKENS)
+
+        assert await second.claim(TOKENS, ttl=30) == []
+        assert await first.claim(TOKENS, ttl=30) == TOKENS
+
+    asyncio.run(with_brokers(scenario))
+
+def test_expired_lease_cannot_be_renewed_or_released_by_old_owner():
+    async def scenario(server, first, second):
+        assert await first.claim(TOKENS, ttl=1) == TOKENS
+        await asyncio.sleep(1.1)
+        assert await second.claim(TOKENS, ttl=30) == TOKENS
+
+        # Бывший владелец не продлевает и не удаляет аренду, перешедшую другому воркеру
+        assert await first.claim(TOKENS, ttl=30) == []
+        await first.release(TOKENS)
+        assert await second.claim(TOKENS, ttl=30) == TOKENS
+
+    asyncio.run(with_brokers(scenario))
+
+def test_scripts_are_loaded_once_and_then_sent_by_sha():
+    async def scenario(server, first, second):
+        assert server.loaded == set()
+        await first.claim(TOKENS, ttl=30)
+        await first.release(TOKENS)
+
+        assert server.loaded == {script_sha(CLAIM_LEASE_SCRIPT), script_sha(RELEASE_LEASE_SCRIPT)}
+        assert not first.degraded and first.errors == 0
+
+    asyncio.run(with_brokers(scenario))
@@ -0,0 +1,89 @@
+import random
+
+from app.services.market.search_index import SearchIndex
+
+WORDS = ("bit", "coin", "ether", "wrapped", "usd", "doge", "swap", "finance", "chain", "token", "pepe", "sol")
+QUERIES = ("b", "bit", "coin", "eth", "wrapped bit", "usd", "oge", "swap", "tok", "ain", "zzz")
+
+def make_documents(rng: random.Random, count: int):
+    documents = {}
+    for i in range(count):
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        symbol = "".join(word[0] for word in name.split()).upper() + str(i % 7)
+        documents[f"doc{i}"] = (symbol, (symbol, name, f"id-{i}"), float(rng.randint(0, 1000)))
+    return documents
+
+def mutate(rng: random.Random, documents, changes: int):
+    documents = dict(documents)
+    ids = list(documents)
+    for doc_id in rng.sample(ids, changes):
+        del documents[doc_id]
+    for doc_id in rng.sample([doc_id for doc_id in ids if doc_id in documents], changes):
+        symbol, terms, _ = documents[doc_id]
+        documents[doc_id] = (symbol, terms + (rng.choice(WORDS),), float(rng.randint(0, 1000)))
+    for i in range(changes):
+        documents[f"new{i}"] = (f"N{i}", (f"N{i}", f"{rng.choice(WORDS)} new {i}"), float(rng.randint(0, 1000)))
+    return documents
+
+def fresh(documents) -> SearchIndex:
+    index = SearchIndex("fresh")
+    index.sync(documents)
+    return index
+
+def assert_same(incremental: SearchIndex, expected: SearchIndex):
+    state, expected_state = incremental._state, expected._state
+    assert {doc_id: document.signature() for doc_id, document in state.documents.items()} == \
+        {doc_id: document.signature() for doc_id, document in expected_state.documents.items()}
+    assert state.symbols == expected_state.symbols
+    assert state.trigrams == expected_state.trigrams
+    assert state.symbol_keys == expected_state.symbol_keys
+    assert state.prefix_keys == expected_state.prefix_keys
+    assert state.ranked == expected_state.ranked
+
+    for query in QUERIES:
+        assert incremental.search(query, limit=15) == expected.search(query, limit=15), query
+        assert incremental.fuzzy(query, limit=15) == expected.fuzzy(query, limit=15), query
+
+def test_small_sync_matches_fresh_build():
+    # Несколько изменений: ключи правятся точечно через bisect
+    rng = random.Random(1)
+    documents = make_documents(rng, 300)
+    index = fresh(documents)
+
+    updated = mutate(rng, documents, 5)
+    stats = index.sync(updated)
+
+    assert stats["removed"] == 5
+    assert_same(index, fresh(updated))
+
+def test_large_sync_matches_fresh_build():
+    # Крупный пакет изменений: дельта сортируется и сливается с текущими ключами
+    rng = random.Random(2)
+    documents = make_documents(rng, 500)
+    index = fresh(documents)
+
+    for _ in range(3):
+        documents = mutate(rng, documents, 80)
+        index.sync(documents)
+        assert_same(index, fresh(documents))
+
+def test_sync_without_changes_keeps_state():
+    documents = make_documents(random.Random(3), 50)
+    index = fresh(documents)
+    state = index._state
+
+    assert index.sync(documents) == {"documents": 50, "changed": 0, "removed": 0}
+    assert index._state is state
+
+def test_upsert_and_remove_match_fresh_build():
+    rng = random.Random(4)
+    documents = make_documents(rng, 100)
+    index = fresh(documents)
+
+    symbol, terms, _ = documents["doc3"]
+    documents["doc3"] = (symbol, terms, 5000.0)
+    index.upsert("doc3", symbol, terms, 5000.0)
+    del documents["doc7"]
+    index.remove("doc7")
+
+    assert_same(index, fresh(documents))